@@ -0,0 +1,548 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Benchmarks of construction, parsing, serialization and bounds with
+synthetic geometries of 10 to 1M vertices and collections of 1 to 1M
+features, and of the encodings and file formats.
+
+Every suite has a ``params`` list of sizes, ``setup`` builds the input
+and each ``time_*`` method exercises one public entry point. The number
+of vertices or features a call processes is the parameter, which the
+runner uses to report throughput.  Construction, parsing and
+serialization have ``peakmem_*`` counterparts, asv records the peak
+resident memory of the process while they run.  File based suites
+write their input to a temporary directory that ``teardown`` removes.
+"""
+import math
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+
+from pygeoif import flatgeobuf, geometry, kml, loader, shapefile, streaming
+
+VERTICES = [10, 1000, 100000, 1000000]
+FEATURES = [1, 100, 10000, 1000000]
+
+
+def ring_coordinates(n):
+    """ A closed star shaped ring with n vertices, it is valid """
+    coords = []
+    for i in range(n - 1):
+        angle = 2 * math.pi * i / (n - 1)
+        radius = 1.0 + 0.1 * math.sin(7 * angle)
+        coords.append((radius * math.cos(angle), radius * math.sin(angle)))
+    coords.append(coords[0])
+    return coords
+
+
+def line_coordinates(n):
+    return [(float(i), math.sin(i / 10.0)) for i in range(n)]
+
+
+def line_wkb(coords):
+    flat = [c for coord in coords for c in coord]
+    return struct.pack('<BII{0}d'.format(len(flat)), 1, 2, len(coords),
+                       *flat)
+
+
+def split(coords, parts):
+    """ coords cut into parts lists of at least 2 coordinates """
+    size = max(2, len(coords) // parts)
+    return [coords[i:i + size] for i in range(0, len(coords) - 1, size)
+            if len(coords[i:i + size]) > 1]
+
+
+def square_ring(x, y, n):
+    """ A closed ring around the unit square at x, y with n vertices """
+    side = max(1, (n - 1) // 4)
+    coords = [(x + i / float(side), y) for i in range(side)]
+    coords += [(x + 1, y + i / float(side)) for i in range(side)]
+    coords += [(x + 1 - i / float(side), y + 1) for i in range(side)]
+    coords += [(x, y + 1 - i / float(side)) for i in range(side)]
+    return coords + [coords[0]]
+
+
+class PointSuite(object):
+    params = FEATURES
+    param_names = ['points']
+
+    def setup(self, n):
+        self.coords = [(float(i), -float(i)) for i in range(n)]
+        self.points = [geometry.Point(*xy) for xy in self.coords]
+        self.wkts = [p.to_wkt() for p in self.points]
+        self.gis = [p.__geo_interface__ for p in self.points]
+
+    def time_construct(self, n):
+        for xy in self.coords:
+            geometry.Point(*xy)
+
+    def time_from_wkt(self, n):
+        for wkt in self.wkts:
+            geometry.from_wkt(wkt)
+
+    def time_as_shape(self, n):
+        for gi in self.gis:
+            geometry.as_shape(gi)
+
+    def time_to_wkt(self, n):
+        for point in self.points:
+            point.to_wkt()
+
+    def time_bounds(self, n):
+        for point in self.points:
+            point.bounds
+
+    def peakmem_construct(self, n):
+        [geometry.Point(*xy) for xy in self.coords]
+
+
+class LineStringSuite(object):
+    params = VERTICES
+    param_names = ['vertices']
+
+    def setup(self, n):
+        self.coords = line_coordinates(n)
+        self.buffer = array('d', [c for xy in self.coords for c in xy])
+        self.line = geometry.LineString(self.coords)
+        self.wkt = self.line.to_wkt()
+        self.wkb = line_wkb(self.coords)
+        self.gi = self.line.__geo_interface__
+
+    def time_construct(self, n):
+        geometry.LineString(self.coords)
+
+    def time_construct_buffer(self, n):
+        geometry.LineString(self.buffer)
+
+    def time_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def time_from_wkb(self, n):
+        geometry.from_wkb(self.wkb)
+
+    def time_as_shape(self, n):
+        geometry.as_shape(self.gi)
+
+    def time_to_wkt(self, n):
+        self.line.to_wkt()
+
+    def time_geo_interface(self, n):
+        self.line.__geo_interface__
+
+    def time_bounds(self, n):
+        self.line.bounds
+
+    def time_coords(self, n):
+        for coord in self.line.coords:
+            pass
+
+    def peakmem_construct(self, n):
+        geometry.LineString(self.coords)
+
+    def peakmem_construct_buffer(self, n):
+        geometry.LineString(self.buffer)
+
+    def peakmem_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def peakmem_from_wkb(self, n):
+        geometry.from_wkb(self.wkb)
+
+    def peakmem_as_shape(self, n):
+        geometry.as_shape(self.gi)
+
+    def peakmem_to_wkt(self, n):
+        self.line.to_wkt()
+
+    def peakmem_geo_interface(self, n):
+        self.line.__geo_interface__
+
+    def time_convex_hull(self, n):
+        geometry.convex_hull(self.line)
+
+
+class PolygonSuite(object):
+    params = VERTICES
+    param_names = ['vertices']
+
+    def setup(self, n):
+        self.coords = ring_coordinates(n)
+        self.polygon = geometry.Polygon(self.coords)
+        self.wkt = self.polygon.to_wkt()
+        self.gi = self.polygon.__geo_interface__
+
+    def time_construct(self, n):
+        geometry.Polygon(self.coords)
+
+    def time_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def time_as_shape(self, n):
+        geometry.as_shape(self.gi)
+
+    def time_to_wkt(self, n):
+        self.polygon.to_wkt()
+
+    def time_geo_interface(self, n):
+        self.polygon.__geo_interface__
+
+    def time_bounds(self, n):
+        self.polygon.bounds
+
+    def time_signed_area(self, n):
+        geometry.signed_area(self.coords)
+
+    def time_orient(self, n):
+        geometry.orient(self.polygon)
+
+    def time_is_valid(self, n):
+        geometry.is_valid(self.polygon)
+
+    def peakmem_construct(self, n):
+        geometry.Polygon(self.coords)
+
+    def peakmem_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def peakmem_as_shape(self, n):
+        geometry.as_shape(self.gi)
+
+    def peakmem_to_wkt(self, n):
+        self.polygon.to_wkt()
+
+
+class MultiPointSuite(object):
+    params = VERTICES
+    param_names = ['vertices']
+
+    def setup(self, n):
+        self.coords = line_coordinates(n)
+        self.multipoint = geometry.MultiPoint(self.coords)
+        self.wkt = self.multipoint.to_wkt()
+
+    def time_construct(self, n):
+        geometry.MultiPoint(self.coords)
+
+    def time_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def time_to_wkt(self, n):
+        self.multipoint.to_wkt()
+
+    def time_bounds(self, n):
+        # collections cache their bounds, measure the computation
+        self.multipoint._bbox = None
+        self.multipoint.bounds
+
+    def peakmem_construct(self, n):
+        geometry.MultiPoint(self.coords)
+
+    def peakmem_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def peakmem_to_wkt(self, n):
+        self.multipoint.to_wkt()
+
+
+class MultiLineStringSuite(object):
+    params = VERTICES
+    param_names = ['vertices']
+
+    def setup(self, n):
+        self.lines = split(line_coordinates(n), 10)
+        self.multi = geometry.MultiLineString(self.lines)
+        self.wkt = self.multi.to_wkt()
+        self.gi = self.multi.__geo_interface__
+
+    def time_construct(self, n):
+        geometry.MultiLineString(self.lines)
+
+    def time_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def time_as_shape(self, n):
+        geometry.as_shape(self.gi)
+
+    def time_to_wkt(self, n):
+        self.multi.to_wkt()
+
+    def time_bounds(self, n):
+        self.multi._bbox = None
+        self.multi.bounds
+
+    def time_to_polylines(self, n):
+        self.multi.to_polylines()
+
+    def peakmem_construct(self, n):
+        geometry.MultiLineString(self.lines)
+
+    def peakmem_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+
+class MultiPolygonSuite(object):
+    params = VERTICES
+    param_names = ['vertices']
+
+    def setup(self, n):
+        count = max(1, n // 100)
+        self.polygons = [(square_ring(2 * i, 0, n // count), [])
+                         for i in range(count)]
+        self.multi = geometry.MultiPolygon(self.polygons)
+        self.wkt = self.multi.to_wkt()
+        self.gi = self.multi.__geo_interface__
+
+    def time_construct(self, n):
+        geometry.MultiPolygon(self.polygons)
+
+    def time_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def time_as_shape(self, n):
+        geometry.as_shape(self.gi)
+
+    def time_to_wkt(self, n):
+        self.multi.to_wkt()
+
+    def time_bounds(self, n):
+        self.multi._bbox = None
+        self.multi.bounds
+
+    def time_is_valid(self, n):
+        geometry.is_valid(self.multi)
+
+    def time_normalize_orientation(self, n):
+        geometry.normalize_orientation(self.multi)
+
+    def peakmem_construct(self, n):
+        geometry.MultiPolygon(self.polygons)
+
+    def peakmem_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+
+class GeometryCollectionSuite(object):
+    params = VERTICES
+    param_names = ['vertices']
+
+    def setup(self, n):
+        coords = line_coordinates(n)
+        third = max(2, n // 3)
+        self.geoms = [geometry.LineString(coords[:third]),
+                      geometry.Polygon(square_ring(0, 0, third))]
+        self.geoms += [geometry.Point(*xy) for xy in coords[third:2 * third]]
+        self.collection = geometry.GeometryCollection(self.geoms)
+        self.wkt = self.collection.to_wkt()
+        self.gi = self.collection.__geo_interface__
+
+    def time_construct(self, n):
+        geometry.GeometryCollection(self.geoms)
+
+    def time_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+    def time_as_shape(self, n):
+        geometry.as_shape(self.gi)
+
+    def time_to_wkt(self, n):
+        self.collection.to_wkt()
+
+    def time_geo_interface(self, n):
+        self.collection.__geo_interface__
+
+    def time_bounds(self, n):
+        self.collection._bbox = None
+        self.collection.bounds
+
+    def peakmem_from_wkt(self, n):
+        geometry.from_wkt(self.wkt)
+
+
+class EncodingSuite(object):
+    params = VERTICES
+    param_names = ['vertices']
+
+    def setup(self, n):
+        self.line = geometry.LineString(line_coordinates(n))
+        self.wkt = self.line.to_wkt()
+        self.wkb = line_wkb(line_coordinates(n))
+        self.gi = self.line.__geo_interface__
+        self.twkb = self.line.to_twkb(precision=5)
+        self.polyline = self.line.to_polyline()
+
+    def time_to_twkb(self, n):
+        self.line.to_twkb(precision=5)
+
+    def time_from_twkb(self, n):
+        geometry.from_twkb(self.twkb)
+
+    def time_to_polyline(self, n):
+        self.line.to_polyline()
+
+    def time_from_polyline(self, n):
+        geometry.LineString.from_polyline(self.polyline)
+
+    def time_wkt_bounds(self, n):
+        geometry.wkt_bounds(self.wkt)
+
+    def time_wkb_bounds(self, n):
+        geometry.wkb_bounds(self.wkb)
+
+    def time_geojson_bounds(self, n):
+        geometry.geojson_bounds(self.gi)
+
+    def time_mapping(self, n):
+        geometry.mapping(self.line)
+
+    def peakmem_from_twkb(self, n):
+        geometry.from_twkb(self.twkb)
+
+    def peakmem_from_polyline(self, n):
+        geometry.LineString.from_polyline(self.polyline)
+
+
+class LoaderSuite(object):
+    """ Reading and writing files, the parameter is the number of point
+    features in the file.  Writing the inputs of 1M features takes
+    longer than the benchmarks themselves, 100k is the largest size. """
+    params = FEATURES[:-1] + [100000]
+    param_names = ['features']
+
+    def setup(self, n):
+        self.directory = tempfile.mkdtemp()
+        self.features = [
+            geometry.Feature(geometry.Point(i % 1000, i // 1000),
+                             {'id': i, 'name': 'f{0}'.format(i)})
+            for i in range(n)]
+        self.wkt = self.path('points.wkt')
+        with open(self.wkt, 'w') as f:
+            for feature in self.features:
+                f.write(feature.geometry.to_wkt() + '\n')
+        self.csv = self.path('points.csv')
+        with open(self.csv, 'w') as f:
+            f.write('id,name,x,y\n')
+            for feature in self.features:
+                x, y = feature.geometry.coords[0]
+                f.write('{0},{1},{2},{3}\n'.format(
+                    feature.properties['id'], feature.properties['name'],
+                    x, y))
+        self.shp = self.path('points.shp')
+        shapefile.write_features(self.shp, self.features)
+        self.fgb = self.path('points.fgb')
+        flatgeobuf.write_features(self.fgb, self.features)
+        self.kml = self.path('points.kml')
+        with open(self.kml, 'w') as f:
+            f.write('<kml xmlns="http://www.opengis.net/kml/2.2"><Document>')
+            for feature in self.features:
+                x, y = feature.geometry.coords[0]
+                f.write('<Placemark><name>{0}</name><Point><coordinates>'
+                        '{1},{2}</coordinates></Point></Placemark>'.format(
+                            feature.properties['name'], x, y))
+            f.write('</Document></kml>')
+        self.lines = [streaming.dumps_feature(feature).encode('utf-8')
+                      for feature in self.features]
+
+    def teardown(self, n):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def time_load_geometries(self, n):
+        loader.load_geometries(self.wkt, processes=1)
+
+    def time_read_csv_features(self, n):
+        for feature in loader.read_csv_features(self.csv, x='x', y='y'):
+            pass
+
+    def time_load_csv_features(self, n):
+        loader.load_csv_features(self.csv, x='x', y='y')
+
+    def time_shapefile_write(self, n):
+        shapefile.write_features(self.path('out.shp'), self.features)
+
+    def time_shapefile_read(self, n):
+        for feature in shapefile.iter_features(self.shp):
+            pass
+
+    def time_flatgeobuf_write(self, n):
+        flatgeobuf.write_features(self.path('out.fgb'), self.features)
+
+    def time_flatgeobuf_read(self, n):
+        for feature in flatgeobuf.iter_features(self.fgb):
+            pass
+
+    def time_kml_read(self, n):
+        for feature in kml.iter_features(self.kml):
+            pass
+
+    def time_parse_feature(self, n):
+        for line in self.lines:
+            streaming.parse_feature(line)
+
+    def peakmem_load_csv_features(self, n):
+        loader.load_csv_features(self.csv, x='x', y='y')
+
+    def peakmem_kml_read(self, n):
+        for feature in kml.iter_features(self.kml):
+            pass
+
+
+class FeatureCollectionSuite(object):
+    params = FEATURES
+    param_names = ['features']
+
+    def setup(self, n):
+        side = int(math.sqrt(n)) + 1
+        self.features = [
+            geometry.Feature(geometry.Point(i % side, i // side), {'id': i})
+            for i in range(n)]
+        self.collection = geometry.FeatureCollection(self.features)
+        self.geometries = [f.geometry for f in self.features]
+
+    def time_construct(self, n):
+        geometry.FeatureCollection(self.features)
+
+    def time_as_shape(self, n):
+        geometry.as_shape(self.collection)
+
+    def time_geo_interface(self, n):
+        self.collection.__geo_interface__
+
+    def time_bounds(self, n):
+        # collections cache their bounds, measure the computation
+        self.collection._bbox = None
+        self.collection.bounds
+
+    def time_sorted_spatially(self, n):
+        self.collection.sorted_spatially()
+
+    def time_geometry_collection(self, n):
+        geometry.GeometryCollection(self.geometries)
+
+    def peakmem_construct(self, n):
+        geometry.FeatureCollection(self.features)
+
+    def peakmem_as_shape(self, n):
+        geometry.as_shape(self.collection)
+
+    def peakmem_geo_interface(self, n):
+        self.collection.__geo_interface__
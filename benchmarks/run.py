@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Run the asv style benchmarks without asv, using only the standard library.
+
+For every benchmark and size the best time per call, the throughput in
+vertices or features per second and the peak memory allocated during a
+call (measured with tracemalloc) are printed.  The ``peakmem_*`` methods
+are left to asv, the peak column covers them here.
+
+    python -m benchmarks.run --max-size 100000 --filter LineString
+"""
+import argparse
+import gc
+import inspect
+import timeit
+import tracemalloc
+
+from . import benchmarks
+
+
+def suites(pattern=''):
+    for name, cls in sorted(vars(benchmarks).items()):
+        if inspect.isclass(cls) and name.endswith('Suite'):
+            for method in sorted(vars(cls)):
+                if method.startswith('time_'):
+                    label = '{0}.{1}'.format(name, method)
+                    if pattern in label:
+                        yield label, cls, method
+
+
+def measure(func, min_time):
+    """ Return the best time of a call and the peak memory it allocates """
+    timer = timeit.Timer(func)
+    number, elapsed = 1, timer.timeit(1)
+    if elapsed < min_time:
+        number = int(min_time / max(elapsed, 1e-9)) + 1
+    best = min(timer.repeat(3, number)) / number
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--max-size', type=int, default=100000,
+                        help='skip parameters larger than this')
+    parser.add_argument('--filter', default='',
+                        help='only run benchmarks containing this string')
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='minimum seconds per timing repeat')
+    args = parser.parse_args(argv)
+    print('{0:<50} {1:>9} {2:>12} {3:>14} {4:>12}'.format(
+        'benchmark', 'size', 'time [s]', 'items/s', 'peak [KiB]'))
+    for label, cls, method in suites(args.filter):
+        for size in cls.params:
+            if size > args.max_size:
+                continue
+            suite = cls()
+            suite.setup(size)
+            func = getattr(suite, method)
+            try:
+                best, peak = measure(lambda: func(size), args.min_time)
+            finally:
+                if hasattr(suite, 'teardown'):
+                    suite.teardown(size)
+            print('{0:<50} {1:>9} {2:>12.6f} {3:>14.0f} {4:>12.1f}'.format(
+                label, size, best, size / best, peak / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,4 +19,11 @@
 from .geometry import Point, LineString, LinearRing, Polygon
 from .geometry import MultiPoint, MultiLineString, MultiPolygon
 from .geometry import GeometryCollection
+from .geometry import CoordinateSequence, GeometrySequence
+from .geometry import FeatureColumns
+from .geometry import PrecisionModel, set_precision, set_default_precision
 from .geometry import as_shape, from_wkt, mapping, orient, signed_area
+from .geometry import from_wkb, from_twkb, normalize_orientation
+from .geometry import convex_hull, explain_validity, is_valid
+from .geometry import sort_spatially
+from .geometry import wkt_bounds, wkb_bounds, geojson_bounds
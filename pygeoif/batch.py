@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Apply functions to many geometries with a thread or process pool.
+
+The input is split into chunks of ``chunksize`` items and every chunk is
+one task, so the cost of pickling the items and results for a process
+pool is paid once per chunk and not per geometry. At most a few chunks
+per worker are in flight, the input can be an unbounded iterator.
+
+Functions sent to a process pool must be picklable, that is defined at
+the top level of a module (no lambdas).
+"""
+from collections import deque
+from concurrent import futures
+from itertools import islice
+
+from . import geometry
+
+#: default number of items per task
+CHUNKSIZE = 1000
+
+
+def _apply(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def _chunks(items, chunksize):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _executor(executor, max_workers):
+    """ Return the executor and True if it has to be shut down after use """
+    if executor == 'thread':
+        return futures.ThreadPoolExecutor(max_workers or 4), True
+    elif executor == 'process':
+        return futures.ProcessPoolExecutor(max_workers), True
+    elif isinstance(executor, futures.Executor):
+        return executor, False
+    raise ValueError("executor must be None, 'thread', 'process' "
+                     "or a concurrent.futures.Executor")
+
+
+def map_geometries(func, items, executor=None, chunksize=CHUNKSIZE,
+                   ordered=True, max_workers=None):
+    """ Yield func(item) for each item.
+
+    executor: None to run in this thread, 'thread' or 'process' for a new
+        pool of max_workers that is shut down when the iteration ends, or
+        an instance of concurrent.futures.Executor.
+    chunksize: number of items passed to a worker at once.
+    ordered: if False the results of a chunk are yielded as soon as it is
+        done, otherwise in the order of the items.
+    """
+    if executor is None:
+        for item in items:
+            yield func(item)
+        return
+    pool, shutdown = _executor(executor, max_workers)
+    window = 2 * (max_workers or getattr(pool, '_max_workers', 4))
+    chunks = _chunks(items, max(1, chunksize))
+    pending = deque()
+    try:
+        for chunk in islice(chunks, window):
+            pending.append(pool.submit(_apply, func, chunk))
+        while pending:
+            if ordered:
+                done = pending.popleft()
+            else:
+                finished, unfinished = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED)
+                done = finished.pop()
+                pending.remove(done)
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(_apply, func, chunk))
+            for result in done.result():
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        if shutdown:
+            pool.shutdown(wait=True)
+
+
+def _to_wkt(geom):
+    return geom.to_wkt()
+
+
+def _bounds(geom):
+    return geom.bounds
+
+
+def from_wkt(wkts, **kwargs):
+    """ Yield the geometries of WKT strings, see map_geometries """
+    return map_geometries(geometry.from_wkt, wkts, **kwargs)
+
+
+def as_shape(objects, **kwargs):
+    """ Yield pygeoif geometries or features of objects that provide the
+    __geo_interface__ or compatible dictionaries, see map_geometries """
+    return map_geometries(geometry.as_shape, objects, **kwargs)
+
+
+def to_wkt(geoms, **kwargs):
+    """ Yield the WKT of geometries, see map_geometries """
+    return map_geometries(_to_wkt, geoms, **kwargs)
+
+
+def bounds(geoms, **kwargs):
+    """ Yield the bounds of geometries, see map_geometries """
+    return map_geometries(_bounds, geoms, **kwargs)
+
+
+def geo_interface(geoms, **kwargs):
+    """ Yield the __geo_interface__ of geometries or features,
+    see map_geometries """
+    return map_geometries(geometry.mapping, geoms, **kwargs)
@@ -0,0 +1,637 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Read and write FlatGeobuf files.
+
+A FlatGeobuf file starts with a magic number and a header, followed by a
+packed Hilbert R-tree over the bounding boxes of the features and the
+features in the order of the leaves of the tree.  The header and the
+features are flatbuffers, they are written and read here without the
+flatbuffers library.
+
+The reader memory maps the file, searches the tree for the features in a
+bounding box and only decodes those::
+
+    >>> from pygeoif import flatgeobuf
+    >>> flatgeobuf.write_features('countries.fgb', collection)
+    >>> with flatgeobuf.FlatGeobufReader('countries.fgb') as reader:
+    ...     for feature in reader.features(bbox=(0, 40, 20, 60)):
+    ...         pass
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from . import geometry
+
+MAGIC = b'fgb\x03fgb\x00'
+
+_geometry_types = {
+    'Point': 1, 'LineString': 2, 'LinearRing': 2, 'Polygon': 3,
+    'MultiPoint': 4, 'MultiLineString': 5, 'MultiPolygon': 6,
+    'GeometryCollection': 7}
+_geometry_names = dict((v, k) for k, v in _geometry_types.items()
+                       if k != 'LinearRing')
+
+_column_types = ('Byte', 'UByte', 'Bool', 'Short', 'UShort', 'Int', 'UInt',
+                 'Long', 'ULong', 'Float', 'Double', 'String', 'Json',
+                 'DateTime', 'Binary')
+_column_formats = {0: 'b', 1: 'B', 2: '?', 3: 'h', 4: 'H', 5: 'i', 6: 'I',
+                   7: 'q', 8: 'Q', 9: 'f', 10: 'd'}
+_column_structs = dict((k, struct.Struct('<' + f))
+                       for k, f in _column_formats.items())
+
+_u16 = struct.Struct('<H')
+_i32 = struct.Struct('<i')
+_u32 = struct.Struct('<I')
+_node = struct.Struct('<4dQ')
+
+_scalars = frozenset('bB?hHiIqQfd')
+
+
+def _pad(buf, alignment):
+    buf.extend(b'\0' * (-len(buf) % alignment))
+
+
+def _le_bytes(values, typecode):
+    """ The values as little endian bytes """
+    values = array(typecode, values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _build(fields):
+    """ Serialize a root table into a flatbuffer.
+
+    Tables are dictionaries of field id to (kind, value), the kind is a
+    struct format character for scalars, 'string', 'table', 'tables' for a
+    vector of tables or 'vector:<typecode>'.  The objects a table refers to
+    are written after it, so that all offsets point forward."""
+    buf = bytearray(4)
+    _u32.pack_into(buf, 0, _add_table(buf, fields))
+    return bytes(buf)
+
+
+def _add_table(buf, fields):
+    count = max(fields) + 1 if fields else 0
+    widths = sorted(((struct.calcsize(kind) if kind in _scalars else 4, i)
+                     for i, (kind, value) in fields.items()), reverse=True)
+    offsets = {}
+    size = 4
+    for width, i in widths:
+        size += -size % width
+        offsets[i] = size
+        size += width
+    _pad(buf, 2)
+    vtable = len(buf)
+    buf.extend(struct.pack('<{0}H'.format(count + 2), 4 + 2 * count, size,
+                           *[offsets.get(i, 0) for i in range(count)]))
+    _pad(buf, 8)
+    table = len(buf)
+    buf.extend(b'\0' * size)
+    _i32.pack_into(buf, table, table - vtable)
+    for i, (kind, value) in sorted(fields.items()):
+        position = table + offsets[i]
+        if kind in _scalars:
+            struct.pack_into('<' + kind, buf, position, value)
+        else:
+            _u32.pack_into(buf, position,
+                           _add_object(buf, kind, value) - position)
+    return table
+
+
+def _add_object(buf, kind, value):
+    if kind == 'table':
+        return _add_table(buf, value)
+    _pad(buf, 4)
+    start = len(buf)
+    if kind == 'string':
+        value = value.encode('utf-8')
+        buf.extend(_u32.pack(len(value)) + value + b'\0')
+    elif kind == 'tables':
+        buf.extend(_u32.pack(len(value)) + b'\0' * (4 * len(value)))
+        for i, table in enumerate(value):
+            position = start + 4 + 4 * i
+            _u32.pack_into(buf, position, _add_table(buf, table) - position)
+    else:
+        typecode = kind[7:]
+        if typecode != 'B':
+            value = _le_bytes(value, typecode)
+        width = array(typecode).itemsize
+        if width > 4:
+            buf.extend(b'\0' * (-(start + 4) % width))
+            start = len(buf)
+        buf.extend(_u32.pack(len(value) // width))
+        buf.extend(value)
+    return start
+
+
+def _field(buf, table, i):
+    """ The position of field i of a table, 0 if it is not set """
+    vtable = table - _i32.unpack_from(buf, table)[0]
+    offset = 4 + 2 * i
+    if offset >= _u16.unpack_from(buf, vtable)[0]:
+        return 0
+    offset = _u16.unpack_from(buf, vtable + offset)[0]
+    return table + offset if offset else 0
+
+
+def _reference(buf, position):
+    return position + _u32.unpack_from(buf, position)[0]
+
+
+def _scalar(buf, table, i, fmt, default):
+    position = _field(buf, table, i)
+    if not position:
+        return default
+    return struct.unpack_from('<' + fmt, buf, position)[0]
+
+
+def _vector(buf, table, i):
+    """ The position of the first element and the length of a vector """
+    position = _field(buf, table, i)
+    if not position:
+        return 0, 0
+    position = _reference(buf, position)
+    return position + 4, _u32.unpack_from(buf, position)[0]
+
+
+def _string(buf, table, i):
+    start, length = _vector(buf, table, i)
+    if not start:
+        return None
+    return buf[start:start + length].decode('utf-8')
+
+
+def _numbers(buf, table, i, typecode):
+    start, length = _vector(buf, table, i)
+    values = array(typecode)
+    values.frombytes(buf[start:start + values.itemsize * length])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def _tables(buf, table, i):
+    start, length = _vector(buf, table, i)
+    return [_reference(buf, start + 4 * k) for k in range(length)]
+
+
+def _flat_coordinates(geom):
+    coords = geom._coords
+    if not isinstance(coords, array) or coords.typecode != 'd':
+        coords = array('d', coords)
+    return coords, geom._dims
+
+
+def _geometry_table(geom, box, dimensions):
+    """ The fields of the Geometry table of geom.  The bounds of the
+    coordinates are collected in box, their dimensions in the set
+    dimensions."""
+    gtype = _geometry_types[geom._type]
+    fields = {6: ('B', gtype)}
+    if gtype in (6, 7):
+        fields[7] = ('tables', [_geometry_table(part, box, dimensions)
+                                for part in geom._geoms])
+        return fields
+    ends = None
+    if gtype == 1:
+        coords = array('d', geom._coordinates)
+        dims = len(coords)
+        if coords[0] != coords[0]:
+            return fields
+    elif gtype in (3, 5):
+        if gtype == 3:
+            parts = [geom._exterior] + list(geom._interiors or [])
+        else:
+            parts = geom._geoms
+        coords = array('d')
+        ends = []
+        dims = 2
+        for part in parts:
+            flat, dims = _flat_coordinates(part)
+            coords.extend(flat)
+            ends.append(len(coords) // dims)
+    else:
+        coords, dims = _flat_coordinates(geom)
+    if not coords:
+        return fields
+    dimensions.add(dims)
+    if dims == 3:
+        xy, z = geometry._split_z(coords)
+        fields[2] = ('vector:d', z)
+    else:
+        xy = coords
+    fields[1] = ('vector:d', xy)
+    if ends and len(ends) > 1:
+        fields[0] = ('vector:I', ends)
+    xs, ys = xy[0::2], xy[1::2]
+    bounds = [min(xs), min(ys), max(xs), max(ys)]
+    if box:
+        bounds = [min(box[0], bounds[0]), min(box[1], bounds[1]),
+                  max(box[2], bounds[2]), max(box[3], bounds[3])]
+    box[:] = bounds
+    return fields
+
+
+def _read_geometry(buf, table, default_type):
+    gtype = _scalar(buf, table, 6, 'B', 0) or default_type
+    if gtype in (6, 7):
+        parts = [_read_geometry(buf, part, 3 if gtype == 6 else 0)
+                 for part in _tables(buf, table, 7)]
+        if gtype == 6:
+            return geometry._from_geoms(geometry.MultiPolygon, parts)
+        return geometry.GeometryCollection(parts)
+    xy = _numbers(buf, table, 1, 'd')
+    z = _numbers(buf, table, 2, 'd')
+    if z:
+        dims = 3
+        coords = geometry._interleave_z(xy, z)
+    else:
+        dims = 2
+        coords = xy
+    if gtype not in _geometry_names:
+        raise ValueError('Unsupported geometry type {0}'.format(gtype))
+    if not coords:
+        return geometry._empty_geometry(gtype, dims)
+    if gtype == 1:
+        return geometry.Point(*coords)
+    elif gtype == 2:
+        return geometry.LineString._from_flat(coords, dims)
+    elif gtype == 4:
+        return geometry.MultiPoint._from_flat(coords, dims)
+    ends = _numbers(buf, table, 0, 'I') or [len(coords) // dims]
+    parts = []
+    start = 0
+    for end in ends:
+        parts.append(coords[start * dims:end * dims])
+        start = end
+    if gtype == 3:
+        rings = [geometry.LinearRing._from_flat(part, dims)
+                 for part in parts]
+        return geometry.Polygon._from_rings(rings[0], rings[1:])
+    return geometry._from_geoms(
+        geometry.MultiLineString,
+        [geometry.LineString._from_flat(part, dims) for part in parts])
+
+
+def _column_type(types):
+    """ The column type for the set of python types of its values """
+    if not types:
+        return 11
+    elif types == set([bool]):
+        return 2
+    elif types <= set([bool, int]):
+        return 7
+    elif types <= set([bool, int, float]):
+        return 10
+    elif types == set([str]):
+        return 11
+    elif types == set([bytes]):
+        return 14
+    return 12
+
+
+def _infer_columns(features):
+    types = {}
+    for feature in features:
+        for key, value in (feature.properties or {}).items():
+            kinds = types.setdefault(key, set())
+            if value is not None:
+                kinds.add(type(value))
+    return [(key, _column_type(kinds)) for key, kinds in types.items()]
+
+
+def _write_properties(properties, columns):
+    out = bytearray()
+    for i, (name, ctype) in enumerate(columns):
+        value = properties.get(name)
+        if value is None:
+            continue
+        out.extend(_u16.pack(i))
+        if ctype in _column_structs:
+            out.extend(_column_structs[ctype].pack(value))
+            continue
+        if ctype == 12:
+            value = json.dumps(value)
+        if ctype != 14:
+            value = value.encode('utf-8')
+        out.extend(_u32.pack(len(value)))
+        out.extend(value)
+    return bytes(out)
+
+
+def _read_properties(buf, start, length, columns):
+    properties = {}
+    position = start
+    end = start + length
+    while position < end:
+        name, ctype = columns[_u16.unpack_from(buf, position)[0]]
+        position += 2
+        if ctype in _column_structs:
+            fmt = _column_structs[ctype]
+            value = fmt.unpack_from(buf, position)[0]
+            position += fmt.size
+        else:
+            size = _u32.unpack_from(buf, position)[0]
+            value = buf[position + 4:position + 4 + size]
+            position += 4 + size
+            if ctype != 14:
+                value = value.decode('utf-8')
+            if ctype == 12:
+                value = json.loads(value)
+        properties[name] = value
+    return properties
+
+
+def _level_bounds(count, node_size):
+    """ The (start, end) node numbers of each level of the packed R-tree,
+    leaves first, the root is the first node.  Like the reference
+    implementation there is always a root above the leaves, also for a
+    single feature """
+    counts = [count]
+    while len(counts) == 1 or counts[-1] > 1:
+        counts.append(-(-counts[-1] // node_size))
+    end = sum(counts)
+    levels = []
+    for n in counts:
+        levels.append((end - n, end))
+        end -= n
+    return levels
+
+
+def _index_bytes(tree, offsets):
+    """ Serialize the tree, root first.  Leaves point to the byte offsets
+    of their features, the other nodes to their first child """
+    levels = _level_bounds(len(tree.items), tree.node_size)
+    out = bytearray()
+    for level in range(len(tree.levels) - 1, -1, -1):
+        boxes = tree.levels[level]
+        for j in range(len(boxes) // 4):
+            if level:
+                offset = levels[level - 1][0] + j * tree.node_size
+            else:
+                offset = offsets[j]
+            out.extend(_node.pack(boxes[4 * j], boxes[4 * j + 1],
+                                  boxes[4 * j + 2], boxes[4 * j + 3],
+                                  offset))
+    return bytes(out)
+
+
+def write_features(path, features, name='', index_node_size=16, crs=None):
+    """
+    Write a FeatureCollection or a sequence of Features (or geometries) to
+    a FlatGeobuf file.  The features are stored in the order of a packed
+    Hilbert R-tree with index_node_size children per node, 0 writes no
+    index and keeps the order.  crs is an EPSG code.
+    The column types are inferred from the property values, properties
+    that are None are not stored.
+    """
+    if isinstance(features, geometry.FeatureCollection):
+        features = features.features
+    features = [feature if isinstance(feature, geometry.Feature)
+                else geometry.Feature(feature, {}) for feature in features]
+    columns = _infer_columns(features)
+    encoded = []
+    bounds = []
+    types = set()
+    dimensions = set()
+    for feature in features:
+        box = []
+        table = {0: ('table', _geometry_table(feature.geometry, box,
+                                              dimensions))}
+        types.add(table[0][1][6][1])
+        properties = _write_properties(feature.properties or {}, columns)
+        if properties:
+            table[1] = ('vector:B', properties)
+        encoded.append(_build(table))
+        bounds.append(tuple(box) if box else None)
+    tree = None
+    order = range(len(features))
+    if index_node_size and features:
+        if index_node_size < 2:
+            raise ValueError('index_node_size must be 0 or at least 2')
+        tree = geometry._PackedRTree(bounds, index_node_size, True)
+        order = tree.items
+    header = {2: ('B', types.pop() if len(types) == 1 else 0),
+              3: ('?', 3 in dimensions),
+              8: ('Q', len(features)),
+              9: ('H', index_node_size)}
+    if name:
+        header[0] = ('string', name)
+    boxes = [box for box in bounds if box]
+    if boxes:
+        header[1] = ('vector:d', [min(b[0] for b in boxes),
+                                  min(b[1] for b in boxes),
+                                  max(b[2] for b in boxes),
+                                  max(b[3] for b in boxes)])
+    if columns:
+        header[7] = ('tables', [{0: ('string', key), 1: ('B', ctype)}
+                                for key, ctype in columns])
+    if crs is not None:
+        header[10] = ('table', {0: ('string', 'EPSG'), 1: ('i', crs)})
+    header = _build(header)
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_u32.pack(len(header)))
+        f.write(header)
+        if tree is not None:
+            offsets = []
+            offset = 0
+            for i in order:
+                offsets.append(offset)
+                offset += 4 + len(encoded[i])
+            f.write(_index_bytes(tree, offsets))
+        for i in order:
+            f.write(_u32.pack(len(encoded[i])))
+            f.write(encoded[i])
+
+
+class FlatGeobufReader(object):
+    """
+    Read a memory mapped FlatGeobuf file.
+
+    Features are decoded when they are accessed by position, iterated or
+    found in a bounding box with the index of the file.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError('{0} is not a FlatGeobuf file'.format(path))
+        if self._mm[:3] != MAGIC[:3] or self._mm[4:7] != MAGIC[4:7]:
+            self.close()
+            raise ValueError('{0} is not a FlatGeobuf file'.format(path))
+        self._read_header()
+
+    def _read_header(self):
+        mm = self._mm
+        size = _u32.unpack_from(mm, 8)[0]
+        root = _reference(mm, 12)
+        self.name = _string(mm, root, 0)
+        envelope = _numbers(mm, root, 1, 'd')
+        self.bounds = tuple(envelope[:4]) if envelope else None
+        self._geometry_type = _scalar(mm, root, 2, 'B', 0)
+        self.geometry_type = _geometry_names.get(self._geometry_type)
+        self.has_z = _scalar(mm, root, 3, '?', False)
+        self._columns = [(_string(mm, column, 0),
+                          _scalar(mm, column, 1, 'B', 0))
+                         for column in _tables(mm, root, 7)]
+        self.columns = [(key, _column_types[ctype])
+                        for key, ctype in self._columns]
+        self._count = _scalar(mm, root, 8, 'Q', 0)
+        self.index_node_size = _scalar(mm, root, 9, 'H', 16)
+        crs = _field(mm, root, 10)
+        self.crs = None
+        if crs:
+            self.crs = _scalar(mm, _reference(mm, crs), 1, 'i', 0) or None
+        self._index = 12 + size
+        self._levels = None
+        if self.index_node_size and self._count:
+            self._levels = _level_bounds(self._count, self.index_node_size)
+        self._start = self._index + _node.size * (
+            self._levels[0][1] if self._levels else 0)
+        self._offsets = None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        if self._count:
+            return self._count
+        return len(self._feature_offsets())
+
+    def _feature_offsets(self):
+        """ The offsets of the features without an index """
+        if self._offsets is None:
+            self._offsets = []
+            position = self._start
+            while position < len(self._mm):
+                self._offsets.append(position - self._start)
+                position += 4 + _u32.unpack_from(self._mm, position)[0]
+        return self._offsets
+
+    def _offset(self, i):
+        if self._levels is None:
+            return self._feature_offsets()[i]
+        node = self._index + _node.size * (self._levels[0][0] + i)
+        return _node.unpack_from(self._mm, node)[4]
+
+    def _read_feature(self, offset):
+        mm = self._mm
+        root = _reference(mm, self._start + offset + 4)
+        position = _field(mm, root, 0)
+        geom = None
+        if position:
+            geom = _read_geometry(mm, _reference(mm, position),
+                                  self._geometry_type)
+        columns = self._columns
+        if not columns and _field(mm, root, 2):
+            columns = [(_string(mm, column, 0),
+                        _scalar(mm, column, 1, 'B', 0))
+                       for column in _tables(mm, root, 2)]
+        start, length = _vector(mm, root, 1)
+        properties = _read_properties(mm, start, length, columns)
+        return geometry.Feature(geom, properties)
+
+    def __getitem__(self, i):
+        count = len(self)
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError('feature index out of range')
+        return self._read_feature(self._offset(i))
+
+    def __iter__(self):
+        return self.features()
+
+    def search(self, minx, miny, maxx, maxy):
+        """ The positions of the features whose bounding box intersects
+        the box, in file order.  The file must have an index. """
+        if self._levels is None:
+            raise ValueError('The file has no spatial index')
+        mm = self._mm
+        levels = self._levels
+        node_size = self.index_node_size
+        leaves = levels[0][0]
+        result = []
+        stack = [(0, len(levels) - 1)]
+        while stack:
+            node, level = stack.pop()
+            for i in range(node, min(node + node_size, levels[level][1])):
+                x0, y0, x1, y1, offset = _node.unpack_from(
+                    mm, self._index + _node.size * i)
+                if x0 > maxx or y0 > maxy or x1 < minx or y1 < miny:
+                    continue
+                if level:
+                    stack.append((offset, level - 1))
+                else:
+                    result.append(i - leaves)
+        result.sort()
+        return result
+
+    def features(self, bbox=None):
+        """ Iterate over the features, with a bbox (minx, miny, maxx, maxy)
+        only over those that intersect it """
+        if bbox is not None and self._levels is not None:
+            for i in self.search(*bbox):
+                yield self._read_feature(self._offset(i))
+            return
+        position = self._start
+        while position < len(self._mm):
+            feature = self._read_feature(position - self._start)
+            position += 4 + _u32.unpack_from(self._mm, position)[0]
+            if bbox is not None:
+                bounds = _bounds(feature.geometry)
+                if (not bounds or bounds[0] > bbox[2] or
+                        bounds[1] > bbox[3] or bounds[2] < bbox[0] or
+                        bounds[3] < bbox[1]):
+                    continue
+            yield feature
+
+
+def _bounds(geom):
+    if geom is None:
+        return None
+    bounds = geom.bounds
+    if bounds and len(bounds) == 6:
+        return bounds[0], bounds[1], bounds[3], bounds[4]
+    return bounds
+
+
+def iter_features(path, bbox=None):
+    """ Iterate over the features of a FlatGeobuf file, with a bbox only
+    over those that intersect it """
+    with FlatGeobufReader(path) as reader:
+        for feature in reader.features(bbox):
+            yield feature
@@ -16,7 +16,20 @@
 #   along with this library; if not, write to the Free Software Foundation,
 #   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
+import ast
+import binascii
+import json
+import math
 import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
 
 class _GeoObject(object):
@@ -75,6 +88,9 @@ class _GeoObject(object):
         else:
             return object.__repr__(self)
 
+    def __copy__(self):
+        return self.copy()
+
 
 class _Geometry(_GeoObject):
     """Base Class for geometry objects.
@@ -99,6 +115,20 @@ class _Geometry(_GeoObject):
     def to_wkt(self):
         raise NotImplementedError
 
+    def to_twkb(self, precision=0, z_precision=0, bbox=False, size=False,
+                ids=None):
+        """
+        Return the TWKB (Tiny WKB) representation of the geometry.
+
+        Coordinates are rounded to precision decimal digits (-8 to 7), Z
+        values to z_precision digits (0 to 7), and stored as zigzag varint
+        deltas. bbox and size add the bounding box and the size headers,
+        ids is a list of integer ids of the parts of a collection.
+        """
+        out = bytearray()
+        _write_twkb(self, precision, z_precision, bbox, size, ids, out)
+        return bytes(out)
+
     @property
     def geom_type(self):
         return self._type
@@ -156,6 +186,11 @@ class Feature(_GeoObject):
             'properties': self._properties
             }
 
+    def copy(self):
+        """ Return a copy with a copy of the geometry and the properties
+        dictionary, the property values are not copied """
+        return Feature(self._geometry.copy(), dict(self._properties or {}))
+
 
 class Point(_Geometry):
     """
@@ -217,6 +252,8 @@ class Point(_Geometry):
             self._coordinates = coords
         else:
             raise ValueError
+        if _default_precision is not None:
+            self._coordinates = _default_precision.snap(self._coordinates)
 
     @property
     def x(self):
@@ -237,7 +274,7 @@ class Point(_Geometry):
 
     @property
     def coords(self):
-        return (tuple(self._coordinates),)
+        return CoordinateSequence(self._coordinates, len(self._coordinates))
 
     @coords.setter
     def coords(self, coordinates):
@@ -249,6 +286,8 @@ class Point(_Geometry):
                 raise TypeError
         else:
             raise TypeError
+        if _default_precision is not None:
+            self._coordinates = _default_precision.snap(self._coordinates)
 
     @property
     def bounds(self):
@@ -258,8 +297,541 @@ class Point(_Geometry):
         coords = str(tuple(self._coordinates)).replace(',', '')
         return self._type.upper() + ' ' + coords
 
+    def copy(self):
+        point = Point.__new__(Point)
+        point._coordinates = list(self._coordinates)
+        return point
+
+
+class CoordinateSequence(Sequence):
+    """ A read-only view of the coordinates of a geometry.
+
+    The view shares the flat storage of the geometry, so len() and
+    indexing are O(1), iteration is lazy and slices are views on the same
+    storage. Coordinates are returned as tuples and a CoordinateSequence
+    compares equal to a sequence of the same coordinates.
+    """
+    __slots__ = ('_flat', '_dims', '_offset', '_length', '_step')
+
+    def __init__(self, flat, dims, offset=0, length=None, step=1):
+        self._flat = flat
+        self._dims = dims
+        self._offset = offset
+        if length is None:
+            length = len(flat) // dims
+        self._length = length
+        self._step = step
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step > 0:
+                length = max(0, (stop - start + step - 1) // step)
+            else:
+                length = max(0, (start - stop - step - 1) // -step)
+            return CoordinateSequence(
+                self._flat, self._dims, self._offset + start * self._step,
+                length, step * self._step)
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError('CoordinateSequence index out of range')
+        i = (self._offset + key * self._step) * self._dims
+        return tuple(self._flat[i:i + self._dims])
+
+    def __iter__(self):
+        dims = self._dims
+        if self._step == 1:
+            start = self._offset * dims
+            values = islice(self._flat, start, start + self._length * dims)
+            return iter(zip(*[values] * dims))
+        return (self[i] for i in range(self._length))
+
+    def __reversed__(self):
+        return iter(self[::-1])
+
+    def __eq__(self, other):
+        if not isinstance(other, (Sequence, list, tuple)):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        for a, b in zip(self, other):
+            if a != tuple(b):
+                return False
+        return True
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return 'CoordinateSequence({0})'.format(tuple(self))
+
+    def _to_array(self):
+        """ Copy the viewed coordinates into a new array of doubles """
+        dims = self._dims
+        if self._step == 1:
+            start = self._offset * dims
+            return array('d', self._flat[start:start + self._length * dims])
+        flat = array('d')
+        for coord in self:
+            flat.extend(coord)
+        return flat
+
+
+class GeometrySequence(Sequence):
+    """ A read-only view of the geometries of a geometry or collection.
+
+    The view does not copy the list of geometries, the Points of a
+    LineString or MultiPoint are created on access from its coordinates.
+    """
+    __slots__ = ('_items', '_factory')
+
+    def __init__(self, items, factory=None):
+        self._items = items
+        self._factory = factory
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return GeometrySequence(self._items[key], self._factory)
+        if self._factory is None:
+            return self._items[key]
+        return self._factory(self._items[key])
+
+    def __iter__(self):
+        if self._factory is None:
+            return iter(self._items)
+        return (self._factory(item) for item in self._items)
+
+    def __repr__(self):
+        return 'GeometrySequence({0})'.format(tuple(self))
+
+
+def _buffer_coordinates(coordinates):
+    """ Return the coordinates of an object that supports the buffer
+    protocol (memoryview, array, numpy array, ...) as a flat sequence of
+    doubles and the number of dimensions, or None for other objects.
+
+    A 2 dimensional buffer of shape (n, 2) or (n, 3) holds one coordinate
+    per row, a flat buffer is read as x, y pairs.
+    C contiguous buffers of doubles are shared, not copied."""
+    if isinstance(coordinates, (list, tuple, str, bytes, bytearray)):
+        return None
+    try:
+        view = memoryview(coordinates)
+    except TypeError:
+        return None
+    if view.ndim == 2:
+        dims = view.shape[1]
+    elif view.ndim == 1:
+        dims = 2
+    else:
+        raise TypeError('Coordinate buffers must be 1 or 2 dimensional')
+    if not 2 <= dims <= 3:
+        raise TypeError
+    if view.format == 'd' and getattr(view, 'c_contiguous', False):
+        flat = view.cast('B').cast('d')
+    else:
+        values = view.tolist()
+        if view.ndim == 2:
+            values = [x for row in values for x in row]
+        flat = array('d', values)
+    if len(flat) % dims:
+        raise ValueError('The buffer does not hold whole coordinates')
+    return flat, dims
+
+
+def _coordinate_array(coordinates):
+    """ Flatten a sequence of (x, y [,z]) coordinates or Points into an
+    array of doubles, return the array and the number of dimensions."""
+    flat = array('d')
+    dims = None
+    for coord in coordinates:
+        if hasattr(coord, '__geo_interface__'):
+            coord = Point(coord)._coordinates
+        elif not isinstance(coord, (list, tuple)):
+            raise TypeError
+        length = len(coord)
+        if not 2 <= length <= 3:
+            raise TypeError
+        if dims is None:
+            dims = length
+        elif length != dims:
+            raise ValueError
+        flat.extend([float(x) for x in coord])
+    return flat, dims or 2
+
+
+def _stored_coordinates(coordinates):
+    """ Return a flat sequence of doubles and the number of dimensions
+    for a CoordinateSequence, a list or tuple of coordinates or an object
+    that supports the buffer protocol, None for other objects.
+    With a default precision the coordinates are snapped and stored as
+    integers."""
+    if isinstance(coordinates, CoordinateSequence):
+        stored = coordinates._to_array(), coordinates._dims
+    elif isinstance(coordinates, (list, tuple)):
+        stored = _coordinate_array(coordinates)
+    else:
+        stored = _buffer_coordinates(coordinates)
+    if stored is not None and _default_precision is not None:
+        stored = (_ScaledCoordinates.encode(stored[0], stored[1],
+                                            _default_precision), stored[1])
+    return stored
+
+
+def _copy_flat(flat):
+    """ A copy of flat coordinates that can be changed in place """
+    if isinstance(flat, _ScaledCoordinates):
+        return flat.copy()
+    return array('d', flat)
+
+
+def _reverse_coordinates(flat, dims):
+    """ Return a new array with the coordinates in reverse order """
+    if isinstance(flat, _ScaledCoordinates):
+        return _ScaledCoordinates(_reverse_coordinates(flat._values, dims),
+                                  dims, flat._model)
+    typecode = getattr(flat, 'typecode', 'd')
+    reverse = array(typecode, flat)
+    start = len(flat) - dims
+    for i in range(dims):
+        reverse[i::dims] = array(typecode, flat[start + i::-dims])
+    return reverse
+
+
+def _flat_bounds(flat, dims):
+    if flat:
+        xs = flat[0::dims]
+        ys = flat[1::dims]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _flat_signed_area(flat, dims):
+    """ The signed area of a ring stored in a flat array, see signed_area
+    """
+    xs = flat[0::dims]
+    ys = flat[1::dims]
+    return sum(x0 * y1 - x1 * y0 for x0, y0, x1, y1 in
+               zip(xs, ys, islice(xs, 1, None), islice(ys, 1, None))) / 2.0
+
+
+def _interleave_z(xy, z):
+    """ Combine flat x, y and separate z coordinates into x, y, z """
+    flat = array('d', [0.0]) * (len(z) * 3)
+    flat[0::3] = xy[0::2]
+    flat[1::3] = xy[1::2]
+    flat[2::3] = z
+    return flat
+
+
+def _split_z(flat):
+    """ Split flat x, y, z coordinates into x, y and z """
+    xy = array('d', [0.0]) * (len(flat) // 3 * 2)
+    xy[0::2] = flat[0::3]
+    xy[1::2] = flat[1::3]
+    return xy, flat[2::3]
+
+
+def _reverse_ring(ring):
+    """ Reverse the coordinates of a ring in place.  Storage that is shared
+    with a buffer passed by the caller or with a copy is replaced, not
+    written to """
+    flat, dims = ring._coords, ring._dims
+    if isinstance(flat, array) and not ring._shared:
+        for i in range(dims):
+            column = flat[i::dims]
+            column.reverse()
+            flat[i::dims] = column
+    else:
+        ring._coords = _reverse_coordinates(flat, dims)
+
+
+def _coordinate_view(flat, dims):
+    """ A read-only memoryview of shape (n, dims) on the flat storage,
+    memoryviews cannot have a 0 in their shape, an empty view is flat.
+    Fixed precision coordinates are decoded into a new array."""
+    if isinstance(flat, _ScaledCoordinates):
+        flat = array('d', flat)
+    view = memoryview(flat).cast('B').cast('d')
+    if flat:
+        view = view.cast('B').cast('d', (len(flat) // dims, dims))
+    if hasattr(view, 'toreadonly'):
+        view = view.toreadonly()
+    return view
+
+
+_float64 = '<f8' if sys.byteorder == 'little' else '>f8'
+
+
+class PrecisionModel(object):
+    """
+    A fixed precision grid for coordinates.
+
+    Coordinates are stored as integer multiples of scale from offset,
+    one offset per dimension, in an array of int32 ('i') or int64 ('q').
+    With the default scale of 1e-7 and int32 longitudes and latitudes
+    take half the memory of doubles and equal coordinates on the grid
+    compare exactly equal.
+    """
+
+    def __init__(self, scale=1e-7, offset=(0.0, 0.0, 0.0), typecode='i'):
+        if typecode not in ('i', 'q'):
+            raise ValueError('typecode must be i (int32) or q (int64)')
+        if not scale > 0:
+            raise ValueError('scale must be positive')
+        self.scale = float(scale)
+        self.offset = tuple(float(o) for o in offset) + (0.0,) * (
+            3 - len(offset))
+        self.typecode = typecode
+        factor = 1.0 / self.scale
+        if abs(factor - round(factor)) < 1e-9 * factor:
+            # divide by a whole factor, 0.1 is 1 / 10, not 1 * 0.1
+            factor = float(round(factor))
+        self._factor = factor
+
+    def __repr__(self):
+        return 'PrecisionModel({0!r}, {1!r}, {2!r})'.format(
+            self.scale, self.offset, self.typecode)
+
+    def __eq__(self, other):
+        if not isinstance(other, PrecisionModel):
+            return NotImplemented
+        return ((self.scale, self.offset, self.typecode) ==
+                (other.scale, other.offset, other.typecode))
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __hash__(self):
+        return hash((self.scale, self.offset, self.typecode))
+
+    def encode(self, value, dim=0):
+        """ The grid integer of a coordinate value in dimension dim """
+        return int(round((value - self.offset[dim]) * self._factor))
+
+    def decode(self, value, dim=0):
+        """ The coordinate value of a grid integer in dimension dim """
+        return value / self._factor + self.offset[dim]
+
+    def snap(self, coordinates):
+        """ Snap a coordinate, (x, y [,z]), to the grid """
+        return [self.decode(self.encode(value, dim), dim)
+                for dim, value in enumerate(coordinates)]
+
+
+class _ScaledCoordinates(object):
+    """ Flat coordinates stored as integers on the grid of a
+    PrecisionModel.  Items are decoded to floats and slices to arrays of
+    doubles, so it can be read like a flat array of doubles."""
+
+    __slots__ = ('_values', '_dims', '_model')
+
+    def __init__(self, values, dims, model):
+        self._values = values
+        self._dims = dims
+        self._model = model
+
+    @classmethod
+    def encode(cls, flat, dims, model):
+        """ Snap flat coordinates to the grid of model """
+        if isinstance(flat, _ScaledCoordinates) and flat._model == model:
+            return flat
+        scaled = cls(array(model.typecode), dims, model)
+        scaled.extend(flat)
+        return scaled
+
+    def __len__(self):
+        return len(self._values)
+
+    def _decoded(self, start, step, values):
+        dims = self._dims
+        decode = self._model.decode
+        if step % dims == 0:
+            dim = start % dims
+            return [decode(value, dim) for value in values]
+        return [decode(value, (start + i * step) % dims)
+                for i, value in enumerate(values)]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self._values))
+            return array('d', self._decoded(start, step, self._values[key]))
+        if key < 0:
+            key += len(self._values)
+        return self._model.decode(self._values[key], key % self._dims)
+
+    def __iter__(self):
+        return iter(self._decoded(0, 1, self._values))
+
+    def __delitem__(self, key):
+        del self._values[key]
+
+    def tolist(self):
+        return self._decoded(0, 1, self._values)
 
-class LineString(_Geometry):
+    def extend(self, values):
+        dims = self._dims
+        encode = self._model.encode
+        start = len(self._values)
+        self._values.extend([encode(value, (start + i) % dims)
+                             for i, value in enumerate(values)])
+
+    def copy(self):
+        return _ScaledCoordinates(array(self._values.typecode,
+                                        self._values),
+                                  self._dims, self._model)
+
+
+_default_precision = None
+
+
+def set_default_precision(model):
+    """
+    Snap the coordinates of all geometries created from now on to the grid
+    of a PrecisionModel and store them as integers, None stores doubles.
+    Return the previous default.
+    """
+    global _default_precision
+    previous, _default_precision = _default_precision, model
+    return previous
+
+
+def _set_storage_precision(geom, model):
+    if model is None:
+        if isinstance(geom._coords, _ScaledCoordinates):
+            geom._coords = array('d', geom._coords)
+    else:
+        geom._coords = _ScaledCoordinates.encode(geom._coords, geom._dims,
+                                                 model)
+    geom._shared = False
+
+
+def set_precision(geometry, model):
+    """
+    Snap the coordinates of a geometry, feature or feature collection to
+    the grid of a PrecisionModel in place and store them as integers,
+    with None as doubles again. Return the geometry.
+    """
+    if isinstance(geometry, _CoordinateStorage):
+        _set_storage_precision(geometry, model)
+    elif isinstance(geometry, Point):
+        if model is not None:
+            geometry._coordinates = model.snap(geometry._coordinates)
+    elif isinstance(geometry, Polygon):
+        for ring in [geometry._exterior] + list(geometry._interiors or []):
+            _set_storage_precision(ring, model)
+    elif isinstance(geometry, Feature):
+        set_precision(geometry._geometry, model)
+    elif isinstance(geometry, FeatureCollection):
+        for geom in geometry._geometries():
+            set_precision(geom, model)
+        if geometry._index_cache:
+            geometry._index_cache.pop(None, None)
+    else:
+        for geom in geometry._geoms:
+            set_precision(geom, model)
+    if isinstance(geometry, _MutableCollection):
+        geometry._bbox = None
+    return geometry
+
+
+class _CoordinateStorage(_Geometry):
+    """ Mixin for geometries that store their coordinates in a flat
+    array of doubles: LineString, LinearRing and MultiPoint"""
+
+    _coords = None
+    _dims = 2
+    # the coordinates are shared with a copy, see copy()
+    _shared = False
+
+    @property
+    def coords_buffer(self):
+        """ A read-only memoryview of shape (n, dims) of the stored
+        coordinates. No data is copied."""
+        return _coordinate_view(self._coords, self._dims)
+
+    @property
+    def __array_interface__(self):
+        return {
+            'version': 3,
+            'shape': (len(self._coords) // self._dims, self._dims),
+            'typestr': _float64,
+            'data': self.coords_buffer,
+        }
+
+    @property
+    def precision(self):
+        """ The PrecisionModel of the coordinates or None for doubles """
+        return getattr(self._coords, '_model', None)
+
+    def __getstate__(self):
+        # memoryviews on shared buffers cannot be pickled
+        state = self.__dict__.copy()
+        state.pop('_shared', None)
+        if isinstance(self._coords, memoryview):
+            state['_coords'] = array('d', self._coords)
+        return state
+
+    def _own_coordinates(self):
+        """ Copy coordinates shared with a buffer or another geometry
+        before changing them in place """
+        if self._shared or isinstance(self._coords, memoryview):
+            self._coords = _copy_flat(self._coords)
+            self._shared = False
+
+    def _resize_coordinates(self, change):
+        """ Call change with the coordinates to add or delete some of them
+        in place.  An array that still exports a buffer, e.g. to a view
+        from coords_buffer, cannot be resized, the view keeps it and the
+        geometry continues with a copy """
+        self._own_coordinates()
+        try:
+            change(self._coords)
+        except BufferError:
+            self._coords = _copy_flat(self._coords)
+            change(self._coords)
+
+    def _share(self, other):
+        """ Use the coordinates of other until either changes them """
+        self._coords, self._dims = other._coords, other._dims
+        self._shared = other._shared = True
+
+    def copy(self):
+        """ Return a copy that shares the coordinates with this geometry
+        until one of them is changed in place """
+        geom = self.__class__.__new__(self.__class__)
+        geom.__dict__.update(self.__dict__)
+        geom._share(self)
+        return geom
+
+    @classmethod
+    def _from_flat(cls, flat, dims):
+        """ Create an instance from a flat array of doubles without
+        validating or copying the coordinates"""
+        geom = cls.__new__(cls)
+        if _default_precision is not None:
+            flat = _ScaledCoordinates.encode(flat, dims, _default_precision)
+        geom._coords = flat
+        geom._dims = dims
+        return geom
+
+
+class LineString(_CoordinateStorage):
     """
     A one-dimensional figure comprising one or more line segments
 
@@ -272,11 +844,10 @@ class LineString(_Geometry):
         A sequence of Points
     """
     _type = 'LineString'
-    _geoms = None
 
     @property
     def __geo_interface__(self):
-        if self._type and self._geoms:
+        if self._type and self._coords:
             return {
                 'type': self._type,
                 'coordinates': tuple(self.coords)
@@ -290,7 +861,10 @@ class LineString(_Geometry):
             A sequence of (x, y [,z]) numeric coordinate pairs or triples
             or a sequence of Points or
             an object that provides the __geo_interface__, including another
-            instance of LineString.
+            instance of LineString or
+            an object that supports the buffer protocol (array, memoryview,
+            numpy array) of shape (n, 2) or (n, 3), a flat buffer holds
+            x, y pairs. Buffers of doubles are not copied.
 
         Example
         -------
@@ -298,8 +872,10 @@ class LineString(_Geometry):
 
           >>> a = LineString([[0, 0], [1, 0], [1, 1]])
         """
-        self._geoms = []
-        if hasattr(coordinates, '__geo_interface__'):
+        self._coords = array('d')
+        if isinstance(coordinates, LineString):
+            self._share(coordinates)
+        elif hasattr(coordinates, '__geo_interface__'):
             gi = coordinates.__geo_interface__
             if (gi['type'] == 'LineString') or (gi['type'] == 'LinearRing'):
                 self.coords = gi['coordinates']
@@ -307,64 +883,49 @@ class LineString(_Geometry):
                 raise TypeError('Use poligon.exterior or polygon.interiors[x]')
             else:
                 raise TypeError
-        elif isinstance(coordinates, (list, tuple)):
-            geoms = []
-            for coord in coordinates:
-                p = Point(coord)
-                l = len(p.coords[0])
-                if geoms:
-                    if l != l2:
-                        raise ValueError
-                l2 = l
-                geoms.append(p)
-            self._geoms = geoms
         else:
-            raise TypeError
+            stored = _stored_coordinates(coordinates)
+            if stored is None:
+                raise TypeError
+            self._coords, self._dims = stored
 
     @property
     def geoms(self):
-        return tuple(self._geoms)
+        return GeometrySequence(self.coords, Point)
 
     @property
     def coords(self):
-        coordinates = []
-        for point in self.geoms:
-            coordinates.append(tuple(point.coords[0]))
-        return tuple(coordinates)
+        return CoordinateSequence(self._coords, self._dims)
 
     @coords.setter
     def coords(self, coordinates):
-        if isinstance(coordinates, (list, tuple)):
-            geoms = []
-            for coord in coordinates:
-                p = Point(coord)
-                l = len(p.coords[0])
-                if geoms:
-                    if l != l2:
-                        raise ValueError
-                l2 = l
-                geoms.append(p)
-            self._geoms = geoms
-        else:
+        stored = _stored_coordinates(coordinates)
+        if stored is None:
             raise ValueError
+        self._coords, self._dims = stored
 
     def to_wkt(self):
         wc = [' '.join([str(x) for x in c]) for c in self.coords]
         return self._type.upper() + ' (' + ', '.join(wc) + ')'
 
+    def to_polyline(self, precision=5):
+        """
+        Return the line as a Google encoded polyline, the coordinates are
+        rounded to precision decimal digits and Z values are dropped.
+        """
+        return _encode_polyline(self._coords, self._dims, precision)
+
+    @classmethod
+    def from_polyline(cls, polyline, precision=5):
+        """
+        Create a line from a Google encoded polyline, decoding directly
+        into the coordinate storage.
+        """
+        return cls._from_flat(_decode_polyline(polyline, precision), 2)
+
     @property
     def bounds(self):
-        if self.coords:
-            minx = self.coords[0][0]
-            miny = self.coords[0][1]
-            maxx = self.coords[0][0]
-            maxy = self.coords[0][1]
-            for coord in self.coords:
-                minx = min(coord[0], minx)
-                miny = min(coord[1], miny)
-                maxx = max(coord[0], maxx)
-                maxy = max(coord[1], maxy)
-            return (minx, miny, maxx, maxy)
+        return _flat_bounds(self._coords, self._dims)
 
 
 class LinearRing(LineString):
@@ -380,33 +941,38 @@ class LinearRing(LineString):
 
     def __init__(self, coordinates=None):
         super(LinearRing, self).__init__(coordinates)
-        if self._geoms[0].coords != self._geoms[-1].coords:
-            self._geoms.append(self._geoms[0])
+        self._close()
+
+    @classmethod
+    def _from_flat(cls, flat, dims):
+        ring = super(LinearRing, cls)._from_flat(flat, dims)
+        ring._close()
+        return ring
+
+    def _close(self):
+        dims = self._dims
+        if self._coords[:dims].tolist() != self._coords[-dims:].tolist():
+            coords = _copy_flat(self._coords)
+            coords.extend(coords[:dims])
+            self._coords = coords
 
     @property
     def coords(self):
-        if self._geoms[0].coords == self._geoms[-1].coords:
-            coordinates = []
-            for point in self.geoms:
-                coordinates.append(tuple(point.coords[0]))
-            return tuple(coordinates)
-        else:
-            raise ValueError
+        return CoordinateSequence(self._coords, self._dims)
 
     @coords.setter
     def coords(self, coordinates):
         LineString.coords.fset(self, coordinates)
-        if self._geoms[0].coords != self._geoms[-1].coords:
-            self._geoms.append(self._geoms[0])
+        self._close()
 
     def _set_orientation(self, clockwise=False):
         """ sets the orientation of the coordinates in
         clockwise or counterclockwise (default) order"""
-        area = signed_area(self.coords)
+        area = _flat_signed_area(self._coords, self._dims)
         if (area >= 0) and clockwise:
-            self._geoms = self._geoms[::-1]
+            self._coords = _reverse_coordinates(self._coords, self._dims)
         elif (area < 0) and not clockwise:
-            self._geoms = self._geoms[::-1]
+            self._coords = _reverse_coordinates(self._coords, self._dims)
 
 
 class Polygon(_Geometry):
@@ -431,9 +997,9 @@ class Polygon(_Geometry):
     @property
     def __geo_interface__(self):
         if self._interiors:
-            coords = [self.exterior.coords]
+            coords = [tuple(self.exterior.coords)]
             for hole in self.interiors:
-                coords.append(hole.coords)
+                coords.append(tuple(hole.coords))
             return {
                 'type': self._type,
                 'coordinates': tuple(coords)
@@ -441,7 +1007,7 @@ class Polygon(_Geometry):
         elif self._exterior:
             return {
                 'type': self._type,
-                'coordinates': (self._exterior.coords,)
+                'coordinates': (tuple(self._exterior.coords),)
             }
 
     def __init__(self, shell, holes=None):
@@ -449,7 +1015,8 @@ class Polygon(_Geometry):
         Parameters
         ----------
         shell : sequence
-            A sequence of (x, y [,z]) numeric coordinate pairs or triples
+            A sequence of (x, y [,z]) numeric coordinate pairs or triples,
+            an object that supports the buffer protocol (see LineString)
             or a LinearRing.
             If a Polygon is passed as shell the holes parameter will be
             ignored
@@ -464,6 +1031,10 @@ class Polygon(_Geometry):
           >>> coords = ((0., 0.), (0., 1.), (1., 1.), (1., 0.), (0., 0.))
           >>> polygon = Polygon(coords)
         """
+        if isinstance(shell, Polygon) and not holes:
+            self._exterior = shell._exterior.copy()
+            self._interiors = [ring.copy() for ring in shell._interiors]
+            return
         if holes:
             self._interiors = []
             for hole in holes:
@@ -473,7 +1044,7 @@ class Polygon(_Geometry):
                         self._interiors.append(LinearRing(hole))
                     else:
                         raise TypeError
-                elif isinstance(hole, (list, tuple)):
+                else:
                     self._interiors.append(LinearRing(hole))
         else:
             self._interiors = []
@@ -492,7 +1063,7 @@ class Polygon(_Geometry):
             else:
                 raise TypeError
         elif isinstance(shell, (list, tuple)):
-            assert isinstance(shell[0], (list, tuple))
+            assert isinstance(shell[0], (list, tuple, CoordinateSequence))
             if isinstance(shell[0][0], (list, tuple)):
                 # we passed shell and holes in the first parameter
                 self._exterior = LinearRing(shell[0])
@@ -502,7 +1073,23 @@ class Polygon(_Geometry):
             else:
                 self._exterior = LinearRing(shell)
         else:
-            raise TypeError
+            # LinearRing raises a TypeError if this is not a buffer
+            self._exterior = LinearRing(shell)
+
+    @classmethod
+    def _from_rings(cls, exterior, interiors=()):
+        """ Create a polygon from LinearRings without copying them """
+        polygon = cls.__new__(cls)
+        polygon._exterior = exterior
+        polygon._interiors = list(interiors)
+        return polygon
+
+    def copy(self):
+        """ Return a copy that shares the coordinates of the rings with
+        this polygon until one of them is changed in place """
+        return Polygon._from_rings(
+            self._exterior.copy(),
+            [ring.copy() for ring in self._interiors or ()])
 
     @property
     def exterior(self):
@@ -541,7 +1128,92 @@ class Polygon(_Geometry):
                 interior._set_orientation(clockwise)
 
 
-class MultiPoint(_Geometry):
+class _MutableCollection(object):
+    """Mixin for collections that can grow and shrink.
+
+    The bounds are computed on first access and then kept up to date
+    while parts are appended, after a part is removed they are computed
+    again on the next access. Parts changed in place afterwards are not
+    reflected in the cached bounds.
+    """
+    _bbox = None
+
+    def _parts(self):
+        raise NotImplementedError
+
+    def _part(self, part):
+        raise NotImplementedError
+
+    def _compute_bounds(self):
+        raise NotImplementedError
+
+    @property
+    def bounds(self):
+        if self._bbox is None:
+            self._bbox = self._compute_bounds() or ()
+        return self._bbox or None
+
+    def _grow_bounds(self, bounds):
+        if self._bbox is None or not bounds:
+            # the bounds were not computed yet or did not change
+            return
+        if self._bbox:
+            self._bbox = (min(self._bbox[0], bounds[0]),
+                          min(self._bbox[1], bounds[1]),
+                          max(self._bbox[2], bounds[2]),
+                          max(self._bbox[3], bounds[3]))
+        else:
+            self._bbox = tuple(bounds[:4])
+
+    def append(self, part):
+        """ Append a part, in the same forms that the constructor takes """
+        part = self._part(part)
+        self._parts().append(part)
+        self._grow_bounds(_part_bounds(part))
+
+    def extend(self, parts):
+        """ Append all parts of an iterable """
+        for part in parts:
+            self.append(part)
+
+    def copy(self):
+        """ Return a copy of the collection with copies of the parts,
+        which share their coordinates until they are changed in place """
+        collection = _from_geoms(self.__class__,
+                                 [part.copy() for part in self._parts()])
+        collection._bbox = self._bbox
+        return collection
+
+    def remove(self, part):
+        """ Remove the first part that is part or equal to it, raise a
+        ValueError if there is no such part """
+        parts = self._parts()
+        for i, existing in enumerate(parts):
+            if existing is part:
+                break
+        else:
+            gi = self._part(part).__geo_interface__
+            for i, existing in enumerate(parts):
+                if existing.__geo_interface__ == gi:
+                    break
+            else:
+                raise ValueError('{0!r} is not in the collection'.format(
+                    part))
+        del parts[i]
+        self._bbox = None
+
+
+def _part_bounds(part):
+    """ The bounds of a part, None for a Feature without a geometry or an
+    empty geometry """
+    if isinstance(part, Feature):
+        part = part.geometry
+    if part is None:
+        return None
+    return part.bounds
+
+
+class MultiPoint(_MutableCollection, _CoordinateStorage):
     """A collection of one or more points
 
     Attributes
@@ -550,14 +1222,13 @@ class MultiPoint(_Geometry):
         A sequence of Points
     """
 
-    _geoms = None
     _type = 'MultiPoint'
 
     @property
     def __geo_interface__(self):
         return {
             'type': self._type,
-            'coordinates': tuple([g.coords[0] for g in self._geoms])
+            'coordinates': tuple(self.coords)
         }
 
     def __init__(self, points):
@@ -567,7 +1238,10 @@ class MultiPoint(_Geometry):
         points : sequence
             A sequence of (x, y [,z]) numeric coordinate pairs or triples or a
             sequence of objects that implement the __geo_interface__,
-            including instaces of Point.
+            including instaces of Point or
+            an object that supports the buffer protocol (array, memoryview,
+            numpy array) of shape (n, 2) or (n, 3), a flat buffer holds
+            x, y pairs. Buffers of doubles are not copied.
 
         Example
         -------
@@ -579,78 +1253,113 @@ class MultiPoint(_Geometry):
           >>> type(ob.geoms[0]) == Point
           True
         """
-        self._geoms = []
+        coords = []
         if isinstance(points, (list, tuple)):
             for point in points:
                 if hasattr(point, '__geo_interface__'):
-                    self._from_geo_interface(point)
+                    coords.extend(self._from_geo_interface(point))
                 elif isinstance(point, (list, tuple)):
-                    p = Point(point)
-                    self._geoms.append(p)
+                    coords.append(point)
                 else:
                     raise TypeError
         elif hasattr(points, '__geo_interface__'):
-            self._from_geo_interface(points)
+            coords.extend(self._from_geo_interface(points))
         else:
-            raise TypeError
+            stored = _stored_coordinates(points)
+            if stored is None:
+                raise TypeError
+            self._coords, self._dims = stored
+            return
+        self._coords, self._dims = _stored_coordinates(coords)
 
     def _from_geo_interface(self, point):
         gi = point.__geo_interface__
         if gi['type'] == 'Point':
-            p = Point(point)
-            self._geoms.append(p)
+            return [Point(point)._coordinates]
         elif gi['type'] == 'LinearRing' or gi['type'] == 'LineString':
-            l = LineString(point)
-            for coord in l.coords:
-                p = Point(coord)
-                self._geoms.append(p)
+            return LineString(point).coords
         elif gi['type'] == 'Polygon':
             p = Polygon(point)
-            for coord in p.exterior.coords:
-                p1 = Point(coord)
-                self._geoms.append(p1)
+            coords = list(p.exterior.coords)
             for interior in p.interiors:
-                for coord in interior.coords:
-                    p1 = Point(coord)
-                    self._geoms.append(p1)
+                coords.extend(interior.coords)
+            return coords
         else:
             raise TypeError
 
     @property
     def geoms(self):
-        return tuple(self._geoms)
+        return GeometrySequence(self.coords, Point)
 
     @property
-    def bounds(self):
-        if self._geoms:
-            minx = self.geoms[0].coords[0][0]
-            miny = self.geoms[0].coords[0][1]
-            maxx = self.geoms[0].coords[0][0]
-            maxy = self.geoms[0].coords[0][1]
-            for geom in self.geoms:
-                minx = min(geom.coords[0][0], minx)
-                miny = min(geom.coords[0][1], miny)
-                maxx = max(geom.coords[0][0], maxx)
-                maxy = max(geom.coords[0][1], maxy)
-            return (minx, miny, maxx, maxy)
+    def coords(self):
+        return CoordinateSequence(self._coords, self._dims)
+
+    def _compute_bounds(self):
+        return _flat_bounds(self._coords, self._dims)
+
+    def _point_coordinates(self, point):
+        """ The coordinates of a point as a list of floats, checked against
+        the dimensions of the collection """
+        coords = [float(c) for c in Point(point)._coordinates]
+        if len(self._coords) and len(coords) != self._dims:
+            raise ValueError('Point has {0} dimensions, expected {1}'.format(
+                len(coords), self._dims))
+        if self.precision is not None:
+            coords = self.precision.snap(coords)
+        return coords
+
+    def append(self, point):
+        """ Append a Point or (x, y [,z]) coordinates """
+        coords = self._point_coordinates(point)
+        if not self._coords:
+            self._dims = len(coords)
+        self._resize_coordinates(lambda flat: flat.extend(coords))
+        x, y = self._coords[-self._dims], self._coords[1 - self._dims]
+        self._grow_bounds((x, y, x, y))
+
+    copy = _CoordinateStorage.copy
+
+    def remove(self, point):
+        """ Remove the first point with the coordinates of point, raise a
+        ValueError if there is no such point """
+        coords = tuple(self._point_coordinates(point))
+        for i, existing in enumerate(self.coords):
+            if existing == coords:
+                break
+        else:
+            raise ValueError('{0!r} is not in the collection'.format(point))
+        start, end = i * self._dims, (i + 1) * self._dims
+
+        def delete(flat):
+            del flat[start:end]
+        self._resize_coordinates(delete)
+        self._bbox = None
 
     def unique(self):
         """ Make Points unique, delete duplicates """
-        coords = [geom.coords for geom in self.geoms]
-        self._geoms = [Point(coord[0]) for coord in set(coords)]
+        seen = set()
+        coords = []
+        for coord in self.coords:
+            if coord not in seen:
+                seen.add(coord)
+                coords.append(coord)
+        precision = self.precision
+        self._coords, self._dims = _coordinate_array(coords)
+        if precision is not None:
+            self._coords = _ScaledCoordinates.encode(self._coords,
+                                                     self._dims, precision)
+        self._shared = False
 
     def to_wkt(self):
-        wc = [' '.join([str(x) for x in c.coords[0]]) for c in self.geoms]
+        wc = [' '.join([str(x) for x in c]) for c in self.coords]
         return self._type.upper() + '(' + ', '.join(wc) + ')'
 
     def __len__(self):
-        if self._geoms:
-            return len(self._geoms)
-        else:
-            return 0
+        return len(self._coords) // self._dims
 
 
-class MultiLineString(_Geometry):
+class MultiLineString(_MutableCollection, _Geometry):
     """
     A collection of one or more line strings
 
@@ -691,8 +1400,7 @@ class MultiLineString(_Geometry):
         self._geoms = []
         if isinstance(lines, (list, tuple)):
             for line in lines:
-                l = LineString(line)
-                self._geoms.append(l)
+                self._geoms.append(self._part(line))
         elif hasattr(lines, '__geo_interface__'):
             gi = lines.__geo_interface__
             if gi['type'] == 'LinearRing' or gi['type'] == 'LineString':
@@ -709,10 +1417,15 @@ class MultiLineString(_Geometry):
 
     @property
     def geoms(self):
-        return tuple(self._geoms)
+        return GeometrySequence(self._geoms)
 
-    @property
-    def bounds(self):
+    def _parts(self):
+        return self._geoms
+
+    def _part(self, line):
+        return LineString(line)
+
+    def _compute_bounds(self):
         if self._geoms:
             minx = self.geoms[0].bounds[0]
             miny = self.geoms[0].bounds[1]
@@ -735,6 +1448,18 @@ class MultiLineString(_Geometry):
             ) + ')'
         return self._type.upper() + '(' + wc + ')'
 
+    def to_polylines(self, precision=5):
+        """ Return the lines as a list of Google encoded polylines """
+        return [_encode_polyline(line._coords, line._dims, precision)
+                for line in self._geoms]
+
+    @classmethod
+    def from_polylines(cls, polylines, precision=5):
+        """ Create a MultiLineString from Google encoded polylines """
+        return _from_geoms(cls, [
+            LineString._from_flat(_decode_polyline(polyline, precision), 2)
+            for polyline in polylines])
+
     def __len__(self):
         if self._geoms:
             return len(self._geoms)
@@ -742,7 +1467,7 @@ class MultiLineString(_Geometry):
             return 0
 
 
-class MultiPolygon(_Geometry):
+class MultiPolygon(_MutableCollection, _Geometry):
     """A collection of one or more polygons
 
     If component polygons overlap the collection is `invalid` and some
@@ -797,15 +1522,7 @@ class MultiPolygon(_Geometry):
         self._geoms = []
         if isinstance(polygons, (list, tuple)):
             for polygon in polygons:
-                if isinstance(polygon, (list, tuple)):
-                    p = Polygon(polygon[0], polygon[1])
-                    self._geoms.append(p)
-                elif hasattr(polygon, '__geo_interface__'):
-                    gi = polygon.__geo_interface__
-                    p = Polygon(polygon)
-                    self._geoms.append(p)
-                else:
-                    raise ValueError
+                self._geoms.append(self._part(polygon))
         elif hasattr(polygons, '__geo_interface__'):
             gi = polygons.__geo_interface__
             if gi['type'] == 'Polygon':
@@ -821,10 +1538,19 @@ class MultiPolygon(_Geometry):
 
     @property
     def geoms(self):
-        return tuple(self._geoms)
+        return GeometrySequence(self._geoms)
 
-    @property
-    def bounds(self):
+    def _parts(self):
+        return self._geoms
+
+    def _part(self, polygon):
+        if isinstance(polygon, (list, tuple)):
+            return Polygon(polygon[0], polygon[1])
+        elif hasattr(polygon, '__geo_interface__'):
+            return Polygon(polygon)
+        raise ValueError
+
+    def _compute_bounds(self):
         if self._geoms:
             minx = self.geoms[0].bounds[0]
             miny = self.geoms[0].bounds[1]
@@ -865,7 +1591,7 @@ class MultiPolygon(_Geometry):
             return 0
 
 
-class GeometryCollection(_Geometry):
+class GeometryCollection(_MutableCollection, _Geometry):
     """A heterogenous collection of geometries (Points, LineStrings,
        LinearRings, and Polygons)
 
@@ -910,25 +1636,26 @@ class GeometryCollection(_Geometry):
         self._geoms = []
         if isinstance(geometries, (list, tuple)):
             for geometry in geometries:
-                if isinstance(geometry, self._allowed_geomtries):
-                    self._geoms.append(geometry)
-                elif isinstance(as_shape(geometry), self._allowed_geomtries):
-                    self._geoms.append(as_shape(geometry))
-                else:
-                    raise ValueError
+                self._geoms.append(self._part(geometry))
         else:
             raise TypeError
 
     @property
     def geoms(self):
-        for geom in self._geoms:
-            if isinstance(geom, self._allowed_geomtries):
-                yield geom
-            else:
-                raise ValueError("Illegal geometry type.")
+        return GeometrySequence(self._geoms)
 
-    @property
-    def bounds(self):
+    def _parts(self):
+        return self._geoms
+
+    def _part(self, geometry):
+        if isinstance(geometry, self._allowed_geomtries):
+            return geometry
+        geometry = as_shape(geometry)
+        if isinstance(geometry, self._allowed_geomtries):
+            return geometry
+        raise ValueError
+
+    def _compute_bounds(self):
         if self._geoms:
             minx = self._geoms[0].bounds[0]
             miny = self._geoms[0].bounds[1]
@@ -954,7 +1681,156 @@ class GeometryCollection(_Geometry):
             return 0
 
 
-class FeatureCollection(_GeoObject):
+# the functions a filter expression can call
+_filter_functions = {'abs': abs, 'bool': bool, 'float': float, 'int': int,
+                     'len': len, 'max': max, 'min': min, 'round': round,
+                     'str': str}
+if sys.version_info >= (3, 8):
+    _filter_constants = (ast.Constant,)
+else:
+    _filter_constants = (ast.Num, ast.Str, ast.Bytes, ast.NameConstant)
+_filter_nodes = _filter_constants + (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not,
+    ast.USub, ast.UAdd, ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.FloorDiv, ast.Mod, ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE,
+    ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot, ast.IfExp,
+    ast.Call, ast.Name, ast.Load, ast.Tuple, ast.List, ast.Set)
+
+
+def _filter_names(predicate):
+    """ Check a filter expression and return the property keys it refers
+    to.  Only comparisons, boolean operators, arithmetic, literals and
+    calls of _filter_functions are allowed, so no attribute, module or
+    other builtin can be reached """
+    names = []
+    for node in ast.walk(ast.parse(predicate.strip(), '<filter>', 'eval')):
+        if not isinstance(node, _filter_nodes):
+            raise ValueError('{0} is not allowed in a filter: {1!r}'.format(
+                type(node).__name__, predicate))
+        if isinstance(node, ast.Call):
+            if (not isinstance(node.func, ast.Name) or node.keywords or
+                    node.func.id not in _filter_functions):
+                raise ValueError('Only {0} can be called in a filter: '
+                                 '{1!r}'.format(
+                                     ', '.join(sorted(_filter_functions)),
+                                     predicate))
+        elif (isinstance(node, ast.Name) and
+                node.id not in _filter_functions and node.id not in names):
+            names.append(node.id)
+    return names
+
+
+class FeatureColumns(Sequence):
+    """
+    The features of a columnar FeatureCollection.
+
+    The geometries are kept in a list and the properties in one list per
+    key, the columns, which share the keys (the schema).  Features are
+    created on demand when they are accessed, changes to their properties
+    are not stored back.  Properties a feature does not have are None.
+    """
+
+    def __init__(self, geometries=None, columns=None):
+        self._geometries = geometries if geometries is not None else []
+        self._columns = columns if columns is not None else {}
+
+    @classmethod
+    def from_features(cls, features):
+        """ Create the columns from a sequence of Features """
+        columns = cls()
+        for feature in features:
+            columns.append(feature)
+        return columns
+
+    @property
+    def schema(self):
+        """ The property keys in the order they were first seen """
+        return list(self._columns)
+
+    @property
+    def geometries(self):
+        return GeometrySequence(self._geometries)
+
+    def column(self, key):
+        """ The values of a property for all features, the list is shared
+        with the collection and must not be changed """
+        return self._columns[key]
+
+    def _feature(self, i):
+        properties = {}
+        for key, values in self._columns.items():
+            properties[key] = values[i]
+        return Feature(self._geometries[i], properties)
+
+    def __len__(self):
+        return len(self._geometries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('feature index out of range')
+        return self._feature(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._feature(i)
+
+    def __delitem__(self, index):
+        del self._geometries[index]
+        for values in self._columns.values():
+            del values[index]
+
+    def append(self, feature):
+        """ Append a Feature, new property keys are added to the schema """
+        n = len(self._geometries)
+        properties = feature.properties or {}
+        for key in properties:
+            if key not in self._columns:
+                self._columns[key] = [None] * n
+        for key, values in self._columns.items():
+            values.append(properties.get(key))
+        self._geometries.append(feature.geometry)
+
+    def take(self, indices):
+        """ Return new FeatureColumns with the features at indices """
+        geometries = self._geometries
+        return FeatureColumns(
+            [geometries[i] for i in indices],
+            dict((key, [values[i] for i in indices])
+                 for key, values in self._columns.items()))
+
+    def select(self, keys):
+        """ Return new FeatureColumns with only the properties in keys """
+        return FeatureColumns(
+            list(self._geometries),
+            dict((key, list(self._columns[key])) for key in keys))
+
+    def indices(self, predicate):
+        """ The indices of the features for which the predicate is true,
+        see FeatureCollection.filter """
+        keys = self.schema
+        if callable(predicate):
+            return [i for i in range(len(self))
+                    if predicate(dict(zip(keys,
+                                          [self._columns[key][i]
+                                           for key in keys])))]
+        names = _filter_names(predicate)
+        # the expression was checked, it can only call _filter_functions
+        function = eval('lambda {0}: ({1}\n)'.format(
+            ', '.join(names), predicate.strip()),
+            {'__builtins__': _filter_functions})
+        if not names:
+            return list(range(len(self))) if function() else []
+        missing = [None] * len(self)
+        return [i for i, keep in enumerate(
+            map(function, *[self._columns.get(name, missing)
+                            for name in names])) if keep]
+
+
+class FeatureCollection(_MutableCollection, _GeoObject):
     """A heterogenous collection of Features
 
     Attributes
@@ -986,6 +1862,8 @@ class FeatureCollection(_GeoObject):
     """
     _type = 'FeatureCollection'
     _features = None
+    _index_kinds = None
+    _index_cache = None
 
     @property
     def __geo_interface__(self):
@@ -994,16 +1872,25 @@ class FeatureCollection(_GeoObject):
             gifs.append(feature.__geo_interface__)
         return {'type': self._type, 'features': gifs}
 
-    def __init__(self, features):
+    def __init__(self, features, columnar=False):
+        """
+        Parameters
+        ----------
+        features : sequence
+            A sequence of Features or FeatureColumns
+        columnar : bool
+            Store the properties in columns, see FeatureColumns
+        """
         self._features = []
-        if isinstance(features, (list, tuple)):
+        if isinstance(features, FeatureColumns):
+            self._features = features
+        elif isinstance(features, (list, tuple)):
             for feature in features:
-                if isinstance(feature, Feature):
-                    self._features.append(feature)
-                else:
-                    raise ValueError
+                self._features.append(self._part(feature))
         else:
             raise TypeError
+        if columnar and not self.columnar:
+            self._features = FeatureColumns.from_features(self._features)
 
     @property
     def features(self):
@@ -1013,18 +1900,33 @@ class FeatureCollection(_GeoObject):
             else:
                 raise ValueError("Illegal type.")
 
-    @property
-    def bounds(self):
-        if self._features:
-            minx = self._features[0].geometry.bounds[0]
-            miny = self._features[0].geometry.bounds[1]
-            maxx = self._features[0].geometry.bounds[2]
-            maxy = self._features[0].geometry.bounds[3]
-            for feature in self.features:
-                minx = min(feature.geometry.bounds[0], minx)
-                miny = min(feature.geometry.bounds[1], miny)
-                maxx = max(feature.geometry.bounds[2], maxx)
-                maxy = max(feature.geometry.bounds[3], maxy)
+    def _parts(self):
+        return self._features
+
+    def _part(self, feature):
+        if isinstance(feature, Feature):
+            return feature
+        raise ValueError
+
+    def _geometries(self):
+        if self.columnar:
+            return self._features._geometries
+        return [feature.geometry for feature in self._features]
+
+    def _feature_bounds(self):
+        """ The bounds of each feature, None without a geometry """
+        return [geometry.bounds if geometry is not None else None
+                for geometry in self._geometries()]
+
+    def _compute_bounds(self):
+        bounds = [b for b in self._feature_bounds() if b]
+        if bounds:
+            minx, miny, maxx, maxy = bounds[0][:4]
+            for b in bounds:
+                minx = min(b[0], minx)
+                miny = min(b[1], miny)
+                maxx = max(b[2], maxx)
+                maxy = max(b[3], maxy)
             return (minx, miny, maxx, maxy)
 
     def __len__(self):
@@ -1033,6 +1935,376 @@ class FeatureCollection(_GeoObject):
         else:
             return 0
 
+    def sorted_spatially(self, curve='hilbert'):
+        """Return a new FeatureCollection with the features ordered along
+        a space filling curve ('hilbert' or 'morton') through the centers
+        of their bounding boxes, so that nearby features are adjacent."""
+        return self._take(_spatial_order(self._feature_bounds(), curve))
+
+    @property
+    def columnar(self):
+        """ True if the properties are stored in columns """
+        return isinstance(self._features, FeatureColumns)
+
+    def _take(self, indices):
+        if self.columnar:
+            return FeatureCollection(self._features.take(indices))
+        return FeatureCollection([self._features[i] for i in indices])
+
+    def append(self, feature):
+        super(FeatureCollection, self).append(feature)
+        cache = self._index_cache
+        if cache:
+            i = len(self._features) - 1
+            value = (self._features[i].properties or {}).get
+            for key, index in cache.items():
+                if key is None:
+                    cache[None] = None
+                elif self._index_kinds[key] == 'hash':
+                    if value(key) is not None:
+                        index.setdefault(value(key), []).append(i)
+                elif value(key) is not None:
+                    # after equal values, the indices of ties stay sorted
+                    position = bisect_right(index[0], value(key))
+                    index[0].insert(position, value(key))
+                    index[1].insert(position, i)
+
+    def remove(self, feature):
+        super(FeatureCollection, self).remove(feature)
+        self._index_cache = {}
+
+    def copy(self):
+        """ Return a copy with copies of the features, see Feature.copy,
+        the definitions of the indexes are copied as well """
+        if self.columnar:
+            columns = self._features
+            features = FeatureColumns(
+                [geometry.copy() for geometry in columns._geometries],
+                dict((key, list(values))
+                     for key, values in columns._columns.items()))
+        else:
+            features = [feature.copy() for feature in self._features]
+        collection = FeatureCollection(features)
+        collection._bbox = self._bbox
+        if self._index_kinds is not None:
+            collection._index_kinds = dict(self._index_kinds)
+            collection._index_cache = {}
+        return collection
+
+    @property
+    def indexes(self):
+        """ The property keys with an index and the kind of the index """
+        return dict(self._index_kinds or {})
+
+    def create_index(self, key, kind='hash'):
+        """Index a property for where(), a 'hash' index for equality or a
+        'sorted' index for ranges and equality.  The index is built on
+        the first query and kept up to date when features are appended."""
+        if kind not in ('hash', 'sorted'):
+            raise ValueError('Unknown index {0}, use hash or sorted'.format(
+                kind))
+        if self._index_kinds is None:
+            self._index_kinds = {}
+            self._index_cache = {}
+        self._index_kinds[key] = kind
+        self._index_cache.pop(key, None)
+
+    def drop_index(self, key):
+        del (self._index_kinds or {})[key]
+        self._index_cache.pop(key, None)
+
+    def _values(self, key):
+        if self.columnar:
+            schema = self._features._columns
+            return schema[key] if key in schema else [None] * len(self)
+        return [(feature.properties or {}).get(key)
+                for feature in self._features]
+
+    def _index(self, key):
+        """ The index of key, None is the bbox index, built on demand """
+        if self._index_cache is None:
+            self._index_cache = {}
+        index = self._index_cache.get(key)
+        if index is not None:
+            return index
+        if key is None:
+            index = _PackedRTree(self._feature_bounds())
+        elif self._index_kinds[key] == 'hash':
+            index = {}
+            for i, value in enumerate(self._values(key)):
+                if value is not None:
+                    index.setdefault(value, []).append(i)
+        else:
+            values = self._values(key)
+            order = sorted((i for i, value in enumerate(values)
+                            if value is not None),
+                           key=values.__getitem__)
+            index = ([values[i] for i in order], order)
+        self._index_cache[key] = index
+        return index
+
+    def _lookup(self, key, condition):
+        """ The candidate indices for a condition on an indexed key """
+        index = self._index(key)
+        if isinstance(condition, slice):
+            start = 0 if condition.start is None else bisect_left(
+                index[0], condition.start)
+            stop = len(index[0]) if condition.stop is None else bisect_left(
+                index[0], condition.stop)
+            return index[1][start:stop]
+        values = (condition if isinstance(condition, (list, set, frozenset))
+                  else [condition])
+        if len(values) > 1:
+            # repeated values would give the same candidates again
+            seen = set()
+            values = [value for value in values
+                      if not (value in seen or seen.add(value))]
+        if self._index_kinds[key] == 'hash':
+            candidates = []
+            for value in values:
+                candidates.extend(index.get(value, ()))
+            return candidates
+        candidates = []
+        for value in values:
+            candidates.extend(index[1][bisect_left(index[0], value):
+                                       bisect_right(index[0], value)])
+        return candidates
+
+    def _estimate(self, key, condition):
+        """ The number of candidates of a condition without building the
+        list of candidates, where it can be counted cheaply """
+        if (self._index_kinds[key] == 'hash' and
+                not isinstance(condition, (list, set, frozenset))):
+            return len(self._index(key).get(condition, ()))
+        return len(self._lookup(key, condition))
+
+    def where(self, bbox=None, **conditions):
+        """Return a new FeatureCollection with the features whose
+        properties match all conditions and whose bounds intersect bbox.
+
+        A condition is a value for equality, a list or set of values or a
+        slice(start, stop) for start <= value < stop. Indexed keys
+        (see create_index) give the candidates, the condition with the
+        fewest candidates is used and the candidates are checked against
+        the other conditions. Without usable indexes the bbox is looked
+        up in a packed R-tree, which is built on the first query.
+        """
+        plans = [(self._estimate(key, condition), key, condition)
+                 for key, condition in conditions.items()
+                 if key in (self._index_kinds or {}) and not (
+                     isinstance(condition, slice) and
+                     self._index_kinds[key] == 'hash')]
+        if plans:
+            count, key, condition = min(plans, key=lambda plan: plan[0])
+            candidates = self._lookup(key, condition)
+            del conditions[key]
+            if bbox is not None and count > len(self) // 16:
+                candidates = set(candidates)
+                candidates.intersection_update(
+                    self._index(None).search(*bbox))
+                bbox = None
+        elif bbox is not None:
+            candidates = self._index(None).search(*bbox)
+            bbox = None
+        else:
+            candidates = range(len(self))
+        matches = []
+        for i in sorted(candidates):
+            feature = self._features[i]
+            if bbox is not None:
+                bounds = (feature.geometry.bounds
+                          if feature.geometry is not None else None)
+                if (not bounds or bounds[0] > bbox[2] or
+                        bounds[1] > bbox[3] or bounds[2] < bbox[0] or
+                        bounds[3] < bbox[1]):
+                    continue
+            properties = feature.properties or {}
+            if all(_matches(properties.get(key), condition)
+                   for key, condition in conditions.items()):
+                matches.append(i)
+        return self._take(matches)
+
+    def filter(self, predicate_expr):
+        """Return a new FeatureCollection with the features for which
+        predicate_expr is true.
+
+        predicate_expr is a Python expression over the property keys, like
+        ``"category == 'road' and lanes > 2"``, it is evaluated once per
+        feature with the values of the columns it refers to, without
+        creating the Features.  Missing properties are None.  Only
+        comparisons, boolean operators, arithmetic, literals and calls of
+        abs, bool, float, int, len, max, min, round and str are allowed,
+        anything else raises a ValueError.
+        A callable is called with the properties of each feature instead.
+        """
+        if self.columnar:
+            columns = self._features
+        else:
+            columns = FeatureColumns(
+                self._geometries(),
+                self._property_columns(predicate_expr))
+        return self._take(columns.indices(predicate_expr))
+
+    def _property_columns(self, predicate_expr):
+        """ Columns of the properties predicate_expr needs """
+        keys = set()
+        for feature in self._features:
+            keys.update(feature.properties or ())
+        if not callable(predicate_expr):
+            keys.intersection_update(_filter_names(predicate_expr))
+        return dict((key, [(feature.properties or {}).get(key)
+                           for feature in self._features])
+                    for key in keys)
+
+    def select(self, columns):
+        """Return a new FeatureCollection with the same geometries and only
+        the properties in columns"""
+        if self.columnar:
+            return FeatureCollection(self._features.select(columns))
+        return FeatureCollection(
+            [Feature(feature.geometry,
+                     dict((key, feature.properties[key]) for key in columns
+                          if key in feature.properties))
+             for feature in self._features])
+
+
+def _matches(value, condition):
+    """ Does a property value satisfy a where() condition """
+    if isinstance(condition, slice):
+        return value is not None and (
+            condition.start is None or value >= condition.start) and (
+            condition.stop is None or value < condition.stop)
+    elif isinstance(condition, (list, set, frozenset)):
+        return value in condition
+    return value == condition
+
+
+def _hilbert_key(x, y, n=65536):
+    """Distance of the cell x, y along the Hilbert curve of an n * n grid"""
+    d = 0
+    s = n >> 1
+    while s:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+
+def _part1by1(n):
+    """Spread the lower 16 bits of n to the even bit positions"""
+    n &= 0xffff
+    n = (n | (n << 8)) & 0x00ff00ff
+    n = (n | (n << 4)) & 0x0f0f0f0f
+    n = (n | (n << 2)) & 0x33333333
+    n = (n | (n << 1)) & 0x55555555
+    return n
+
+
+def _morton_key(x, y):
+    """Z-order key of the cell x, y by interleaving the bits"""
+    return _part1by1(x) | (_part1by1(y) << 1)
+
+
+_curves = {'hilbert': _hilbert_key, 'morton': _morton_key,
+           'zorder': _morton_key}
+
+
+def _spatial_order(bounds, curve='hilbert'):
+    """Return the indices of a list of bounds sorted along a space filling
+    curve through the bounding box centers. The centers are scaled to a
+    65536 * 65536 grid over the extent of all bounds in a single pass.
+    Empty bounds (None) are sorted to the end."""
+    try:
+        key = _curves[curve]
+    except KeyError:
+        raise ValueError('Unknown curve {0}, use one of {1}'.format(
+            curve, ', '.join(sorted(_curves))))
+    centers = [((b[0] + b[2]) / 2.0, (b[1] + b[3]) / 2.0) if b else None
+               for b in bounds]
+    xs = [c[0] for c in centers if c is not None]
+    ys = [c[1] for c in centers if c is not None]
+    if not xs:
+        return list(range(len(centers)))
+    minx, miny = min(xs), min(ys)
+    sx = 65535.0 / ((max(xs) - minx) or 1.0)
+    sy = 65535.0 / ((max(ys) - miny) or 1.0)
+    last = 1 << 32
+    keys = [key(int((c[0] - minx) * sx), int((c[1] - miny) * sy))
+            if c is not None else last for c in centers]
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+
+_no_bounds = (float('inf'), float('inf'), float('-inf'), float('-inf'))
+
+
+class _PackedRTree(object):
+    """A static R-tree over a list of bounds, packed bottom up in Hilbert
+    order with node_size children per node.
+
+    Each level is a flat array of (minx, miny, maxx, maxy) boxes, the leaf
+    level holds the bounds and items the positions of the bounds in the
+    list, leaves first, there is always a root level above the leaves.
+    Empty bounds (None) are not indexed, with keep_empty they are stored
+    last with an inverted infinite box that never intersects."""
+
+    def __init__(self, bounds, node_size=16, keep_empty=False):
+        self.node_size = node_size
+        self.items = [i for i in _spatial_order(bounds)
+                      if bounds[i] or keep_empty]
+        leaves = array('d')
+        for i in self.items:
+            leaves.extend(bounds[i][:4] if bounds[i] else _no_bounds)
+        self.levels = [leaves]
+        while len(self.levels) == 1 or len(self.levels[-1]) > 4:
+            children = self.levels[-1]
+            parents = array('d')
+            step = 4 * node_size
+            for start in range(0, len(children), step):
+                node = children[start:start + step]
+                parents.extend((min(node[0::4]), min(node[1::4]),
+                                max(node[2::4]), max(node[3::4])))
+            self.levels.append(parents)
+
+    def search(self, minx, miny, maxx, maxy):
+        """ Return the positions of the bounds that intersect the box,
+        in the order of the tree """
+        result = []
+        top = len(self.levels) - 1
+        if not self.items:
+            return result
+        stack = [(top, 0)]
+        node_size = self.node_size
+        while stack:
+            level, node = stack.pop()
+            boxes = self.levels[level]
+            count = node_size if level < top else 1
+            end = min(len(boxes) // 4, node + count)
+            for i in range(node, end):
+                j = 4 * i
+                if (boxes[j] > maxx or boxes[j + 1] > maxy or
+                        boxes[j + 2] < minx or boxes[j + 3] < miny):
+                    continue
+                if level:
+                    stack.append((level - 1, i * node_size))
+                else:
+                    result.append(self.items[i])
+        return result
+
+
+def sort_spatially(geometries, curve='hilbert'):
+    """Return a list of the geometries ordered along a space filling curve
+    ('hilbert' or 'morton') through the centers of their bounding boxes,
+    so that nearby geometries are adjacent."""
+    geometries = list(geometries)
+    bounds = [geom.bounds for geom in geometries]
+    return [geometries[i] for i in _spatial_order(bounds, curve)]
+
 
 def signed_area(coords):
     """Return the signed area enclosed by a ring using the linear time
@@ -1051,25 +2323,352 @@ def signed_area(coords):
 
 
 def orient(polygon, sign=1.0):
-    s = float(sign)
-    rings = []
-    ring = polygon.exterior
-    if signed_area(ring.coords)/s >= 0.0:
-        rings.append(ring.coords)
+    return _orient_rings(polygon.copy(), float(sign))
+
+
+def _orient_rings(polygon, sign):
+    """ Orient the rings of a polygon in place, the exterior
+    counterclockwise and the holes clockwise for a positive sign """
+    ring = polygon._exterior
+    if ring is not None and _flat_signed_area(ring._coords,
+                                              ring._dims) * sign < 0.0:
+        _reverse_ring(ring)
+    for ring in polygon._interiors or ():
+        if _flat_signed_area(ring._coords, ring._dims) * sign > 0.0:
+            _reverse_ring(ring)
+    return polygon
+
+
+def normalize_orientation(geometry, rfc7946=True):
+    """
+    Orient the rings of a Polygon or the polygons of a MultiPolygon or a
+    GeometryCollection in place and return the geometry.
+
+    With rfc7946 the exterior rings are counterclockwise and the holes
+    clockwise, as required by RFC 7946 (GeoJSON), otherwise the other way
+    round (as in shapefiles). Other geometries are returned unchanged.
+    Rings whose storage is shared, with a buffer they were created from
+    or with a copy, get new storage, coords views obtained before keep
+    the old order.
+    """
+    sign = 1.0 if rfc7946 else -1.0
+    if isinstance(geometry, Polygon):
+        _orient_rings(geometry, sign)
+    elif isinstance(geometry, (MultiPolygon, GeometryCollection)):
+        for geom in geometry._geoms:
+            normalize_orientation(geom, rfc7946)
+    return geometry
+
+
+def _xy_coordinates(geometry):
+    """Yield the (x, y) pairs of the vertices of a geometry, reading
+    the stored coordinates directly instead of building coords tuples."""
+    if isinstance(geometry, Point):
+        yield (geometry._coordinates[0], geometry._coordinates[1])
+    elif isinstance(geometry, (LineString, MultiPoint)):
+        flat, dims = geometry._coords, geometry._dims
+        for xy in zip(flat[0::dims], flat[1::dims]):
+            yield xy
+    elif isinstance(geometry, Polygon):
+        # the interiors are inside the exterior, they never touch the hull
+        for xy in _xy_coordinates(geometry._exterior):
+            yield xy
+    elif isinstance(geometry, (MultiLineString, MultiPolygon,
+                               GeometryCollection)):
+        for geom in geometry._geoms:
+            for xy in _xy_coordinates(geom):
+                yield xy
     else:
-        rings.append(list(ring.coords)[::-1])
-    for ring in polygon.interiors:
-        if signed_area(ring.coords)/s <= 0.0:
-            rings.append(ring.coords)
+        raise TypeError
+
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def convex_hull(geometry):
+    """Return the convex hull of a geometry as a Polygon, computed with
+    Andrew's monotone chain algorithm in O(n log n).
+
+    In degenerate cases a Point (all vertices are equal) or a LineString
+    (all vertices are collinear) is returned. Z values are ignored.
+    """
+    if not isinstance(geometry, _Geometry):
+        geometry = as_shape(geometry)
+    points = sorted(set(_xy_coordinates(geometry)))
+    if not points:
+        raise ValueError('An empty geometry has no convex hull')
+    if len(points) == 1:
+        return Point(points[0])
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and _cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and _cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    hull = lower[:-1] + upper[:-1]
+    if len(hull) < 3:
+        return LineString([points[0], points[-1]])
+    return Polygon(hull)
+
+
+def _orientation(a, b, c):
+    cross = _cross(a, b, c)
+    if cross > 0:
+        return 1
+    elif cross < 0:
+        return -1
+    return 0
+
+
+def _on_segment(a, b, c):
+    """c is collinear with a, b: is it inside the bounding box of a, b?"""
+    return (min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and
+            min(a[1], b[1]) <= c[1] <= max(a[1], b[1]))
+
+
+def _intersection(a, b, c, d):
+    """ Return (point, proper) for the segments a-b and c-d or None if
+    they do not intersect. proper is True when the segments cross in
+    their interiors or overlap along a line, False if they only touch
+    at an end point."""
+    o1 = _orientation(a, b, c)
+    o2 = _orientation(a, b, d)
+    o3 = _orientation(c, d, a)
+    o4 = _orientation(c, d, b)
+    if o1 == o2 == o3 == o4 == 0:
+        shared = [p for p in (c, d) if _on_segment(a, b, p)]
+        shared += [p for p in (a, b) if _on_segment(c, d, p)]
+        if not shared:
+            return None
+        # a single distinct shared point is a touch, more is an overlap
+        return shared[0], len(set(shared)) > 1
+    if o1 != o2 and o3 != o4:
+        if 0 in (o1, o2, o3, o4):
+            for p, s, e in ((c, a, b), (d, a, b), (a, c, d), (b, c, d)):
+                if _orientation(s, e, p) == 0:
+                    return p, False
+        denom = ((a[0] - b[0]) * (c[1] - d[1]) -
+                 (a[1] - b[1]) * (c[0] - d[0]))
+        t = ((a[0] - c[0]) * (c[1] - d[1]) -
+             (a[1] - c[1]) * (c[0] - d[0])) / float(denom)
+        return (a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])), True
+    for p, s, e in ((c, a, b), (d, a, b), (a, c, d), (b, c, d)):
+        if _orientation(s, e, p) == 0 and _on_segment(s, e, p):
+            return p, False
+    return None
+
+
+def _segment_y(segment, x, y):
+    """y value of the segment at the sweep position x, y"""
+    (x1, y1), (x2, y2) = segment[0], segment[1]
+    if x1 == x2:
+        return min(max(y, y1), y2)
+    return y1 + (y2 - y1) * (x - x1) / float(x2 - x1)
+
+
+def _segment_slope(segment):
+    (x1, y1), (x2, y2) = segment[0], segment[1]
+    if x1 == x2:
+        return float('inf')
+    return (y2 - y1) / float(x2 - x1)
+
+
+def _segment_conflict(s1, s2):
+    """Return the reason and location if the segments s1 and s2
+    intersect in a way that makes their ring(s) invalid"""
+    a, b, ring1, i1, n1 = s1
+    c, d, ring2, i2, n2 = s2
+    hit = _intersection(a, b, c, d)
+    if hit is None:
+        return None
+    point, proper = hit
+    if ring1 != ring2:
+        if proper:
+            return 'Self-intersection', point
+        return None
+    if abs(i1 - i2) == 1 or abs(i1 - i2) == n1 - 1:
+        # neighbours share a vertex, they must not overlap (a spike)
+        if proper:
+            return 'Ring Self-intersection', point
+        return None
+    return 'Ring Self-intersection', point
+
+
+def _sweep_intersections(rings):
+    """Shamos-Hoey sweep line: find the first invalid intersection of the
+    segments of the rings or return None.
+
+    The sweep status is a list of the segments crossing the sweep line,
+    ordered by their y value (and slope to break ties) at the current
+    event.  At each event point the segments ending there are removed
+    before the segments starting there are inserted, so that segments
+    which only touch at the point keep their order and the new
+    neighbours are compared."""
+    segments = []
+    for r, ring in enumerate(rings):
+        n = len(ring) - 1
+        for i in range(n):
+            p, q = ring[i], ring[i + 1]
+            if q < p:
+                p, q = q, p
+            segments.append((p, q, r, i, n))
+    events = [(s[1], 0, k) for k, s in enumerate(segments)]
+    events.extend((s[0], 1, k) for k, s in enumerate(segments))
+    events.sort()
+    status = []
+
+    def position(k, x, y):
+        seg = segments[k]
+        sy = _segment_y(seg, x, y)
+        slope = _segment_slope(seg)
+        lo, hi = 0, len(status)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = segments[status[mid]]
+            oy = _segment_y(other, x, y)
+            if oy < sy or (oy == sy and _segment_slope(other) < slope):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def check(i, j):
+        if 0 <= i < len(status) and 0 <= j < len(status):
+            return _segment_conflict(segments[status[i]],
+                                     segments[status[j]])
+
+    for (x, y), kind, k in events:
+        if kind == 1:
+            i = position(k, x, y)
+            status.insert(i, k)
+            problem = check(i - 1, i) or check(i, i + 1)
         else:
-            rings.append(list(ring.coords)[::-1])
-    return Polygon(rings[0], rings[1:])
+            i = position(k, x, y)
+            if i >= len(status) or status[i] != k:
+                i = status.index(k)
+            del status[i]
+            problem = check(i - 1, i)
+        if problem:
+            return problem
+    return None
+
+
+def _point_in_ring(point, ring):
+    """Ray casting: 1 inside, 0 on the boundary, -1 outside"""
+    x, y = point
+    inside = False
+    for i in range(len(ring) - 1):
+        a, b = ring[i], ring[i + 1]
+        if _orientation(a, b, point) == 0 and _on_segment(a, b, point):
+            return 0
+        if (a[1] > y) != (b[1] > y):
+            if x < a[0] + (y - a[1]) * (b[0] - a[0]) / float(b[1] - a[1]):
+                inside = not inside
+    return 1 if inside else -1
+
+
+def _ring_problem(coords):
+    """Check a single ring for closure, size and repeated vertices and
+    return the ring as a list of distinct consecutive 2D vertices."""
+    ring = []
+    for coord in coords:
+        xy = (float(coord[0]), float(coord[1]))
+        if not ring or ring[-1] != xy:
+            ring.append(xy)
+    if not ring:
+        return ('Too few points in geometry component', (0.0, 0.0)), ring
+    if tuple(coords[0]) != tuple(coords[-1]):
+        return ('Ring not closed', ring[0]), ring
+    if len(ring) < 4:
+        return ('Too few points in geometry component', ring[0]), ring
+    seen = set()
+    for xy in ring[:-1]:
+        if xy in seen:
+            return ('Ring Self-intersection', xy), ring
+        seen.add(xy)
+    return None, ring
+
+
+def _polygon_problem(rings):
+    checked = []
+    for coords in rings:
+        problem, ring = _ring_problem(coords)
+        if problem:
+            return problem
+        checked.append(ring)
+    problem = _sweep_intersections(checked)
+    if problem:
+        return problem
+    shell = checked[0]
+    for hole in checked[1:]:
+        for xy in hole:
+            location = _point_in_ring(xy, shell)
+            if location == -1:
+                return 'Hole lies outside shell', xy
+            elif location == 1:
+                break
+    return None
+
+
+def _validity_problem(gi):
+    ft = gi['type']
+    if ft == 'LinearRing':
+        return _polygon_problem([gi['coordinates']])
+    elif ft == 'Polygon':
+        return _polygon_problem(gi['coordinates'])
+    elif ft == 'MultiPolygon':
+        for coords in gi['coordinates']:
+            problem = _polygon_problem(coords)
+            if problem:
+                return problem
+    elif ft == 'GeometryCollection':
+        for geom in gi['geometries']:
+            problem = _validity_problem(geom)
+            if problem:
+                return problem
+    return None
+
+
+def explain_validity(geometry):
+    """Return 'Valid Geometry' or a description why the geometry is
+    invalid, followed by the location of the problem, e.g.
+    'Self-intersection[0.5 0.5]'.
+
+    Rings are checked for closure, a minimum of 4 coordinates and
+    self-intersections, polygon rings must not cross each other and
+    holes must lie within the shell. Intersections are detected with a
+    Shamos-Hoey sweep line.
+    Accepts a geometry or a __geo_interface__ compatible dictionary.
+    """
+    if isinstance(geometry, dict):
+        gi = geometry
+    elif hasattr(geometry, '__geo_interface__'):
+        gi = geometry.__geo_interface__
+    else:
+        raise TypeError('Object does not implement __geo_interface__')
+    problem = _validity_problem(gi)
+    if problem:
+        reason, (x, y) = problem
+        return '{0}[{1} {2}]'.format(reason, x, y)
+    return 'Valid Geometry'
+
+
+def is_valid(geometry):
+    """Return True if the geometry is valid, see explain_validity"""
+    return explain_validity(geometry) == 'Valid Geometry'
 
 
-def as_shape(geometry):
+def as_shape(geometry, normalize=False):
     """ creates a pygeoif geometry from an object that
     provides the __geo_interface__ or a dictionary that
-    is __geo_interface__ compatible"""
+    is __geo_interface__ compatible.
+    With normalize the rings of polygons are oriented as
+    required by RFC 7946 while they are created"""
     gi = None
     if isinstance(geometry, dict):
         is_geometryCollection = geometry['type'] == 'GeometryCollection'
@@ -1098,14 +2697,15 @@ def as_shape(geometry):
         if ft == 'GeometryCollection':
             geometries = []
             for fi in gi['geometries']:
-                geometries.append(as_shape(fi))
+                geometries.append(as_shape(fi, normalize))
             return GeometryCollection(geometries)
         if ft == 'Feature':
-            return Feature(as_shape(gi['geometry']), gi['properties'])
+            return Feature(as_shape(gi['geometry'], normalize),
+                           gi['properties'])
         if ft == 'FeatureCollection':
             features = []
             for fi in gi['features']:
-                features.append(as_shape(fi))
+                features.append(as_shape(fi, normalize))
             return FeatureCollection(features)
         coords = gi['coordinates']
         if ft == 'Point':
@@ -1115,7 +2715,10 @@ def as_shape(geometry):
         elif ft == 'LinearRing':
             return LinearRing(coords)
         elif ft == 'Polygon':
-            return Polygon(coords)
+            polygon = Polygon(coords)
+            if normalize:
+                _orient_rings(polygon, 1.0)
+            return polygon
         elif ft == 'MultiPoint':
             return MultiPoint(coords)
         elif ft == 'MultiLineString':
@@ -1123,8 +2726,11 @@ def as_shape(geometry):
         elif ft == 'MultiPolygon':
             polygons = []
             for icoords in coords:
-                polygons.append(Polygon(icoords[0], icoords[1:]))
-            return MultiPolygon(polygons)
+                polygon = Polygon(icoords[0], icoords[1:])
+                if normalize:
+                    _orient_rings(polygon, 1.0)
+                polygons.append(polygon)
+            return _from_geoms(MultiPolygon, polygons)
         else:
             raise NotImplementedError
     else:
@@ -1145,11 +2751,15 @@ gcre = re.compile(r'POINT|LINESTRING|LINEARRING|POLYGON')
 outer = re.compile("\((.+)\)")
 inner = re.compile("\([^)]*\)")
 mpre = re.compile("\(\((.+?)\)\)")
+# x and y of a WKT coordinate, the optional z and m values are skipped
+wkt_xy = re.compile(r'([-+.\d][^\s(),]*)\s+([^\s(),]+)[^(),]*')
 
 
-def from_wkt(geo_str):
+def from_wkt(geo_str, normalize=False):
     """
-    Create a geometry from its WKT representation
+    Create a geometry from its WKT representation.
+    With normalize the rings of polygons are oriented as required by
+    RFC 7946 while they are created.
     """
 
     wkt = geo_str.strip()
@@ -1178,7 +2788,10 @@ def from_wkt(geo_str):
                 exteriors.append([c.split() for c in ext])
         else:
             exteriors = None
-        return Polygon([c.split() for c in coords[0]], exteriors)
+        polygon = Polygon([c.split() for c in coords[0]], exteriors)
+        if normalize:
+            _orient_rings(polygon, 1.0)
+        return polygon
 
     elif ftype == 'MULTIPOINT':
         coords1 = coordinates.split(',')
@@ -1209,8 +2822,11 @@ def from_wkt(geo_str):
                     exteriors.append([c.split() for c in ext])
             else:
                 exteriors = None
-            polygons.append(Polygon([c.split() for c in coords[0]], exteriors))
-        return MultiPolygon(polygons)
+            polygon = Polygon([c.split() for c in coords[0]], exteriors)
+            if normalize:
+                _orient_rings(polygon, 1.0)
+            polygons.append(polygon)
+        return _from_geoms(MultiPolygon, polygons)
     elif ftype == 'GEOMETRYCOLLECTION':
         gc_types = gcre.findall(coordinates)
         gc_coords = gcre.split(coordinates)[1:]
@@ -1218,11 +2834,607 @@ def from_wkt(geo_str):
         geometries = []
         for (gc_type, gc_coord) in zip(gc_types, gc_coords):
             gc_wkt = gc_type + gc_coord[:gc_coord.rfind(')') + 1]
-            geometries.append(from_wkt(gc_wkt))
+            geometries.append(from_wkt(gc_wkt, normalize))
         return GeometryCollection(geometries)
     else:
         raise NotImplementedError
 
 
+def _from_geoms(cls, geoms):
+    """ Create a MultiLineString, MultiPolygon or GeometryCollection from a
+    list of geometries of the right type without copying them"""
+    collection = cls.__new__(cls)
+    collection._geoms = geoms
+    return collection
+
+
+_native_byteorder = '<' if sys.byteorder == 'little' else '>'
+
+
+def _wkb_coordinates(data, offset, count, dims, has_m, endian):
+    """ Read count coordinates into a flat array, M values are dropped """
+    width = dims + 1 if has_m else dims
+    end = offset + 8 * count * width
+    if end > len(data):
+        raise ValueError('WKB is truncated')
+    flat = array('d')
+    flat.frombytes(data[offset:end])
+    if endian != _native_byteorder:
+        flat.byteswap()
+    if has_m:
+        coords = array('d', flat[:count * dims])
+        for i in range(dims):
+            coords[i::dims] = flat[i::width]
+        flat = coords
+    return flat, end
+
+
+def _read_wkb(data, offset):
+    """ Read the geometry starting at offset and return it with the
+    offset of the next byte """
+    endian = '<' if struct.unpack_from('B', data, offset)[0] else '>'
+    wkb_type, = struct.unpack_from(endian + 'I', data, offset + 1)
+    offset += 5
+    has_z = bool(wkb_type & 0x80000000)
+    has_m = bool(wkb_type & 0x40000000)
+    if wkb_type & 0x20000000:
+        # EWKB with SRID
+        offset += 4
+    iso, gtype = divmod(wkb_type & 0x0fffffff, 1000)
+    has_z = has_z or iso in (1, 3)
+    has_m = has_m or iso in (2, 3)
+    dims = 3 if has_z else 2
+    if gtype == 1:
+        flat, offset = _wkb_coordinates(data, offset, 1, dims, has_m, endian)
+        return Point(*flat), offset
+    count, = struct.unpack_from(endian + 'I', data, offset)
+    offset += 4
+    if gtype == 2:
+        flat, offset = _wkb_coordinates(data, offset, count, dims, has_m,
+                                        endian)
+        return LineString._from_flat(flat, dims), offset
+    elif gtype == 3:
+        rings = []
+        for i in range(count):
+            n, = struct.unpack_from(endian + 'I', data, offset)
+            flat, offset = _wkb_coordinates(data, offset + 4, n, dims,
+                                            has_m, endian)
+            rings.append(LinearRing._from_flat(flat, dims))
+        if not rings:
+            rings.append(LinearRing._from_flat(array('d'), dims))
+        return Polygon._from_rings(rings[0], rings[1:]), offset
+    parts = []
+    for i in range(count):
+        part, offset = _read_wkb(data, offset)
+        parts.append(part)
+    if gtype == 4:
+        flat = array('d')
+        for point in parts:
+            flat.extend(point._coordinates)
+        return MultiPoint._from_flat(flat, dims), offset
+    elif gtype == 5:
+        return _from_geoms(MultiLineString, parts), offset
+    elif gtype == 6:
+        return _from_geoms(MultiPolygon, parts), offset
+    elif gtype == 7:
+        return GeometryCollection(parts), offset
+    raise NotImplementedError
+
+
+def from_wkb(wkb):
+    """
+    Create a geometry from its WKB representation, as bytes or hex encoded.
+
+    ISO WKB and PostGIS EWKB (with SRID) are supported,
+    Z values are kept and M values are dropped.
+    """
+    if isinstance(wkb, (bytes, bytearray, memoryview)):
+        data = bytes(wkb)
+    else:
+        data = wkb.encode('ascii')
+    if data[:1] not in (b'\x00', b'\x01'):
+        data = binascii.unhexlify(data.strip())
+    return _read_wkb(data, 0)[0]
+
+
+def _update_bounds(bounds, xs, ys):
+    if xs:
+        if bounds:
+            bounds[0] = min(bounds[0], min(xs))
+            bounds[1] = min(bounds[1], min(ys))
+            bounds[2] = max(bounds[2], max(xs))
+            bounds[3] = max(bounds[3], max(ys))
+        else:
+            bounds[:] = [min(xs), min(ys), max(xs), max(ys)]
+
+
+def wkt_bounds(geo_str):
+    """
+    Return the bounds (minx, miny, maxx, maxy) of a WKT string without
+    creating the geometry, or None for an empty geometry.
+    """
+    pairs = wkt_xy.findall(geo_str)
+    if pairs:
+        xs = [float(x) for x, y in pairs]
+        ys = [float(y) for x, y in pairs]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _wkb_run_bounds(data, offset, count, width, endian, bounds):
+    """ Update bounds with count coordinates of width values starting at
+    offset and return the offset of the next byte """
+    end = offset + 8 * count * width
+    if end > len(data):
+        raise ValueError('WKB is truncated')
+    flat = array('d')
+    flat.frombytes(data[offset:end])
+    if endian != _native_byteorder:
+        flat.byteswap()
+    _update_bounds(bounds, flat[0::width], flat[1::width])
+    return end
+
+
+def _wkb_bounds(data, offset, bounds):
+    """ Update bounds with the geometry starting at offset and return the
+    offset of the next byte """
+    endian = '<' if struct.unpack_from('B', data, offset)[0] else '>'
+    wkb_type, = struct.unpack_from(endian + 'I', data, offset + 1)
+    offset += 5
+    if wkb_type & 0x20000000:
+        # EWKB with SRID
+        offset += 4
+    iso, gtype = divmod(wkb_type & 0x0fffffff, 1000)
+    width = 2
+    if wkb_type & 0x80000000 or iso in (1, 3):
+        width += 1
+    if wkb_type & 0x40000000 or iso in (2, 3):
+        width += 1
+    if gtype == 1:
+        x, = struct.unpack_from(endian + 'd', data, offset)
+        if x != x:
+            # a point with NaN coordinates is an empty point
+            return offset + 8 * width
+        return _wkb_run_bounds(data, offset, 1, width, endian, bounds)
+    count, = struct.unpack_from(endian + 'I', data, offset)
+    offset += 4
+    if gtype == 2:
+        return _wkb_run_bounds(data, offset, count, width, endian, bounds)
+    elif gtype == 3:
+        for i in range(count):
+            n, = struct.unpack_from(endian + 'I', data, offset)
+            offset = _wkb_run_bounds(data, offset + 4, n, width, endian,
+                                     bounds)
+        return offset
+    elif gtype in (4, 5, 6, 7):
+        for i in range(count):
+            offset = _wkb_bounds(data, offset, bounds)
+        return offset
+    raise NotImplementedError
+
+
+def wkb_bounds(wkb):
+    """
+    Return the bounds (minx, miny, maxx, maxy) of a WKB geometry, as bytes
+    or hex encoded, without creating the geometry, or None for an empty
+    geometry.
+    """
+    if isinstance(wkb, (bytes, bytearray, memoryview)):
+        data = bytes(wkb)
+    else:
+        data = wkb.encode('ascii')
+    if data[:1] not in (b'\x00', b'\x01'):
+        data = binascii.unhexlify(data.strip())
+    bounds = []
+    _wkb_bounds(data, 0, bounds)
+    if bounds:
+        return tuple(bounds)
+
+
+def _geojson_bounds(coordinates, bounds):
+    if not coordinates:
+        return
+    if isinstance(coordinates[0], (list, tuple)):
+        if isinstance(coordinates[0][0], (list, tuple)):
+            for part in coordinates:
+                _geojson_bounds(part, bounds)
+        else:
+            _update_bounds(bounds, [c[0] for c in coordinates],
+                           [c[1] for c in coordinates])
+    else:
+        _update_bounds(bounds, coordinates[:1], coordinates[1:2])
+
+
+def _geojson_object_bounds(obj, bounds):
+    if obj is None:
+        return
+    if obj.get('bbox'):
+        bbox = obj['bbox']
+        half = len(bbox) // 2
+        _update_bounds(bounds, [bbox[0], bbox[half]],
+                       [bbox[1], bbox[half + 1]])
+    elif obj['type'] == 'FeatureCollection':
+        for feature in obj['features']:
+            _geojson_object_bounds(feature, bounds)
+    elif obj['type'] == 'Feature':
+        _geojson_object_bounds(obj['geometry'], bounds)
+    elif obj['type'] == 'GeometryCollection':
+        for geom in obj['geometries']:
+            _geojson_object_bounds(geom, bounds)
+    else:
+        _geojson_bounds(obj['coordinates'], bounds)
+
+
+def geojson_bounds(geojson):
+    """
+    Return the bounds (minx, miny, maxx, maxy) of a GeoJSON geometry,
+    Feature or FeatureCollection, as a dictionary or as text, without
+    creating geometries, or None if it is empty.
+    A 'bbox' member is trusted and used instead of the coordinates.
+    """
+    if isinstance(geojson, (str, bytes, bytearray)):
+        geojson = json.loads(geojson)
+    elif hasattr(geojson, '__geo_interface__'):
+        geojson = geojson.__geo_interface__
+    bounds = []
+    _geojson_object_bounds(geojson, bounds)
+    if bounds:
+        return tuple(bounds)
+
+
+_twkb_types = {
+    'Point': 1, 'LineString': 2, 'LinearRing': 2, 'Polygon': 3,
+    'MultiPoint': 4, 'MultiLineString': 5, 'MultiPolygon': 6,
+    'GeometryCollection': 7}
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _write_varint(value, out):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    result = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def _round_half_away(value):
+    """ Round half away from zero like the reference encoder, round()
+    rounds half to even """
+    rounded = int(math.floor(abs(value) + 0.5))
+    return -rounded if value < 0 else rounded
+
+
+def _encode_polyline(flat, dims, precision):
+    """ Encode flat coordinates as a Google polyline, latitude first """
+    factor = 10.0 ** precision
+    out = bytearray()
+    last_x = last_y = 0
+    for i in range(0, len(flat), dims):
+        x = _round_half_away(flat[i] * factor)
+        y = _round_half_away(flat[i + 1] * factor)
+        for delta in (y - last_y, x - last_x):
+            value = _zigzag(delta)
+            while value >= 0x20:
+                out.append((0x20 | value & 0x1f) + 63)
+                value >>= 5
+            out.append(value + 63)
+        last_x, last_y = x, y
+    return bytes(out).decode('ascii')
+
+
+def _decode_polyline(polyline, precision):
+    """ Decode a Google polyline into a flat array of x, y doubles """
+    if not isinstance(polyline, (bytes, bytearray)):
+        polyline = polyline.encode('ascii')
+    data = bytearray(polyline)
+    factor = 10.0 ** precision
+    flat = array('d')
+    values = [0, 0]
+    index = 0
+    length = len(data)
+    while index < length:
+        for i in (0, 1):
+            result = shift = 0
+            while True:
+                if index == length:
+                    raise ValueError('Polyline is truncated')
+                byte = data[index] - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            values[i] += _unzigzag(result)
+        flat.append(values[1] / factor)
+        flat.append(values[0] / factor)
+    return flat
+
+
+def _twkb_rings(geom):
+    """ The point arrays (flat, dims) of a geometry in the nesting of the
+    TWKB body, None for a Point """
+    if isinstance(geom, Point):
+        return None
+    elif isinstance(geom, _CoordinateStorage):
+        return (geom._coords, geom._dims)
+    elif isinstance(geom, Polygon):
+        if geom._exterior is None or not geom._exterior._coords:
+            return []
+        return [_twkb_rings(ring)
+                for ring in [geom._exterior] + list(geom._interiors or [])]
+    return [_twkb_rings(part) for part in geom._geoms]
+
+
+def _twkb_dims(rings):
+    if isinstance(rings, tuple):
+        return rings[1]
+    for part in rings:
+        return _twkb_dims(part)
+    return 2
+
+
+def _write_twkb(geom, precision, z_precision, bbox, size, ids, out):
+    """ Append the TWKB of geom to out, return the lowest and highest
+    integer coordinates for the bounding box of a collection """
+    if not -8 <= precision <= 7 or not 0 <= z_precision <= 7:
+        raise ValueError('precision must be between -8 and 7, '
+                         'z_precision between 0 and 7')
+    gtype = _twkb_types[geom._type]
+    body = bytearray()
+    lows = []
+    highs = []
+
+    def extend_box(box):
+        for i, (low, high) in enumerate(zip(*box)):
+            if i < len(lows):
+                lows[i] = min(lows[i], low)
+                highs[i] = max(highs[i], high)
+            else:
+                lows.append(low)
+                highs.append(high)
+
+    if gtype == 7:
+        dims = 2
+        empty = not geom._geoms
+        if not empty:
+            _write_varint(len(geom._geoms), body)
+            _write_twkb_ids(ids, len(geom._geoms), body)
+        for part in geom._geoms:
+            box = _write_twkb(part, precision, z_precision, bbox, size,
+                              None, body)
+            if box[0]:
+                # the header of a collection declares x and y only
+                extend_box((box[0][:2], box[1][:2]))
+    else:
+        if gtype == 1:
+            dims = len(geom._coordinates)
+            empty = geom._coordinates[0] != geom._coordinates[0]
+            rings = (geom._coordinates, dims)
+        else:
+            rings = _twkb_rings(geom)
+            dims = _twkb_dims(rings)
+            empty = not (rings[0] if gtype in (2, 4) else rings)
+        factors = [10.0 ** precision] * 2 + [10.0 ** z_precision]
+        last = [0] * dims
+
+        def points(flat, count):
+            values = [_round_half_away(value * factors[i % dims])
+                      for i, value in enumerate(flat)]
+            if count:
+                _write_varint(len(values) // dims, body)
+            for i, value in enumerate(values):
+                d = i % dims
+                _write_varint(_zigzag(value - last[d]), body)
+                last[d] = value
+            if values:
+                extend_box(([min(values[d::dims]) for d in range(dims)],
+                            [max(values[d::dims]) for d in range(dims)]))
+
+        if empty:
+            pass
+        elif gtype in (1, 2):
+            points(rings[0], gtype == 2)
+        elif gtype == 4:
+            _write_varint(len(rings[0]) // dims, body)
+            _write_twkb_ids(ids, len(rings[0]) // dims, body)
+            points(rings[0], False)
+        elif gtype == 3:
+            _write_varint(len(rings), body)
+            for ring in rings:
+                points(ring[0], True)
+        else:
+            _write_varint(len(rings), body)
+            _write_twkb_ids(ids, len(rings), body)
+            for part in rings:
+                if gtype == 5:
+                    points(part[0], True)
+                    continue
+                _write_varint(len(part), body)
+                for ring in part:
+                    points(ring[0], True)
+    metadata = (1 if bbox and not empty else 0) | (2 if size else 0)
+    if ids is not None and gtype > 3:
+        metadata |= 4
+    if dims == 3:
+        metadata |= 8
+    if empty:
+        metadata |= 16
+    out.append(gtype | _zigzag(precision) << 4)
+    out.append(metadata)
+    if dims == 3:
+        out.append(1 | z_precision << 2)
+    header = bytearray()
+    if metadata & 1:
+        for low, high in zip(lows, highs):
+            _write_varint(_zigzag(low), header)
+            _write_varint(_zigzag(high - low), header)
+    if size:
+        _write_varint(len(header) + len(body), out)
+    out.extend(header)
+    out.extend(body)
+    return lows, highs
+
+
+def _write_twkb_ids(ids, count, out):
+    if ids is not None:
+        if len(ids) != count:
+            raise ValueError('Expected {0} ids, got {1}'.format(
+                count, len(ids)))
+        for i in ids:
+            _write_varint(_zigzag(int(i)), out)
+
+
+def _read_twkb(data, offset):
+    """ Read the TWKB geometry starting at offset, return it with the ids
+    of its parts (or None) and the offset of the next byte """
+    header, metadata = data[offset], data[offset + 1]
+    offset += 2
+    gtype = header & 0x0f
+    precision = _unzigzag(header >> 4)
+    has_z = has_m = 0
+    z_precision = m_precision = 0
+    if metadata & 8:
+        extended = data[offset]
+        offset += 1
+        has_z, has_m = extended & 1, (extended >> 1) & 1
+        z_precision, m_precision = (extended >> 2) & 7, extended >> 5
+    if metadata & 2:
+        length, offset = _read_varint(data, offset)
+        if offset + length > len(data):
+            raise ValueError('TWKB is truncated')
+    dims = 2 + has_z
+    width = dims + has_m
+    if metadata & 1:
+        for i in range(2 * width):
+            value, offset = _read_varint(data, offset)
+    if metadata & 16:
+        return _empty_geometry(gtype, dims), None, offset
+    if gtype == 7:
+        count, offset = _read_varint(data, offset)
+        ids, offset = _read_twkb_ids(metadata, count, data, offset)
+        parts = []
+        for i in range(count):
+            part, part_ids, offset = _read_twkb(data, offset)
+            parts.append(part)
+        return GeometryCollection(parts), ids, offset
+    scales = [(precision, 2), (z_precision, has_z), (m_precision, has_m)]
+    scales = [(10.0 ** max(-p, 0), 10.0 ** max(p, 0))
+              for p, n in scales for i in range(n)]
+    last = [0] * width
+
+    def points(offset, count):
+        flat = array('d')
+        for i in range(count):
+            for d in range(width):
+                value, offset = _read_varint(data, offset)
+                last[d] += _unzigzag(value)
+                if d < dims:
+                    flat.append(last[d] * scales[d][0] / scales[d][1])
+        return flat, offset
+
+    def polygon_rings(offset, count):
+        rings = []
+        for i in range(count):
+            n, offset = _read_varint(data, offset)
+            flat, offset = points(offset, n)
+            rings.append(LinearRing._from_flat(flat, dims))
+        if not rings:
+            return _empty_geometry(3, dims), offset
+        return Polygon._from_rings(rings[0], rings[1:]), offset
+
+    if gtype == 1:
+        flat, offset = points(offset, 1)
+        return Point(*flat), None, offset
+    count, offset = _read_varint(data, offset)
+    if gtype == 2:
+        flat, offset = points(offset, count)
+        return LineString._from_flat(flat, dims), None, offset
+    elif gtype == 3:
+        polygon, offset = polygon_rings(offset, count)
+        return polygon, None, offset
+    ids, offset = _read_twkb_ids(metadata, count, data, offset)
+    if gtype == 4:
+        flat, offset = points(offset, count)
+        return MultiPoint._from_flat(flat, dims), ids, offset
+    parts = []
+    for i in range(count):
+        if gtype == 5:
+            n, offset = _read_varint(data, offset)
+            flat, offset = points(offset, n)
+            parts.append(LineString._from_flat(flat, dims))
+        elif gtype == 6:
+            nrings, offset = _read_varint(data, offset)
+            polygon, offset = polygon_rings(offset, nrings)
+            parts.append(polygon)
+        else:
+            raise NotImplementedError
+    if gtype == 5:
+        return _from_geoms(MultiLineString, parts), ids, offset
+    return _from_geoms(MultiPolygon, parts), ids, offset
+
+
+def _read_twkb_ids(metadata, count, data, offset):
+    if not metadata & 4:
+        return None, offset
+    ids = []
+    for i in range(count):
+        value, offset = _read_varint(data, offset)
+        ids.append(_unzigzag(value))
+    return ids, offset
+
+
+def _empty_geometry(gtype, dims):
+    """ An empty geometry of a WKB/TWKB type, a Point of NaNs """
+    empty = array('d')
+    if gtype == 1:
+        return Point(*[float('nan')] * dims)
+    elif gtype == 2:
+        return LineString._from_flat(empty, dims)
+    elif gtype == 3:
+        return Polygon._from_rings(LinearRing._from_flat(empty, dims))
+    elif gtype == 4:
+        return MultiPoint._from_flat(empty, dims)
+    elif gtype == 5:
+        return _from_geoms(MultiLineString, [])
+    elif gtype == 6:
+        return _from_geoms(MultiPolygon, [])
+    elif gtype == 7:
+        return GeometryCollection([])
+    raise NotImplementedError
+
+
+def from_twkb(twkb, with_ids=False):
+    """
+    Create a geometry from its TWKB (Tiny WKB) representation, as bytes or
+    hex encoded. M values are dropped.
+    With with_ids return a tuple of the geometry and the ids of its parts,
+    None if the TWKB has no id list.
+    """
+    if isinstance(twkb, (bytes, bytearray, memoryview)):
+        data = bytes(twkb)
+    else:
+        data = binascii.unhexlify(twkb.strip())
+    geom, ids, offset = _read_twkb(data, 0)
+    if with_ids:
+        return geom, ids
+    return geom
+
+
 def mapping(ob):
     return ob.__geo_interface__
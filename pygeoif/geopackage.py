@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Stream the features of a GeoPackage with the sqlite3 module.
+
+The geometries are stored in the GeoPackage binary format, a header with
+the srs id and an optional envelope followed by WKB, which is decoded in
+place.  Rows are fetched in batches, a bounding box is pushed down to the
+rtree_<table>_<column> index of the table when it exists::
+
+    >>> from pygeoif import geopackage
+    >>> with geopackage.GeoPackageReader('countries.gpkg') as reader:
+    ...     for feature in reader.features('countries', bbox=(0, 40, 20, 60)):
+    ...         pass
+"""
+import os
+import sqlite3
+import struct
+from urllib.request import pathname2url
+
+from . import geometry
+
+#: default number of rows fetched at once
+BATCH_SIZE = 1000
+
+_envelope_sizes = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+
+def _quote(name):
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def _header(blob):
+    """ Return the offset of the WKB in a GeoPackage geometry blob and the
+    envelope (minx, miny, maxx, maxy) of the header, or None """
+    if blob[:2] != b'GP':
+        raise ValueError('Not a GeoPackage geometry')
+    flags = bytearray(blob[3:4])[0]
+    if flags & 0x20:
+        raise ValueError('Extended GeoPackage geometries are not supported')
+    try:
+        size = _envelope_sizes[(flags >> 1) & 7]
+    except KeyError:
+        raise ValueError('Invalid envelope in the GeoPackage header')
+    envelope = None
+    if size:
+        minx, maxx, miny, maxy = struct.unpack_from(
+            '<4d' if flags & 1 else '>4d', blob, 8)
+        envelope = (minx, miny, maxx, maxy)
+    return 8 + size, envelope
+
+
+def from_gpkg(blob):
+    """ Create a geometry from a GeoPackage geometry blob """
+    offset, envelope = _header(blob)
+    return geometry._read_wkb(blob, offset)[0]
+
+
+def _intersects(blob, offset, envelope, bbox):
+    if envelope is None:
+        bounds = []
+        geometry._wkb_bounds(blob, offset, bounds)
+        if not bounds:
+            return False
+        envelope = bounds
+    return not (envelope[0] > bbox[2] or envelope[1] > bbox[3] or
+                envelope[2] < bbox[0] or envelope[3] < bbox[1])
+
+
+class GeoPackageReader(object):
+    """
+    Read the feature tables of a GeoPackage.
+
+    The file is opened read only, features are created as rows are
+    fetched.
+    """
+
+    def __init__(self, path):
+        # quote ?, # and % which have a meaning in the URI
+        self._connection = sqlite3.connect(
+            'file:{0}?mode=ro'.format(pathname2url(os.path.abspath(path))),
+            uri=True)
+        try:
+            self._connection.execute('SELECT 1 FROM gpkg_geometry_columns')
+        except sqlite3.DatabaseError:
+            self.close()
+            raise ValueError('{0} is not a GeoPackage'.format(path))
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def tables(self):
+        """ The names of the feature tables """
+        return [row[0] for row in self._connection.execute(
+            'SELECT table_name FROM gpkg_geometry_columns '
+            'ORDER BY table_name')]
+
+    def _geometry_column(self, table):
+        row = self._connection.execute(
+            'SELECT column_name, srs_id FROM gpkg_geometry_columns '
+            'WHERE table_name = ?', (table, )).fetchone()
+        if row is None:
+            raise ValueError('{0} is not a feature table'.format(table))
+        return row
+
+    def srs_id(self, table):
+        """ The spatial reference system id of a feature table """
+        return self._geometry_column(table)[1]
+
+    def _primary_key(self, table):
+        for row in self._connection.execute(
+                'PRAGMA table_info({0})'.format(_quote(table))):
+            if row[5]:
+                return row[1]
+
+    def _rtree(self, table, column):
+        name = 'rtree_{0}_{1}'.format(table, column)
+        row = self._connection.execute(
+            "SELECT name FROM sqlite_master WHERE name = ?",
+            (name, )).fetchone()
+        return name if row else None
+
+    def features(self, table=None, bbox=None, batch_size=BATCH_SIZE):
+        """
+        Iterate over the features of a table, the only feature table when
+        table is None.  With a bbox (minx, miny, maxx, maxy) only over the
+        features whose envelope intersects it.  All other columns become
+        properties.
+        """
+        if table is None:
+            tables = self.tables()
+            if len(tables) != 1:
+                raise ValueError('Choose one of the tables {0}'.format(
+                    ', '.join(tables)))
+            table = tables[0]
+        column = self._geometry_column(table)[0]
+        sql = 'SELECT * FROM {0}'.format(_quote(table))
+        parameters = ()
+        if bbox is not None:
+            rtree = self._rtree(table, column)
+            key = self._primary_key(table)
+            if rtree and key:
+                sql += (' WHERE {0} IN (SELECT id FROM {1} WHERE minx <= ? '
+                        'AND maxx >= ? AND miny <= ? AND maxy >= ?)').format(
+                            _quote(key), _quote(rtree))
+                parameters = (bbox[2], bbox[0], bbox[3], bbox[1])
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(sql, parameters)
+            names = [description[0] for description in cursor.description]
+            position = names.index(column)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    blob = row[position]
+                    geom = None
+                    if blob is not None:
+                        offset, envelope = _header(blob)
+                        if bbox is not None and not _intersects(
+                                blob, offset, envelope, bbox):
+                            continue
+                        geom = geometry._read_wkb(blob, offset)[0]
+                    elif bbox is not None:
+                        continue
+                    properties = dict(zip(names, row))
+                    del properties[column]
+                    yield geometry.Feature(geom, properties)
+        finally:
+            cursor.close()
+
+
+def iter_features(path, table=None, bbox=None, batch_size=BATCH_SIZE):
+    """ Iterate over the features of a table of a GeoPackage file, with a
+    bbox only over those that intersect it """
+    with GeoPackageReader(path) as reader:
+        for feature in reader.features(table, bbox, batch_size):
+            yield feature
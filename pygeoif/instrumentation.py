@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Opt-in counters and timers for the hot paths of pygeoif.
+
+``enable()`` replaces from_wkt, from_wkb, as_shape, the constructors,
+to_wkt and __geo_interface__ with wrappers that count and time every
+call, keyed by the entry point, the geometry type and a vertex count
+bucket (0, 1, 10, 100, ... the power of ten below the vertex count).
+``disable()`` puts the original functions back, also in pygeoif modules
+first imported while enabled, so there is no overhead at all while
+instrumentation is disabled, which is the default.  A wrapper that is
+still referenced elsewhere calls straight through once disabled.
+
+Nested calls are recorded separately, from_wkt of a polygon also records
+the constructors of its rings. Calls in other processes are not recorded.
+
+    >>> from pygeoif import geometry, instrumentation
+    >>> instrumentation.add_hook(lambda name, gtype, vertices, seconds: None)
+    >>> with instrumentation.instrumented():
+    ...     line = geometry.from_wkt('LINESTRING (0 0, 1 1)')
+    >>> count, seconds = instrumentation.stats()[
+    ...     ('from_wkt', 'LineString', 1)]
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from . import geometry
+
+_lock = threading.Lock()
+_stats = {}
+_hooks = []
+_patched = []
+_wrappers = {}
+
+_functions = ('from_wkt', 'from_wkb', 'as_shape')
+_classes = (geometry.Point, geometry.LineString, geometry.LinearRing,
+            geometry.Polygon, geometry.MultiPoint, geometry.MultiLineString,
+            geometry.MultiPolygon, geometry.GeometryCollection,
+            geometry.Feature, geometry.FeatureCollection)
+
+
+def vertex_count(obj):
+    """ Return the number of vertices of a geometry, feature or
+    collection """
+    if isinstance(obj, geometry._CoordinateStorage):
+        return len(obj._coords) // obj._dims
+    elif isinstance(obj, geometry.Point):
+        return 1
+    elif isinstance(obj, geometry.Polygon):
+        if obj._exterior is None:
+            return 0
+        return sum(vertex_count(ring)
+                   for ring in [obj._exterior] + list(obj._interiors or []))
+    elif isinstance(obj, geometry.Feature):
+        return vertex_count(obj._geometry)
+    elif isinstance(obj, geometry.FeatureCollection):
+        return sum(vertex_count(feature) for feature in obj._features)
+    elif getattr(obj, '_geoms', None) is not None:
+        return sum(vertex_count(geom) for geom in obj._geoms)
+    return 0
+
+
+def _bucket(vertices):
+    bucket = 1
+    if vertices < 1:
+        return 0
+    while bucket * 10 <= vertices:
+        bucket *= 10
+    return bucket
+
+
+def _record(name, obj, seconds):
+    geom_type = getattr(obj, '_type', None)
+    vertices = vertex_count(obj)
+    key = (name, geom_type, _bucket(vertices))
+    with _lock:
+        count, total = _stats.get(key, (0, 0.0))
+        _stats[key] = (count + 1, total + seconds)
+    for hook in list(_hooks):
+        hook(name, geom_type, vertices, seconds)
+
+
+def _wrap_function(name, func):
+    def wrapper(*args, **kwargs):
+        if not _patched:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        _record(name, result, time.perf_counter() - start)
+        return result
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _wrap_method(name, func):
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(self, *args, **kwargs)
+        _record(name, self, time.perf_counter() - start)
+        return result
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _patch(owner, name, replacement):
+    _patched.append((owner, name, getattr(owner, name)))
+    setattr(owner, name, replacement)
+
+
+def _pygeoif_modules():
+    for module_name, module in list(sys.modules.items()):
+        if module is not None and (module_name == 'pygeoif' or
+                                   module_name.startswith('pygeoif.')):
+            yield module
+
+
+def _patch_function(name):
+    """ Replace the function in every pygeoif module that imported it """
+    original = getattr(geometry, name)
+    wrapped = _wrap_function(name, original)
+    _wrappers[wrapped] = original
+    for module in _pygeoif_modules():
+        for attr, value in list(vars(module).items()):
+            if value is original:
+                _patch(module, attr, wrapped)
+
+
+def enable():
+    """ Start counting and timing calls """
+    if _patched:
+        return
+    for name in _functions:
+        _patch_function(name)
+    for cls in _classes:
+        members = vars(cls)
+        if '__init__' in members:
+            _patch(cls, '__init__', _wrap_method(
+                cls.__name__ + '.__init__', members['__init__']))
+        if 'to_wkt' in members:
+            _patch(cls, 'to_wkt', _wrap_method('to_wkt', members['to_wkt']))
+        if '__geo_interface__' in members:
+            prop = members['__geo_interface__']
+            _patch(cls, '__geo_interface__', property(
+                _wrap_method('__geo_interface__', prop.fget)))
+
+
+def disable():
+    """ Restore the original functions """
+    while _patched:
+        owner, name, original = _patched.pop()
+        setattr(owner, name, original)
+    # modules imported while enabled picked up the wrappers
+    for module in _pygeoif_modules():
+        for attr, value in list(vars(module).items()):
+            original = _wrappers.get(value) if callable(value) else None
+            if original is not None:
+                setattr(module, attr, original)
+    _wrappers.clear()
+
+
+def is_enabled():
+    return bool(_patched)
+
+
+@contextmanager
+def instrumented():
+    """ Enable instrumentation for a block of code """
+    enabled = is_enabled()
+    enable()
+    try:
+        yield
+    finally:
+        if not enabled:
+            disable()
+
+
+def stats():
+    """ Return a dictionary of (count, seconds) for each
+    (entry point, geometry type, vertex bucket) """
+    with _lock:
+        return dict(_stats)
+
+
+def point_allocations():
+    """ Return the number of Points constructed while enabled """
+    with _lock:
+        return sum(count for (name, gtype, bucket), (count, seconds)
+                   in _stats.items() if name == 'Point.__init__')
+
+
+def reset():
+    """ Clear the statistics """
+    with _lock:
+        _stats.clear()
+
+
+def add_hook(hook):
+    """ Call hook(name, geom_type, vertices, seconds) after each
+    instrumented call, e.g. to forward it to a metrics system """
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
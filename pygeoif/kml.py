@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Read the Placemarks of KML files as Features.
+
+The file is parsed incrementally with ElementTree.iterparse, a Placemark is
+turned into a Feature when its end tag is read and then removed from the
+tree, so the memory used does not grow with the size of the file::
+
+    >>> from pygeoif import kml
+    >>> for feature in kml.iter_features('export.kml'):
+    ...     print(feature.properties['name'], feature.geometry.geom_type)
+
+The text of <coordinates> is split into a flat array of doubles in one
+pass when all tuples have the same number of values.
+"""
+import re
+import zipfile
+from array import array
+from xml.etree import ElementTree
+
+from . import geometry
+
+_containers = frozenset(['kml', 'Document', 'Folder'])
+_comma = re.compile(r'\s*,\s*')
+_geometries = frozenset(['Point', 'LineString', 'LinearRing', 'Polygon',
+                         'MultiGeometry'])
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_coordinates(text):
+    """
+    Split the text of a KML <coordinates> element, tuples of lon,lat[,alt]
+    separated by whitespace, into a flat array of doubles.
+    Return the array and the number of values per tuple, 2 or 3.
+    """
+    tuples = text.split()
+    if not tuples:
+        return array('d'), 2
+    dims = 3 if tuples[0].count(',') >= 2 else 2
+    flat = array('d', map(float, text.replace(',', ' ').split()))
+    if len(flat) == len(tuples) * dims:
+        return flat, dims
+    # tuples of different lengths or with whitespace around the commas
+    tuples = [t.split(',') for t in _comma.sub(',', text).split()]
+    dims = 3 if len(tuples[0]) >= 3 else 2
+    flat = array('d')
+    for values in tuples:
+        values = [float(v) for v in values[:dims]]
+        flat.extend(values + [0.0] * (dims - len(values)))
+    return flat, dims
+
+
+def _child(element, name):
+    for child in element:
+        if _local(child.tag) == name:
+            return child
+
+
+def _coordinates(element):
+    child = _child(element, 'coordinates')
+    if child is None or not child.text:
+        return array('d'), 2
+    return parse_coordinates(child.text)
+
+
+def _rings(element, name):
+    rings = []
+    for boundary in element:
+        if _local(boundary.tag) == name:
+            for ring in boundary:
+                if _local(ring.tag) == 'LinearRing':
+                    flat, dims = _coordinates(ring)
+                    rings.append(geometry.LinearRing._from_flat(flat, dims))
+    return rings
+
+
+def _geometry(element):
+    """ Create the geometry of a KML geometry element, None for elements
+    that are not supported (Model, gx:Track) """
+    name = _local(element.tag)
+    if name == 'Point':
+        flat, dims = _coordinates(element)
+        if not flat:
+            return geometry._empty_geometry(1, 2)
+        return geometry.Point(*flat[:dims])
+    elif name == 'LineString':
+        return geometry.LineString._from_flat(*_coordinates(element))
+    elif name == 'LinearRing':
+        return geometry.LinearRing._from_flat(*_coordinates(element))
+    elif name == 'Polygon':
+        exterior = _rings(element, 'outerBoundaryIs')
+        if not exterior:
+            return geometry._empty_geometry(3, 2)
+        return geometry.Polygon._from_rings(
+            exterior[0], _rings(element, 'innerBoundaryIs'))
+    elif name == 'MultiGeometry':
+        parts = []
+        for child in element:
+            part = _geometry(child)
+            if part is None:
+                continue
+            elif part._type in ('MultiPoint', 'MultiLineString',
+                                'MultiPolygon', 'GeometryCollection'):
+                parts.extend(part.geoms)
+            else:
+                parts.append(part)
+        return _multi(parts)
+    return None
+
+
+def _multi(parts):
+    types = set(part._type for part in parts)
+    if types == set(['Point']):
+        return geometry.MultiPoint(parts)
+    elif types and types <= set(['LineString', 'LinearRing']):
+        return geometry._from_geoms(geometry.MultiLineString, parts)
+    elif types == set(['Polygon']):
+        return geometry._from_geoms(geometry.MultiPolygon, parts)
+    return geometry.GeometryCollection(parts)
+
+
+def _placemark(element):
+    """ Create a Feature from a Placemark element """
+    geom = None
+    properties = {}
+    for child in element:
+        name = _local(child.tag)
+        if name in _geometries:
+            geom = _geometry(child)
+        elif name in ('name', 'description'):
+            properties[name] = child.text
+        elif name == 'ExtendedData':
+            for data in child.iter():
+                kind = _local(data.tag)
+                if kind == 'Data':
+                    value = _child(data, 'value')
+                    properties[data.get('name')] = (
+                        value.text if value is not None else None)
+                elif kind == 'SimpleData':
+                    properties[data.get('name')] = data.text
+    return geometry.Feature(geom, properties)
+
+
+def from_kml(text):
+    """ Create a geometry from a KML geometry element like
+    <Point><coordinates>1,2</coordinates></Point> """
+    return _geometry(ElementTree.fromstring(text))
+
+
+def _open(source):
+    """ Open a path to a .kml or .kmz file, file objects are used as is """
+    if not isinstance(source, str):
+        return source, False
+    if zipfile.is_zipfile(source):
+        archive = zipfile.ZipFile(source)
+        names = [n for n in archive.namelist() if n.lower().endswith('.kml')]
+        if not names:
+            archive.close()
+            raise ValueError('{0} contains no KML file'.format(source))
+        name = 'doc.kml' if 'doc.kml' in names else names[0]
+        f = archive.open(name)
+        archive.close()
+        return f, True
+    return open(source, 'rb'), True
+
+
+def iter_features(source):
+    """
+    Iterate over the Placemarks of a KML file, a path to a .kml or .kmz
+    file or a file object, as Features.  Their properties are the name,
+    the description and the values of the ExtendedData.
+    Elements are removed from the tree when they have been read.
+    """
+    f, close = _open(source)
+    try:
+        stack = []
+        for event, element in ElementTree.iterparse(f, ('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                continue
+            stack.pop()
+            name = _local(element.tag)
+            if name == 'Placemark':
+                yield _placemark(element)
+            if stack and _local(stack[-1].tag) in _containers and \
+                    name not in _containers:
+                stack[-1].remove(element)
+    finally:
+        if close:
+            f.close()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Load files with one WKT or hex encoded WKB geometry per line in parallel.
+
+The file is memory mapped and split into chunks that end at a newline.
+Only the byte offsets of a chunk are sent to a worker process, which maps
+the file itself and parses its lines. The geometries of a chunk are sent
+back together, their coordinates are pickled as arrays of doubles.
+
+CSV files with a WKT or hex WKB column or with x and y columns are read
+as Features with read_csv_features, or into a columnar FeatureCollection
+with load_csv_features.  Compressed files are detected by their magic
+bytes.
+"""
+import bz2
+import csv
+import gzip
+import io
+import mmap
+import multiprocessing
+from itertools import islice
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from .geometry import Feature, FeatureCollection, FeatureColumns, Point
+from .geometry import from_wkb, from_wkt
+
+#: default size of a chunk in bytes
+CHUNK_SIZE = 1 << 22
+
+
+def _parse_line(line):
+    """ Create a geometry from a line of WKT or hex encoded WKB.
+    WKT always starts with a letter, hex WKB with the byte order 00 or 01.
+    """
+    if line[:1] in ('0', '1'):
+        return from_wkb(line)
+    return from_wkt(line)
+
+
+def _chunk_offsets(path, chunk_size=CHUNK_SIZE):
+    """ Return a list of (start, end) byte offsets that split the file
+    into chunks of about chunk_size bytes, each ending after a newline """
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        if size == 0:
+            return []
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            offsets = []
+            start = 0
+            while start < size:
+                end = mm.find(b'\n',
+                              max(start, min(start + chunk_size, size) - 1))
+                end = size if end == -1 else end + 1
+                offsets.append((start, end))
+                start = end
+            return offsets
+        finally:
+            mm.close()
+
+
+def _parse_chunk(args):
+    """ Parse the lines between the start and end offset of a file,
+    empty lines are skipped. """
+    path, start, end = args
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            text = mm[start:end].decode('ascii')
+        finally:
+            mm.close()
+    geometries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            geometries.append(_parse_line(line))
+    return geometries
+
+
+def iter_chunks(path, processes=None, chunk_size=CHUNK_SIZE, ordered=True):
+    """ Yield the list of geometries of each chunk of the file.
+
+    The chunks are parsed in a pool of processes (one per cpu if
+    processes is None), with processes=1 they are parsed in this process.
+    With ordered=False chunks are yielded as soon as they are parsed.
+    """
+    tasks = [(path, start, end)
+             for start, end in _chunk_offsets(path, chunk_size)]
+    if processes == 1 or len(tasks) < 2:
+        for task in tasks:
+            yield _parse_chunk(task)
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        if ordered:
+            results = pool.imap(_parse_chunk, tasks)
+        else:
+            results = pool.imap_unordered(_parse_chunk, tasks)
+        for geometries in results:
+            yield geometries
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def iter_geometries(path, processes=None, chunk_size=CHUNK_SIZE):
+    """ Stream the geometries of a file in the order of its lines """
+    for geometries in iter_chunks(path, processes, chunk_size):
+        for geometry in geometries:
+            yield geometry
+
+
+def load_geometries(path, processes=None, chunk_size=CHUNK_SIZE):
+    """ Return a list of the geometries of a file in the order of its lines
+    """
+    geometries = []
+    for chunk in iter_chunks(path, processes, chunk_size):
+        geometries.extend(chunk)
+    return geometries
+
+
+_compressions = [(b'\x1f\x8b', gzip.open), (b'BZh', bz2.open)]
+if lzma is not None:
+    _compressions.append((b'\xfd7zXZ\x00', lzma.open))
+
+
+def _open_text(path, encoding):
+    """ Open a text file that may be gzip, bzip2 or xz compressed """
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+    for prefix, opener in _compressions:
+        if magic.startswith(prefix):
+            return opener(path, 'rt', encoding=encoding, newline='')
+    return io.open(path, 'r', encoding=encoding, newline='')
+
+
+def _csv_rows(path, geometry_column, x, y, z, encoding, types, fmtparams):
+    """ Yield the names of the property columns, then the geometry and the
+    list of property values of each row that has a geometry """
+    with _open_text(path, encoding) as f:
+        reader = csv.reader(f, **fmtparams)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        def index(name):
+            try:
+                return header.index(name)
+            except ValueError:
+                raise ValueError('{0} has no column {1}'.format(path, name))
+
+        if geometry_column is not None and x is None and y is None:
+            used = [index(geometry_column)]
+        elif geometry_column is None and x is not None and y is not None:
+            used = [index(x), index(y)] + ([index(z)] if z else [])
+        else:
+            raise ValueError('Give either a geometry_column or x and y')
+        keep = [i for i in range(len(header)) if i not in used]
+        names = [header[i] for i in keep]
+        converters = [(k, types[name]) for k, name in enumerate(names)
+                      if name in (types or {})]
+        width = len(header)
+        yield names
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                row.extend([''] * (width - len(row)))
+            if geometry_column is not None:
+                value = row[used[0]].strip()
+                if not value:
+                    continue
+                geom = _parse_line(value)
+            else:
+                coords = [row[i].strip() for i in used]
+                if not all(coords):
+                    continue
+                geom = Point(*map(float, coords))
+            values = [row[i] for i in keep]
+            for k, convert in converters:
+                values[k] = convert(values[k]) if values[k] else None
+            yield geom, values
+
+
+def read_csv_features(path, geometry_column=None, x=None, y=None, z=None,
+                      encoding='utf-8', types=None, **fmtparams):
+    """
+    Stream the rows of a CSV file, plain or gzip, bzip2 or xz compressed,
+    as Features.
+
+    The geometry is parsed from the WKT or hex encoded WKB in
+    geometry_column, or built as a Point from the x, y (and z) columns.
+    Rows with an empty geometry column, or an empty x or y, are skipped.
+    The other columns are the properties, their values are strings unless
+    types maps the column name to a function like int or float.  Empty
+    values are None.  fmtparams are passed to csv.reader.
+    """
+    rows = _csv_rows(path, geometry_column, x, y, z, encoding, types,
+                     fmtparams)
+    names = next(rows, None)
+    for geom, values in rows:
+        yield Feature(geom, dict(zip(names, values)))
+
+
+def load_csv_features(path, geometry_column=None, x=None, y=None, z=None,
+                      encoding='utf-8', types=None, chunk_size=10000,
+                      **fmtparams):
+    """
+    Load a CSV file into a columnar FeatureCollection, see
+    read_csv_features.  The columns are filled chunk_size rows at a time
+    without creating Features.
+    """
+    rows = _csv_rows(path, geometry_column, x, y, z, encoding, types,
+                     fmtparams)
+    names = next(rows, [])
+    geometries = []
+    columns = [[] for name in names]
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        geoms, values = zip(*chunk)
+        geometries.extend(geoms)
+        for column, chunk_values in zip(columns, zip(*values)):
+            column.extend(chunk_values)
+    return FeatureCollection(FeatureColumns(geometries,
+                                            dict(zip(names, columns))))
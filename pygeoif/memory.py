@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Memory accounting for geometries, features and feature collections.
+
+``sys.getsizeof`` only reports the size of the outer object, not of the
+coordinate arrays, rings, Points and dictionaries it refers to.
+``deep_sizeof`` follows all references and counts every object once,
+``memory_report`` breaks the bytes of a feature collection down by
+geometry type and by what they are spent on.
+
+    >>> from pygeoif import memory
+    >>> report = memory.memory_report(collection)
+    >>> report['Polygon']['coordinates']
+    1208320
+    >>> report['total']['bytes'] == memory.deep_sizeof(collection)
+    True
+"""
+import sys
+import types
+
+from . import geometry
+
+CATEGORIES = ('coordinates', 'points', 'rings', 'geometries',
+              'properties', 'features')
+
+_atomic = (type, types.ModuleType, types.FunctionType,
+           types.BuiltinFunctionType, types.MethodType, bool, type(None))
+
+
+def _deep_sizeof(obj, seen):
+    """ Return the size of obj and everything it refers to, skipping
+    the objects in seen """
+    if isinstance(obj, _atomic) or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_sizeof(key, seen) + _deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_sizeof(item, seen)
+    elif isinstance(obj, memoryview):
+        # the view is small, the buffer it exposes is not
+        size += _deep_sizeof(obj.obj, seen)
+    elif isinstance(obj, (str, bytes, bytearray, int, float)):
+        pass
+    else:
+        if hasattr(obj, '__dict__'):
+            size += _attributes_sizeof(obj, seen, ())
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(obj, name):
+                    size += _deep_sizeof(getattr(obj, name), seen)
+    return size
+
+
+def deep_sizeof(obj):
+    """ Return the number of bytes held by obj and all objects reachable
+    from it. Shared objects, like coordinate buffers shared between views,
+    are counted once """
+    return _deep_sizeof(obj, set())
+
+
+def _attributes_sizeof(obj, seen, skip):
+    """ Size of the instance dictionary of obj and its values, except
+    those in skip.  The attribute names are interned and shared by all
+    instances, they are not counted """
+    attributes = obj.__dict__
+    if id(attributes) in seen:
+        return 0
+    seen.add(id(attributes))
+    size = sys.getsizeof(attributes)
+    for key, value in attributes.items():
+        if key not in skip:
+            size += _deep_sizeof(value, seen)
+    return size
+
+
+def _wrapper_sizeof(obj, seen, skip):
+    """ Size of an object and its attributes, except those in skip """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    return sys.getsizeof(obj) + _attributes_sizeof(obj, seen, skip)
+
+
+def _account_geometry(geom, seen, sizes):
+    if isinstance(geom, geometry.Point):
+        sizes['points'] += _wrapper_sizeof(geom, seen, ('_coordinates',))
+        sizes['coordinates'] += _deep_sizeof(geom._coordinates, seen)
+    elif isinstance(geom, geometry._CoordinateStorage):
+        category = ('rings' if isinstance(geom, geometry.LinearRing)
+                    else 'geometries')
+        sizes[category] += _wrapper_sizeof(geom, seen, ('_coords',))
+        sizes['coordinates'] += _deep_sizeof(geom._coords, seen)
+    elif isinstance(geom, geometry.Polygon):
+        sizes['geometries'] += _wrapper_sizeof(
+            geom, seen, ('_exterior', '_interiors'))
+        if geom._interiors is not None and id(geom._interiors) not in seen:
+            seen.add(id(geom._interiors))
+            sizes['rings'] += sys.getsizeof(geom._interiors)
+        if geom._exterior is not None:
+            _account_geometry(geom._exterior, seen, sizes)
+        for ring in geom._interiors or ():
+            _account_geometry(ring, seen, sizes)
+    elif getattr(geom, '_geoms', None) is not None:
+        sizes['geometries'] += _wrapper_sizeof(geom, seen, ('_geoms',))
+        if id(geom._geoms) not in seen:
+            seen.add(id(geom._geoms))
+            sizes['geometries'] += sys.getsizeof(geom._geoms)
+        for part in geom._geoms:
+            _account_geometry(part, seen, sizes)
+    else:
+        sizes['geometries'] += _deep_sizeof(geom, seen)
+
+
+def _new_entry():
+    entry = dict.fromkeys(CATEGORIES, 0)
+    entry['count'] = 0
+    return entry
+
+
+def memory_report(collection):
+    """ Break down the bytes held by a feature collection.
+
+    collection can be a FeatureCollection, a Feature, a geometry or an
+    iterable of features and geometries.  The result maps the geometry
+    type of each feature to a dictionary with the number of features
+    ('count') and the bytes spent on 'coordinates' (coordinate storage),
+    'points' (Point objects), 'rings' (LinearRings and hole lists),
+    'geometries' (the other geometry objects and their part lists),
+    'properties' (property dictionaries) and 'features' (Feature objects).
+    The properties of a columnar FeatureCollection are only counted in
+    the 'total' entry.
+    The 'total' entry sums all types, plus the collection itself, and
+    also has the overall number of 'bytes' which equals
+    ``deep_sizeof(collection)``.  The container is part of the total in
+    its 'features' bytes: for a list of geometries that is
+    ``sys.getsizeof`` of the list more than the ``deep_sizeof`` of the
+    geometries.
+    """
+    seen = set()
+    report = {}
+    total = _new_entry()
+    if isinstance(collection, geometry.FeatureCollection):
+        total['features'] += _wrapper_sizeof(collection, seen,
+                                             ('_features',))
+        items = collection._features
+        if isinstance(items, geometry.FeatureColumns):
+            # columnar properties cannot be attributed to a geometry type
+            total['features'] += _wrapper_sizeof(
+                items, seen, ('_geometries', '_columns'))
+            total['properties'] += _deep_sizeof(items._columns, seen)
+            items = items._geometries
+        seen.add(id(items))
+        total['features'] += sys.getsizeof(items)
+    elif isinstance(collection, geometry._GeoObject):
+        items = [collection]
+    else:
+        items = collection
+        if isinstance(items, (list, tuple)):
+            seen.add(id(items))
+            total['features'] += sys.getsizeof(items)
+    for item in items:
+        sizes = _new_entry()
+        if isinstance(item, geometry.Feature):
+            geom = item._geometry
+            sizes['features'] += _wrapper_sizeof(
+                item, seen, ('_geometry', '_properties'))
+            sizes['properties'] += _deep_sizeof(item._properties, seen)
+        else:
+            geom = item
+        if geom is not None:
+            _account_geometry(geom, seen, sizes)
+        entry = report.setdefault(getattr(geom, '_type', None), _new_entry())
+        sizes['count'] = 1
+        for key, value in sizes.items():
+            entry[key] += value
+            total[key] += value
+    total['bytes'] = sum(total[category] for category in CATEGORIES)
+    report['total'] = total
+    return report
@@ -0,0 +1,629 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Read and write ESRI shapefiles.
+
+The .shp file is memory mapped and its records are decoded straight into
+coordinate arrays, the offsets in the .shx file give random access to a
+record.  The attributes of a record are read from the .dbf file when the
+feature is created::
+
+    >>> from pygeoif import shapefile
+    >>> with shapefile.ShapefileReader('countries.shp') as reader:
+    ...     feature = reader[10]
+    ...     for feature in reader.features(bbox=(0, 40, 20, 60)):
+    ...         pass
+
+Polygon rings are clockwise and holes counterclockwise, holes are assigned
+to the exterior ring that contains them.
+"""
+import datetime
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from . import geometry
+
+_shape_names = {0: None, 1: 'Point', 3: 'PolyLine', 5: 'Polygon',
+                8: 'MultiPoint'}
+_shape_types = {'Point': 1, 'LineString': 3, 'LinearRing': 3,
+                'MultiLineString': 3, 'Polygon': 5, 'MultiPolygon': 5,
+                'MultiPoint': 8}
+# the shape types that can be read, with Z (1x) and with M (2x), not
+# MultiPatch (31)
+_supported = frozenset(kind + offset for kind in _shape_names if kind
+                       for offset in (0, 10, 20)) | frozenset([0])
+
+#: M values smaller than -10 ** 38 mean no data
+NO_DATA = -1e39
+
+_record_header = struct.Struct('>2i')
+_shx_record = struct.Struct('>2i')
+_shape_type = struct.Struct('<i')
+_box = struct.Struct('<4d')
+_parts_header = struct.Struct('<4d2i')
+
+
+def _kind(shape_type):
+    """ The shape type without Z or M, a ValueError for MultiPatch and
+    unknown types """
+    if shape_type not in _supported:
+        raise ValueError('Unsupported shape type {0}'.format(shape_type))
+    return shape_type % 10
+
+
+def _doubles(buf, start, count):
+    values = array('d')
+    values.frombytes(buf[start:start + 8 * count])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def _le_bytes(values, typecode='d'):
+    values = array(typecode, values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _polygons(rings, dims):
+    """ Group the rings of a shapefile polygon into Polygons, clockwise
+    rings are exteriors, the others holes of the exterior that contains
+    them """
+    exteriors = []
+    holes = []
+    for flat in rings:
+        if geometry._flat_signed_area(flat, dims) <= 0:
+            exteriors.append((geometry.LinearRing._from_flat(flat, dims), []))
+        else:
+            holes.append(geometry.LinearRing._from_flat(flat, dims))
+    if not exteriors:
+        exteriors, holes = [(hole, []) for hole in holes], []
+    for hole in holes:
+        owner = exteriors[0] if len(exteriors) == 1 else None
+        if owner is None:
+            point = hole._coords[0], hole._coords[1]
+            for exterior in exteriors:
+                bounds = exterior[0].bounds
+                if (bounds[0] <= point[0] <= bounds[2] and
+                        bounds[1] <= point[1] <= bounds[3] and
+                        geometry._point_in_ring(
+                            point, exterior[0].coords) >= 0):
+                    owner = exterior
+                    break
+        if owner is None:
+            exteriors.append((hole, []))
+        else:
+            owner[1].append(hole)
+    polygons = [geometry.Polygon._from_rings(exterior, interiors)
+                for exterior, interiors in exteriors]
+    if len(polygons) == 1:
+        return polygons[0]
+    return geometry._from_geoms(geometry.MultiPolygon, polygons)
+
+
+def _dbf_value(raw, field_type, decimals, encoding):
+    if field_type in 'NF':
+        raw = raw.strip()
+        if not raw or raw[:1] == b'*':
+            return None
+        if decimals or b'.' in raw or b'e' in raw.lower():
+            return float(raw)
+        return int(raw)
+    elif field_type == 'L':
+        raw = raw.strip().upper()
+        if raw and raw in b'YT':
+            return True
+        elif raw and raw in b'NF':
+            return False
+        return None
+    elif field_type == 'D':
+        raw = raw.strip()
+        if len(raw) != 8 or not raw.isdigit():
+            return None
+        return datetime.date(int(raw[:4]), int(raw[4:6]), int(raw[6:]))
+    return raw.decode(encoding, 'replace').rstrip(' \0')
+
+
+def _map(path):
+    f = open(path, 'rb')
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        f.close()
+        raise ValueError('{0} is empty'.format(path))
+    return f, mm
+
+
+def _encoding(base, encoding):
+    if encoding is not None:
+        return encoding
+    if os.path.exists(base + '.cpg'):
+        with open(base + '.cpg') as f:
+            encoding = f.read().strip()
+        if encoding.isdigit():
+            encoding = 'cp' + encoding
+        return encoding or 'latin-1'
+    return 'latin-1'
+
+
+class ShapefileReader(object):
+    """
+    Read a shapefile, the path of the .shp file with or without the
+    extension.
+
+    Features are decoded when they are accessed by position or iterated.
+    Without a .dbf file the properties are empty, without a .shx file
+    random access walks the records once.  The encoding of the .dbf is
+    read from the .cpg file, latin-1 if there is none.
+    """
+
+    def __init__(self, path, encoding=None):
+        base = os.path.splitext(path)[0] if path.lower().endswith(
+            ('.shp', '.shx', '.dbf')) else path
+        self._files = []
+        self._shp = self._open(base + '.shp')
+        if _record_header.unpack_from(self._shp, 0)[0] != 9994:
+            self.close()
+            raise ValueError('{0}.shp is not a shapefile'.format(base))
+        self._size = min(len(self._shp),
+                         2 * _record_header.unpack_from(self._shp, 24)[0])
+        shape_type = _shape_type.unpack_from(self._shp, 32)[0]
+        if shape_type not in _supported:
+            self.close()
+            raise ValueError('{0}.shp has the unsupported shape type '
+                             '{1}'.format(base, shape_type))
+        self._dims = 3 if shape_type in (11, 13, 15, 18) else 2
+        self.shape_type = _shape_names[shape_type % 10]
+        self.bounds = _box.unpack_from(self._shp, 36)
+        self._shx = None
+        if os.path.exists(base + '.shx'):
+            self._shx = self._open(base + '.shx')
+        self._offsets = None
+        self.fields = []
+        self.encoding = _encoding(base, encoding)
+        self._dbf = None
+        if os.path.exists(base + '.dbf'):
+            self._dbf = self._open(base + '.dbf')
+            self._read_dbf_header()
+
+    def _open(self, path):
+        f, mm = _map(path)
+        self._files.append((f, mm))
+        return mm
+
+    def _read_dbf_header(self):
+        dbf = self._dbf
+        self._records, self._header_size, self._record_size = \
+            struct.unpack_from('<I2H', dbf, 4)
+        self._columns = []
+        offset = 1
+        for position in range(32, self._header_size - 1, 32):
+            if dbf[position:position + 1] == b'\r':
+                break
+            name = dbf[position:position + 11].split(b'\0')[0]
+            field_type = dbf[position + 11:position + 12].decode('ascii')
+            length, decimals = struct.unpack_from('<2B', dbf, position + 16)
+            name = name.decode(self.encoding, 'replace')
+            self.fields.append((name, field_type, length, decimals))
+            self._columns.append((name, field_type, offset, length,
+                                  decimals))
+            offset += length
+
+    def close(self):
+        for f, mm in self._files:
+            mm.close()
+            f.close()
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _record_offsets(self):
+        """ The byte offsets of the records, from the .shx file or by
+        walking the .shp file """
+        if self._offsets is None:
+            if self._shx is not None:
+                count = (len(self._shx) - 100) // 8
+                self._offsets = [
+                    2 * _shx_record.unpack_from(self._shx, 100 + 8 * i)[0]
+                    for i in range(count)]
+            else:
+                self._offsets = []
+                position = 100
+                while position + 8 <= self._size:
+                    self._offsets.append(position)
+                    length = _record_header.unpack_from(
+                        self._shp, position)[1]
+                    position += 8 + 2 * length
+        return self._offsets
+
+    def __len__(self):
+        if self._shx is not None:
+            return (len(self._shx) - 100) // 8
+        return len(self._record_offsets())
+
+    def __getitem__(self, i):
+        count = len(self)
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError('feature index out of range')
+        return geometry.Feature(self._geometry(self._record_offsets()[i]),
+                                self.properties(i))
+
+    def __iter__(self):
+        return self.features()
+
+    def properties(self, i):
+        """ The attributes of record i as a dictionary """
+        if self._dbf is None:
+            return {}
+        start = self._header_size + i * self._record_size
+        row = self._dbf[start:start + self._record_size]
+        encoding = self.encoding
+        return dict(
+            (name, _dbf_value(row[offset:offset + length], field_type,
+                              decimals, encoding))
+            for name, field_type, offset, length, decimals in self._columns)
+
+    def _deleted(self, i):
+        if self._dbf is None:
+            return False
+        start = self._header_size + i * self._record_size
+        return self._dbf[start:start + 1] == b'*'
+
+    def _box(self, position):
+        """ The bounding box of the record at position """
+        start = position + 8
+        shape_type = _shape_type.unpack_from(self._shp, start)[0]
+        if shape_type == 0:
+            return None
+        if _kind(shape_type) == 1:
+            x, y = struct.unpack_from('<2d', self._shp, start + 4)
+            return x, y, x, y
+        return _box.unpack_from(self._shp, start + 4)
+
+    def _geometry(self, position):
+        shp = self._shp
+        start = position + 8
+        shape_type = _shape_type.unpack_from(shp, start)[0]
+        kind = _kind(shape_type)
+        has_z = shape_type // 10 == 1
+        if shape_type == 0:
+            return None
+        elif kind == 1:
+            return geometry.Point(*struct.unpack_from(
+                '<3d' if has_z else '<2d', shp, start + 4))
+        elif kind == 8:
+            count = struct.unpack_from('<i', shp, start + 36)[0]
+            flat = _doubles(shp, start + 40, 2 * count)
+            dims = 2
+            if has_z:
+                z = _doubles(shp, start + 56 + 16 * count, count)
+                flat, dims = geometry._interleave_z(flat, z), 3
+            return geometry.MultiPoint._from_flat(flat, dims)
+        nparts, count = struct.unpack_from('<2i', shp, start + 36)
+        parts = array('i')
+        parts.frombytes(shp[start + 44:start + 44 + 4 * nparts])
+        if sys.byteorder != 'little':
+            parts.byteswap()
+        points = start + 44 + 4 * nparts
+        flat = _doubles(shp, points, 2 * count)
+        dims = 2
+        if has_z:
+            z = _doubles(shp, points + 16 * count + 16, count)
+            flat, dims = geometry._interleave_z(flat, z), 3
+        ends = list(parts[1:]) + [count]
+        rings = [flat[parts[k] * dims:ends[k] * dims] for k in range(nparts)]
+        if kind == 5:
+            return _polygons(rings, dims)
+        lines = [geometry.LineString._from_flat(ring, dims)
+                 for ring in rings]
+        if len(lines) == 1:
+            return lines[0]
+        return geometry._from_geoms(geometry.MultiLineString, lines)
+
+    def features(self, bbox=None):
+        """ Iterate over the features that are not deleted, with a bbox
+        (minx, miny, maxx, maxy) only over those whose bounding box
+        intersects it.  Records outside the bbox are not decoded. """
+        position = 100
+        i = 0
+        while position + 8 <= self._size:
+            length = _record_header.unpack_from(self._shp, position)[1]
+            if not self._deleted(i):
+                box = self._box(position) if bbox is not None else None
+                if bbox is None or box is not None and not (
+                        box[0] > bbox[2] or box[1] > bbox[3] or
+                        box[2] < bbox[0] or box[3] < bbox[1]):
+                    yield geometry.Feature(self._geometry(position),
+                                           self.properties(i))
+            position += 8 + 2 * length
+            i += 1
+
+
+def iter_features(path, bbox=None, encoding=None):
+    """ Iterate over the features of a shapefile, with a bbox only over
+    those that intersect it """
+    with ShapefileReader(path, encoding) as reader:
+        for feature in reader.features(bbox):
+            yield feature
+
+
+def _dims(geom):
+    if geom._type == 'Point':
+        return len(geom._coordinates)
+    elif geom._type == 'Polygon':
+        return geom._exterior._dims if geom._exterior is not None else 2
+    elif hasattr(geom, '_dims'):
+        return geom._dims
+    return max([_dims(part) for part in geom._geoms] + [2])
+
+
+def _shape_type_of(geometries):
+    types = set()
+    has_z = False
+    for geom in geometries:
+        if geom is None:
+            continue
+        try:
+            types.add(_shape_types[geom._type])
+        except KeyError:
+            raise ValueError('{0} can not be stored in a shapefile'.format(
+                geom._type))
+        has_z = has_z or _dims(geom) == 3
+    if len(types) > 1:
+        raise ValueError('A shapefile can only store one shape type')
+    if not types:
+        return 0
+    return types.pop() + (10 if has_z else 0)
+
+
+def _flat(geom, dims):
+    flat = array('d', geom._coords)
+    if geom._dims < dims:
+        flat = geometry._interleave_z(flat, array('d', [0.0]) * (
+            len(flat) // 2))
+    return flat
+
+
+def _parts(geom, dims):
+    """ The flat coordinates of the parts of a line or polygon, exteriors
+    clockwise and holes counterclockwise """
+    if geom._type in ('LineString', 'LinearRing'):
+        return [_flat(geom, dims)]
+    elif geom._type == 'MultiLineString':
+        return [_flat(line, dims) for line in geom._geoms]
+    polygons = [geom] if geom._type == 'Polygon' else geom._geoms
+    parts = []
+    for polygon in polygons:
+        if polygon._exterior is None or not polygon._exterior._coords:
+            continue
+        for k, ring in enumerate([polygon._exterior] +
+                                 list(polygon._interiors or [])):
+            flat = _flat(ring, dims)
+            area = geometry._flat_signed_area(flat, dims)
+            if (area > 0) == (k == 0):
+                flat = geometry._reverse_coordinates(flat, dims)
+            parts.append(flat)
+    return parts
+
+
+def _record(geom, shape_type):
+    """ The content of a record and its bounding box """
+    kind = shape_type % 10
+    has_z = shape_type > 10
+    dims = 3 if has_z else 2
+    if geom is None:
+        return _shape_type.pack(0), None
+    if kind == 1:
+        coords = list(geom._coordinates) + [0.0] * (dims - len(
+            geom._coordinates))
+        # a PointZ record always ends with an M value
+        content = struct.pack('<i{0}d'.format(dims + has_z), shape_type,
+                              *coords + [NO_DATA] * has_z)
+        return content, (coords[0], coords[1], coords[0], coords[1]) + (
+            (coords[2], coords[2]) if has_z else ())
+    if kind == 8:
+        parts = [_flat(geom, dims)]
+    else:
+        parts = _parts(geom, dims)
+    flat = array('d')
+    starts = []
+    for part in parts:
+        starts.append(len(flat) // dims)
+        flat.extend(part)
+    count = len(flat) // dims
+    if not count:
+        return _shape_type.pack(0), None
+    if has_z:
+        xy, z = geometry._split_z(flat)
+    else:
+        xy, z = flat, None
+    box = (min(xy[0::2]), min(xy[1::2]), max(xy[0::2]), max(xy[1::2]))
+    if kind == 8:
+        out = [struct.pack('<i4di', shape_type, box[0], box[1], box[2],
+                           box[3], count)]
+    else:
+        out = [_shape_type.pack(shape_type),
+               _parts_header.pack(box[0], box[1], box[2], box[3],
+                                  len(starts), count),
+               _le_bytes(starts, 'i')]
+    out.append(_le_bytes(xy))
+    if has_z:
+        box += (min(z), max(z))
+        out.append(struct.pack('<2d', box[4], box[5]))
+        out.append(_le_bytes(z))
+    return b''.join(out), box
+
+
+def _dbf_fields(features, encoding):
+    """ The (name, type, length, decimals) of the dbf fields and the
+    property key of each """
+    kinds = {}
+    for feature in features:
+        for key, value in (feature.properties or {}).items():
+            values = kinds.setdefault(key, [])
+            if value is not None:
+                values.append(value)
+    fields = []
+    used = set()
+    for key, values in kinds.items():
+        types = set(type(value) for value in values)
+        name = _field_name(key, encoding, used)
+        if types == set([bool]):
+            fields.append((key, name, 'L', 1, 0))
+        elif types and types <= set([bool, int]):
+            length = max(len(str(int(value))) for value in values)
+            fields.append((key, name, 'N', min(max(length, 1), 18), 0))
+        elif types and types <= set([bool, int, float]):
+            fields.append((key, name, 'N', 24, 15))
+        elif types and all(issubclass(t, datetime.date) for t in types):
+            fields.append((key, name, 'D', 8, 0))
+        else:
+            length = max([len(_text(value).encode(encoding, 'replace'))
+                          for value in values] + [1])
+            fields.append((key, name, 'C', min(length, 254), 0))
+    return fields
+
+
+def _truncate(text, encoding, size):
+    """ text cut to at most size bytes in the encoding, without splitting
+    a character """
+    return text.encode(encoding, 'replace')[:size].decode(encoding,
+                                                          'ignore')
+
+
+def _field_name(key, encoding, used):
+    """ A dbf field name of at most 10 bytes for a property key, names
+    that are not unique after truncation get a number """
+    name = _truncate(key, encoding, 10)
+    number = 0
+    while not name or name.upper() in used:
+        number += 1
+        suffix = '_{0}'.format(number)
+        name = _truncate(key, encoding, 10 - len(suffix)) + suffix
+    used.add(name.upper())
+    return name
+
+
+def _text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def _dbf_value_bytes(value, field_type, length, decimals, encoding):
+    if value is None:
+        return b' ' * length
+    if field_type == 'L':
+        return b'T' if value else b'F'
+    elif field_type == 'D':
+        return value.strftime('%Y%m%d').encode('ascii')
+    elif field_type == 'N':
+        if decimals:
+            text = '{0:{1}.{2}f}'.format(value, length, decimals)
+            if len(text) > length:
+                # too large for the decimals, use the exponent notation
+                text = '{0:{1}.{2}e}'.format(value, length, decimals)
+        else:
+            text = '{0:>{1}d}'.format(int(value), length)
+        if len(text) > length:
+            raise ValueError('{0} does not fit in {1} characters'.format(
+                value, length))
+        return text.encode('ascii')
+    return _truncate(_text(value), encoding, length).encode(
+        encoding, 'replace').ljust(length)
+
+
+def _shp_header(shape_type, length, bounds):
+    return (struct.pack('>7i', 9994, 0, 0, 0, 0, 0, length // 2) +
+            struct.pack('<2i', 1000, shape_type) +
+            struct.pack('<8d', *bounds))
+
+
+def write_features(path, features, encoding='utf-8'):
+    """
+    Write a FeatureCollection or a sequence of Features (or geometries) to
+    the .shp, .shx, .dbf and .cpg files of a shapefile.  All geometries
+    must be points, multipoints, lines or polygons, with or without Z.
+    Property keys are encoded and truncated to 10 bytes, keys that are
+    not unique afterwards end with _1, _2 and so on.  Characters of text
+    properties the encoding cannot represent are written as '?'.
+    """
+    if isinstance(features, geometry.FeatureCollection):
+        features = features.features
+    features = [feature if isinstance(feature, geometry.Feature)
+                else geometry.Feature(feature, {}) for feature in features]
+    base = os.path.splitext(path)[0] if path.lower().endswith(
+        '.shp') else path
+    shape_type = _shape_type_of([f.geometry for f in features])
+    records = []
+    boxes = []
+    for feature in features:
+        content, box = _record(feature.geometry, shape_type)
+        records.append(content)
+        if box:
+            boxes.append(box)
+    bounds = [0.0] * 8
+    if boxes:
+        bounds[:4] = [min(b[0] for b in boxes), min(b[1] for b in boxes),
+                      max(b[2] for b in boxes), max(b[3] for b in boxes)]
+        if shape_type > 10:
+            bounds[4:6] = [min(b[4] for b in boxes), max(b[5] for b in boxes)]
+    length = 100 + sum(8 + len(content) for content in records)
+    with open(base + '.shp', 'wb') as shp:
+        with open(base + '.shx', 'wb') as shx:
+            shp.write(_shp_header(shape_type, length, bounds))
+            shx.write(_shp_header(shape_type, 100 + 8 * len(records),
+                                  bounds))
+            offset = 100
+            for number, content in enumerate(records):
+                shx.write(_shx_record.pack(offset // 2, len(content) // 2))
+                shp.write(_record_header.pack(number + 1, len(content) // 2))
+                shp.write(content)
+                offset += 8 + len(content)
+    fields = _dbf_fields(features, encoding)
+    record_size = 1 + sum(field[3] for field in fields)
+    header_size = 32 + 32 * len(fields) + 1
+    today = datetime.date.today()
+    with open(base + '.dbf', 'wb') as dbf:
+        dbf.write(struct.pack('<4BI2H20x', 3, today.year - 1900,
+                              today.month, today.day, len(features),
+                              header_size, record_size))
+        for key, name, field_type, length, decimals in fields:
+            dbf.write(struct.pack('<11sc4x2B14x',
+                                  name.encode(encoding, 'replace'),
+                                  field_type.encode('ascii'), length,
+                                  decimals))
+        dbf.write(b'\r')
+        for feature in features:
+            properties = feature.properties or {}
+            dbf.write(b' ')
+            for key, name, field_type, length, decimals in fields:
+                dbf.write(_dbf_value_bytes(properties.get(key), field_type,
+                                           length, decimals, encoding))
+        dbf.write(b'\x1a')
+    with open(base + '.cpg', 'w') as cpg:
+        cpg.write(encoding.upper())
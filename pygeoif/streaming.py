@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2012  Christian Ledermann
+#
+#   This library is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+
+#   This library is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+
+#   You should have received a copy of the GNU Lesser General Public License
+#   along with this library; if not, write to the Free Software Foundation,
+#   Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+Read and write newline delimited GeoJSON (GeoJSONSeq, NDJSON) on asyncio
+streams.
+
+Each line holds a Feature or a geometry, RFC 8142 record separators are
+ignored.  The reader never holds more than a batch of lines, it relies on
+the flow control of the StreamReader to pause the peer while the features
+are consumed, the writer waits for the transport to drain whenever
+high_water bytes have been written::
+
+    >>> from pygeoif import streaming
+    >>> async def copy(reader, writer):
+    ...     await streaming.awrite_features(
+    ...         writer, streaming.aiter_features(reader))
+"""
+import asyncio
+import json
+
+from .geometry import Feature, as_shape
+
+#: number of lines parsed together in an executor
+BATCH_SIZE = 256
+
+# get_running_loop is new in 3.7, inside a coroutine get_event_loop
+# returns the running loop on 3.6
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+#: bytes written before waiting for the writer to drain
+HIGH_WATER = 1 << 16
+
+
+def parse_feature(line, normalize=False):
+    """
+    Create a Feature from a line of GeoJSON, text or bytes, holding a
+    Feature or a geometry.  With normalize the rings of polygons are
+    oriented as required by RFC 7946.
+    """
+    if isinstance(line, bytes):
+        line = line.decode('utf-8')
+    data = json.loads(line.strip().strip('\x1e'))
+    if data.get('type') == 'Feature':
+        geom = data.get('geometry')
+        return Feature(as_shape(geom, normalize) if geom is not None else None,
+                       data.get('properties') or {})
+    return Feature(as_shape(data, normalize), {})
+
+
+def _parse_lines(lines, normalize):
+    return [parse_feature(line, normalize) for line in lines]
+
+
+def dumps_feature(feature):
+    """ The GeoJSON text of a Feature or geometry, without newlines """
+    if isinstance(feature, Feature):
+        geom = feature.geometry
+        data = {'type': 'Feature',
+                'geometry': (geom.__geo_interface__ if geom is not None
+                             else None),
+                'properties': feature.properties}
+    else:
+        data = feature.__geo_interface__
+    return json.dumps(data, separators=(',', ':'), default=str)
+
+
+async def _read_lines(reader, count):
+    lines = []
+    while len(lines) < count:
+        line = await reader.readline()
+        if not line:
+            break
+        line = line.strip().strip(b'\x1e')
+        if line:
+            lines.append(line)
+    return lines
+
+
+async def aiter_features(reader, executor=None, batch_size=BATCH_SIZE,
+                         normalize=False):
+    """
+    Iterate over the Features of newline delimited GeoJSON read from an
+    asyncio.StreamReader until the end of the stream.  Blank lines are
+    skipped, a line longer than the limit of the reader raises ValueError.
+
+    Without an executor each line is parsed when it is read.  With an
+    executor (or True for the default executor of the loop) the lines are
+    parsed in batches of batch_size off the event loop, while the next
+    batch is read.
+    """
+    if executor is None:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            line = line.strip().strip(b'\x1e')
+            if line:
+                yield parse_feature(line, normalize)
+    loop = _running_loop()
+    if executor is True:
+        executor = None
+    pending = None
+    while True:
+        lines = await _read_lines(reader, batch_size)
+        parsing = None
+        if lines:
+            parsing = loop.run_in_executor(executor, _parse_lines, lines,
+                                           normalize)
+        if pending is not None:
+            for feature in await pending:
+                yield feature
+        if parsing is None:
+            return
+        pending = parsing
+
+
+async def awrite_features(writer, features, high_water=HIGH_WATER):
+    """
+    Write Features or geometries, from an iterable or an async iterable,
+    as newline delimited GeoJSON to an asyncio.StreamWriter.  After
+    high_water bytes the writer is drained, so a slow reader slows down
+    the producer.  Return the number of features written, the writer is
+    not closed.
+    """
+    count = buffered = 0
+    async for feature in _aiter(features):
+        data = dumps_feature(feature).encode('utf-8') + b'\n'
+        writer.write(data)
+        count += 1
+        buffered += len(data)
+        if buffered >= high_water:
+            buffered = 0
+            await writer.drain()
+    await writer.drain()
+    return count
+
+
+async def _aiter(iterable):
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
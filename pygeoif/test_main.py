@@ -1,9 +1,40 @@
 # -*- coding: utf-8 -*-
+import binascii
+import copy
+import importlib
+import json
+import math
+import os
+import pickle
+import struct
+import sys
+import tempfile
 import unittest
+from array import array
+from concurrent import futures
 try:
+    import pygeoif
+    from pygeoif import batch
+    from pygeoif import flatgeobuf
     from pygeoif import geometry
+    from pygeoif import geopackage
+    from pygeoif import instrumentation
+    from pygeoif import kml
+    from pygeoif import loader
+    from pygeoif import memory
+    from pygeoif import shapefile
+    from pygeoif import streaming
 except ImportError:
+    import batch
+    import flatgeobuf
     import geometry
+    import geopackage
+    import instrumentation
+    import kml
+    import loader
+    import memory
+    import shapefile
+    import streaming
 
 
 class BasicTestCase(unittest.TestCase):
@@ -729,14 +760,2228 @@ class FeatureTestCase(unittest.TestCase):
                          geometry.as_shape(self.fc).__geo_interface__)
 
 
+class ConvexHullTestCase(unittest.TestCase):
+
+    def test_multipoint(self):
+        mp = geometry.MultiPoint([(0, 0), (1, 1), (2, 0), (1, 0.5), (1, 0)])
+        hull = geometry.convex_hull(mp)
+        self.assertTrue(isinstance(hull, geometry.Polygon))
+        self.assertEqual(hull.exterior.coords,
+                         ((0.0, 0.0), (2.0, 0.0), (1.0, 1.0), (0.0, 0.0)))
+        self.assertTrue(geometry.signed_area(hull.exterior.coords) > 0)
+
+    def test_polygon(self):
+        e = [(0, 0), (0, 2), (1, 1), (2, 2), (2, 0), (0, 0)]
+        i = [(0.5, 0.5), (1, 0.5), (1, 0.75), (0.5, 0.5)]
+        hull = geometry.convex_hull(geometry.Polygon(e, [i]))
+        self.assertEqual(hull.exterior.coords,
+                         ((0.0, 0.0), (2.0, 0.0), (2.0, 2.0), (0.0, 2.0),
+                          (0.0, 0.0)))
+
+    def test_collections(self):
+        gc = geometry.GeometryCollection([
+            geometry.Point(3, 3),
+            geometry.LineString([(0, 0), (1, 1)]),
+            geometry.Polygon([(0, 0), (3, 0), (1, 1)])])
+        hull = geometry.convex_hull(gc)
+        self.assertEqual(hull.bounds, (0.0, 0.0, 3.0, 3.0))
+        self.assertEqual(len(hull.exterior.coords), 4)
+        ml = geometry.MultiLineString([[(0, 0, 1), (1, 0, 1)],
+                                       [(0, 1, 2), (1, 1, 2)]])
+        self.assertEqual(geometry.convex_hull(ml).exterior.coords,
+                         ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0),
+                          (0.0, 0.0)))
+        hull = geometry.convex_hull(ml.__geo_interface__)
+        self.assertTrue(isinstance(hull, geometry.Polygon))
+
+    def test_degenerate(self):
+        hull = geometry.convex_hull(geometry.MultiPoint([(1, 1), (1, 1)]))
+        self.assertTrue(isinstance(hull, geometry.Point))
+        self.assertEqual(hull.coords, ((1.0, 1.0),))
+        hull = geometry.convex_hull(
+            geometry.LineString([(0, 0), (2, 2), (1, 1), (3, 3)]))
+        self.assertTrue(isinstance(hull, geometry.LineString))
+        self.assertEqual(hull.coords, ((0.0, 0.0), (3.0, 3.0)))
+        self.assertRaises(ValueError, geometry.convex_hull,
+                          geometry.MultiPoint([]))
+        self.assertRaises(TypeError, geometry.convex_hull, 0)
+
+
+class ValidityTestCase(unittest.TestCase):
+
+    def test_valid(self):
+        ext = [(0, 0), (0, 4), (4, 4), (4, 0), (0, 0)]
+        hole = [(1, 1), (2, 1), (2, 2), (1, 2), (1, 1)]
+        self.assertTrue(geometry.is_valid(geometry.Polygon(ext)))
+        self.assertTrue(geometry.is_valid(geometry.Polygon(ext, [hole])))
+        self.assertTrue(geometry.is_valid(geometry.LinearRing(ext)))
+        # a hole may touch the shell in a point
+        touch = [(0, 2), (1, 1), (1, 3), (0, 2)]
+        self.assertTrue(geometry.is_valid(geometry.Polygon(ext, [touch])))
+        self.assertTrue(geometry.is_valid(geometry.Point(0, 0)))
+        self.assertTrue(geometry.is_valid(
+            geometry.LineString([(0, 0), (1, 1), (0, 1), (1, 0)])))
+        self.assertEqual(geometry.explain_validity(geometry.Polygon(ext)),
+                         'Valid Geometry')
+        self.assertRaises(TypeError, geometry.is_valid, 0)
+
+    def test_self_intersection(self):
+        bowtie = geometry.Polygon([(0, 0), (2, 2), (2, 0), (0, 2)])
+        self.assertFalse(geometry.is_valid(bowtie))
+        self.assertEqual(geometry.explain_validity(bowtie),
+                         'Ring Self-intersection[1.0 1.0]')
+        figure8 = geometry.LinearRing([(0, 0), (1, 1), (2, 0), (3, 1),
+                                       (2, 2), (1, 1), (0, 2)])
+        self.assertEqual(geometry.explain_validity(figure8),
+                         'Ring Self-intersection[1.0 1.0]')
+        tvertex = geometry.LinearRing([(0, 0), (4, 0), (4, 4), (2, 0),
+                                       (0, 4)])
+        self.assertEqual(geometry.explain_validity(tvertex),
+                         'Ring Self-intersection[2.0 0.0]')
+        spike = geometry.Polygon([(0, 0), (2, 0), (2, 2), (2, 3),
+                                  (2, 1.5), (0, 2)])
+        self.assertFalse(geometry.is_valid(spike))
+        mp = geometry.MultiPolygon([geometry.Polygon([(0, 0), (0, 1),
+                                                      (1, 1)]), bowtie])
+        self.assertFalse(geometry.is_valid(mp))
+        gc = geometry.GeometryCollection([geometry.Point(0, 0), bowtie])
+        self.assertFalse(geometry.is_valid(gc))
+
+    def test_holes(self):
+        ext = [(0, 0), (0, 4), (4, 4), (4, 0), (0, 0)]
+        outside = [(5, 5), (6, 5), (6, 6), (5, 6), (5, 5)]
+        crossing = [(3, 3), (6, 3), (6, 6), (3, 6), (3, 3)]
+        self.assertEqual(
+            geometry.explain_validity(geometry.Polygon(ext, [outside])),
+            'Hole lies outside shell[5.0 5.0]')
+        self.assertEqual(
+            geometry.explain_validity(geometry.Polygon(ext, [crossing])),
+            'Self-intersection[3.0 4.0]')
+
+    def test_touching_holes(self):
+        # the second hole touches the first at (2, 5) and crosses it at
+        # (3, 4.5)
+        polygon = geometry.Polygon(
+            [(0, 0), (10, 0), (10, 10), (0, 10)],
+            [[(3, 5), (3, 3), (1, 5)], [(10, 1), (2, 5), (1, 8), (9, 2)]])
+        self.assertFalse(geometry.is_valid(polygon))
+        self.assertEqual(geometry.explain_validity(polygon),
+                         'Self-intersection[3.0 4.5]')
+
+    def test_sweep_pairwise(self):
+        import random
+        generator = random.Random(0)
+        for n in range(1000):
+            rings = []
+            for r in range(generator.randint(2, 4)):
+                points = []
+                while len(points) < generator.randint(3, 5):
+                    point = (float(generator.randint(0, 8)),
+                             float(generator.randint(0, 8)))
+                    if point not in points:
+                        points.append(point)
+                rings.append(points + points[:1])
+            segments = []
+            for r, ring in enumerate(rings):
+                for i in range(len(ring) - 1):
+                    a, b = sorted(ring[i:i + 2])
+                    segments.append((a, b, r, i, len(ring) - 1))
+            pairwise = any(
+                geometry._segment_conflict(segments[i], segments[j])
+                for i in range(len(segments))
+                for j in range(i + 1, len(segments)))
+            self.assertEqual(
+                geometry._sweep_intersections(rings) is not None, pairwise,
+                rings)
+
+    def test_rings(self):
+        unclosed = {'type': 'Polygon',
+                    'coordinates': [[(0, 0), (1, 0), (1, 1)]]}
+        self.assertEqual(geometry.explain_validity(unclosed),
+                         'Ring not closed[0.0 0.0]')
+        few = {'type': 'LinearRing',
+               'coordinates': [(0, 0), (1, 0), (0, 0)]}
+        self.assertEqual(geometry.explain_validity(few),
+                         'Too few points in geometry component[0.0 0.0]')
+
+    def test_large_ring(self):
+        n = 2000
+        ring = [(math.cos(2 * math.pi * i / n), math.sin(2 * math.pi * i / n))
+                for i in range(n)]
+        self.assertTrue(geometry.is_valid(geometry.Polygon(ring)))
+        ring[10], ring[20] = ring[20], ring[10]
+        self.assertFalse(geometry.is_valid(geometry.Polygon(ring)))
+
+
+class SpatialSortTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.points = [geometry.Point(1, 0), geometry.Point(0, 0),
+                       geometry.Point(1, 1), geometry.Point(0, 1)]
+
+    def test_hilbert(self):
+        s = geometry.sort_spatially(self.points)
+        self.assertEqual([p.coords[0] for p in s],
+                         [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)])
+        self.assertEqual(geometry._hilbert_key(0, 0, 4), 0)
+        self.assertEqual(geometry._hilbert_key(3, 0, 4), 15)
+        self.assertEqual(geometry._hilbert_key(1, 1, 4), 2)
+
+    def test_morton(self):
+        s = geometry.sort_spatially(self.points, curve='morton')
+        self.assertEqual([p.coords[0] for p in s],
+                         [(0.0, 0.0), (1.0, 0.0), (0.0, 1.0), (1.0, 1.0)])
+        self.assertEqual(geometry._morton_key(0xffff, 0), 0x55555555)
+        self.assertRaises(ValueError, geometry.sort_spatially,
+                          self.points, curve='peano')
+
+    def test_mixed(self):
+        line = geometry.LineString([(0, 0), (0, 1)])
+        empty = geometry.MultiPoint([])
+        s = geometry.sort_spatially([empty, self.points[2], line,
+                                     self.points[1]])
+        self.assertEqual(s, [self.points[1], line, self.points[2], empty])
+        self.assertEqual(geometry.sort_spatially([empty]), [empty])
+        self.assertEqual(geometry.sort_spatially([]), [])
+
+    def test_featurecollection(self):
+        features = [geometry.Feature(p, {'id': i})
+                    for i, p in enumerate(self.points)]
+        fc = geometry.FeatureCollection(features)
+        sfc = fc.sorted_spatially()
+        self.assertEqual([f.properties['id'] for f in sfc.features],
+                         [1, 3, 2, 0])
+        self.assertEqual(fc.bounds, sfc.bounds)
+        sfc = fc.sorted_spatially('morton')
+        self.assertEqual([f.properties['id'] for f in sfc.features],
+                         [1, 0, 3, 2])
+
+
+class BufferTestCase(unittest.TestCase):
+
+    def test_linestring(self):
+        a = array('d', [0, 0, 1, 1, 2, 0])
+        l = geometry.LineString(a)
+        self.assertEqual(l.coords, ((0.0, 0.0), (1.0, 1.0), (2.0, 0.0)))
+        self.assertEqual(l.bounds, (0.0, 0.0, 2.0, 1.0))
+        self.assertEqual(l.to_wkt(), 'LINESTRING (0.0 0.0, 1.0 1.0, 2.0 0.0)')
+        # the buffer is shared, not copied
+        a[0] = 5
+        self.assertEqual(l.coords[0], (5.0, 0.0))
+        l.coords = array('d', [0, 0, 1, 1])
+        self.assertEqual(l.coords, ((0.0, 0.0), (1.0, 1.0)))
+        self.assertRaises(ValueError, geometry.LineString,
+                          array('d', [0, 0, 1]))
+        self.assertRaises(TypeError, geometry.LineString, b'abcd')
+
+    def test_2d_buffer(self):
+        mv = memoryview(array('d', [0, 0, 0, 1, 1, 1])).cast(
+            'B').cast('d', (2, 3))
+        l = geometry.LineString(mv)
+        self.assertEqual(l.coords, ((0.0, 0.0, 0.0), (1.0, 1.0, 1.0)))
+        mv = memoryview(array('d', range(8))).cast('B').cast('d', (2, 4))
+        self.assertRaises(TypeError, geometry.LineString, mv)
+
+    def test_other_formats(self):
+        l = geometry.LineString(array('i', [0, 0, 1, 1]))
+        self.assertEqual(l.coords, ((0.0, 0.0), (1.0, 1.0)))
+        mp = geometry.MultiPoint(array('f', [1, 2, 3, 4]))
+        self.assertEqual(mp.coords, ((1.0, 2.0), (3.0, 4.0)))
+        self.assertEqual(len(mp), 2)
+
+    def test_linearring(self):
+        a = array('d', [0, 0, 1, 1, 1, 0])
+        r = geometry.LinearRing(a)
+        self.assertEqual(r.coords, ((0.0, 0.0), (1.0, 1.0), (1.0, 0.0),
+                                    (0.0, 0.0)))
+        # closing the ring does not modify the buffer
+        self.assertEqual(len(a), 6)
+
+    def test_polygon(self):
+        p = geometry.Polygon(array('d', [0, 0, 0, 4, 4, 4, 4, 0, 0, 0]),
+                             [array('d', [1, 1, 2, 1, 2, 2, 1, 1])])
+        self.assertEqual(p.to_wkt(), 'POLYGON((0.0 0.0, 0.0 4.0, 4.0 4.0, '
+                                     '4.0 0.0, 0.0 0.0),(1.0 1.0, 2.0 1.0, '
+                                     '2.0 2.0, 1.0 1.0))')
+        self.assertRaises(TypeError, geometry.Polygon, 0)
+
+    def test_export(self):
+        l = geometry.LineString([(0, 0, 0), (1, 2, 3)])
+        view = l.coords_buffer
+        self.assertEqual(view.shape, (2, 3))
+        self.assertEqual(view.tolist(), [[0.0, 0.0, 0.0], [1.0, 2.0, 3.0]])
+        self.assertTrue(view.readonly)
+        ai = l.__array_interface__
+        self.assertEqual(ai['shape'], (2, 3))
+        self.assertEqual(ai['version'], 3)
+        self.assertTrue(ai['typestr'] in ('<f8', '>f8'))
+        self.assertEqual(geometry.LineString([]).coords_buffer.tolist(), [])
+        mp = geometry.MultiPoint([(0, 0), (1, 2)])
+        self.assertEqual(mp.coords_buffer.tolist(), [[0.0, 0.0], [1.0, 2.0]])
+        # round trip without copying
+        l2 = geometry.LineString(view)
+        self.assertEqual(l2.coords, l.coords)
+
+    def test_export_and_resize(self):
+        mp = geometry.MultiPoint([(0, 0), (1, 1)])
+        view = mp.coords_buffer
+        ai = mp.__array_interface__
+        mp.append((2, 2))
+        self.assertEqual(mp.coords, ((0, 0), (1, 1), (2, 2)))
+        # the exported views keep the coordinates they were taken from
+        self.assertEqual(view.tolist(), [[0.0, 0.0], [1.0, 1.0]])
+        self.assertEqual(ai['data'].tolist(), [[0.0, 0.0], [1.0, 1.0]])
+        view = mp.coords_buffer
+        mp.remove((0, 0))
+        self.assertEqual(mp.coords, ((1, 1), (2, 2)))
+        self.assertEqual(len(view), 3)
+
+
+class CoordinateSequenceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.line = geometry.LineString([(i, -i) for i in range(10)])
+
+    def test_view(self):
+        coords = self.line.coords
+        self.assertTrue(isinstance(coords, geometry.CoordinateSequence))
+        self.assertEqual(len(coords), 10)
+        self.assertEqual(coords[3], (3.0, -3.0))
+        self.assertEqual(coords[-1], (9.0, -9.0))
+        self.assertRaises(IndexError, coords.__getitem__, 10)
+        self.assertRaises(IndexError, coords.__getitem__, -11)
+        self.assertEqual(list(coords)[:2], [(0.0, 0.0), (1.0, -1.0)])
+        self.assertTrue((2.0, -2.0) in coords)
+        self.assertEqual(coords.index((2.0, -2.0)), 2)
+        self.assertEqual(coords, tuple((float(i), float(-i))
+                                       for i in range(10)))
+        self.assertNotEqual(coords, coords[1:])
+        self.assertFalse(coords == 1)
+        self.assertEqual(hash(coords[:2]), hash(((0.0, 0.0), (1.0, -1.0))))
+
+    def test_slices(self):
+        coords = self.line.coords
+        part = coords[2:8:2]
+        self.assertEqual(part, ((2.0, -2.0), (4.0, -4.0), (6.0, -6.0)))
+        # slices share the storage of the geometry
+        self.assertTrue(part._flat is self.line._coords)
+        self.assertEqual(part[::-1], ((6.0, -6.0), (4.0, -4.0),
+                                      (2.0, -2.0)))
+        self.assertEqual(part[1:][0], (4.0, -4.0))
+        self.assertEqual(len(coords[5:2]), 0)
+        self.assertEqual(list(reversed(coords[:2])),
+                         [(1.0, -1.0), (0.0, 0.0)])
+        self.assertEqual(coords[::-3], ((9.0, -9.0), (6.0, -6.0),
+                                        (3.0, -3.0), (0.0, 0.0)))
+        self.assertEqual(geometry.LineString(part).coords, part)
+
+    def test_geoms(self):
+        geoms = self.line.geoms
+        self.assertTrue(isinstance(geoms, geometry.GeometrySequence))
+        self.assertEqual(len(geoms), 10)
+        self.assertTrue(isinstance(geoms[3], geometry.Point))
+        self.assertEqual(geoms[3].coords, ((3.0, -3.0),))
+        self.assertEqual([p.x for p in geoms[:3]], [0.0, 1.0, 2.0])
+        mp = geometry.MultiPoint(self.line)
+        self.assertEqual(mp.geoms[-1].y, -9.0)
+        ml = geometry.MultiLineString([self.line, self.line])
+        self.assertTrue(ml.geoms[0] is ml._geoms[0])
+        self.assertEqual(len(ml.geoms[1:]), 1)
+
+    def test_ring(self):
+        r = geometry.LinearRing([(0, 0), (1, 1), (1, 0)])
+        self.assertEqual(len(r.coords), 4)
+        self.assertEqual(r.coords[0], r.coords[-1])
+        r.coords = self.line.coords[:3]
+        self.assertEqual(len(r.coords), 4)
+
+
+class WKBTestCase(unittest.TestCase):
+
+    def test_point(self):
+        p = geometry.from_wkb('0101000000000000000000F03F0000000000000040')
+        self.assertEqual(p.coords, ((1.0, 2.0),))
+        # PostGIS EWKB with SRID 4326
+        p = geometry.from_wkb(
+            '0101000020E6100000000000000000F03F0000000000000040')
+        self.assertEqual(p.coords, ((1.0, 2.0),))
+        p = geometry.from_wkb(struct.pack('>BI3d', 0, 1001, 1, 2, 3))
+        self.assertEqual(p.coords, ((1.0, 2.0, 3.0),))
+
+    def test_linestring(self):
+        wkb = struct.pack('<BII6d', 1, 2, 3, 0, 0, 1, 1, 2, 0)
+        l = geometry.from_wkb(wkb)
+        self.assertEqual(l.coords, ((0.0, 0.0), (1.0, 1.0), (2.0, 0.0)))
+        self.assertEqual(geometry.from_wkb(
+            binascii.hexlify(wkb).decode('ascii')).coords, l.coords)
+        # ZM, the M values are dropped
+        wkb = struct.pack('<BII8d', 1, 3002, 2, 0, 0, 1, 9, 1, 1, 2, 9)
+        self.assertEqual(geometry.from_wkb(wkb).coords,
+                         ((0.0, 0.0, 1.0), (1.0, 1.0, 2.0)))
+        self.assertRaises(ValueError, geometry.from_wkb, wkb[:-8])
+
+    def test_polygon(self):
+        wkb = struct.pack('<BIII8dI8d', 1, 3, 2,
+                          4, 0, 0, 4, 0, 4, 4, 0, 0,
+                          4, 1, 1, 2, 1, 2, 2, 1, 1)
+        p = geometry.from_wkb(wkb)
+        self.assertEqual(p.to_wkt(), 'POLYGON((0.0 0.0, 4.0 0.0, 4.0 4.0, '
+                                     '0.0 0.0),(1.0 1.0, 2.0 1.0, 2.0 2.0, '
+                                     '1.0 1.0))')
+        mp = geometry.from_wkb(struct.pack('<BII', 1, 6, 2) + wkb + wkb)
+        self.assertEqual(len(mp), 2)
+        self.assertEqual(mp.bounds, (0.0, 0.0, 4.0, 4.0))
+
+    def test_collections(self):
+        point = struct.pack('<BI2d', 1, 1, 1, 2)
+        mp = geometry.from_wkb(struct.pack('<BII', 1, 4, 2) + point + point)
+        self.assertEqual(mp.coords, ((1.0, 2.0), (1.0, 2.0)))
+        line = struct.pack('<BII4d', 1, 2, 2, 0, 0, 1, 1)
+        ml = geometry.from_wkb(struct.pack('<BII', 1, 5, 2) + line + line)
+        self.assertEqual(ml.to_wkt(),
+                         'MULTILINESTRING((0.0 0.0, 1.0 1.0),'
+                         '(0.0 0.0, 1.0 1.0))')
+        gc = geometry.from_wkb(struct.pack('<BII', 1, 7, 2) + point + line)
+        self.assertEqual(gc.to_wkt(), 'GEOMETRYCOLLECTION (POINT (1.0 2.0), '
+                                      'LINESTRING (0.0 0.0, 1.0 1.0))')
+        self.assertRaises(NotImplementedError, geometry.from_wkb,
+                          struct.pack('<BII', 1, 15, 0))
+
+
+class LoaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            for i in range(100):
+                if i % 2:
+                    f.write('LINESTRING ({0} 0, 1 1)\n'.format(i))
+                else:
+                    f.write('0101000000000000000000F03F{0}\n'.format(
+                        binascii.hexlify(struct.pack('<d', i)).decode()))
+            f.write('\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def check(self, geometries):
+        self.assertEqual(len(geometries), 100)
+        for i, geom in enumerate(geometries):
+            if i % 2:
+                self.assertEqual(geom.coords[0], (i, 0))
+            else:
+                self.assertEqual(geom.coords[0], (1, i))
+
+    def test_chunks(self):
+        offsets = loader._chunk_offsets(self.path, 100)
+        self.assertTrue(len(offsets) > 10)
+        self.assertEqual(offsets[0][0], 0)
+        for (s1, e1), (s2, e2) in zip(offsets, offsets[1:]):
+            self.assertEqual(e1, s2)
+        self.assertEqual(offsets[-1][1], os.path.getsize(self.path))
+        self.assertEqual(len(loader._chunk_offsets(self.path, 0)), 101)
+
+    def test_load(self):
+        self.check(loader.load_geometries(self.path, processes=1,
+                                          chunk_size=100))
+        self.check(loader.load_geometries(self.path))
+
+    def test_parallel(self):
+        self.check(list(loader.iter_geometries(self.path, processes=2,
+                                               chunk_size=100)))
+        chunks = list(loader.iter_chunks(self.path, processes=2,
+                                         chunk_size=100, ordered=False))
+        unordered = [g.wkt for chunk in chunks for g in chunk]
+        ordered = [g.wkt for g in loader.load_geometries(self.path)]
+        self.assertEqual(sorted(unordered), sorted(ordered))
+
+    def test_empty(self):
+        with open(self.path, 'w'):
+            pass
+        self.assertEqual(loader.load_geometries(self.path), [])
+
+
+class BatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.wkts = ['LINESTRING ({0}.0 0.0, 1.0 1.0)'.format(i)
+                     for i in range(50)]
+
+    def test_serial(self):
+        geoms = list(batch.from_wkt(self.wkts))
+        self.assertEqual([g.to_wkt() for g in geoms], self.wkts)
+        self.assertEqual(list(batch.to_wkt(geoms)), self.wkts)
+
+    def test_thread(self):
+        geoms = list(batch.from_wkt(self.wkts, executor='thread',
+                                    chunksize=7))
+        self.assertEqual(list(batch.to_wkt(geoms, executor='thread',
+                                           chunksize=3)), self.wkts)
+        bounds = list(batch.bounds(geoms, executor='thread', ordered=False))
+        self.assertEqual(sorted(bounds), sorted(g.bounds for g in geoms))
+
+    def test_process(self):
+        geoms = list(batch.from_wkt(self.wkts, executor='process',
+                                    chunksize=10, max_workers=2))
+        self.assertEqual([g.to_wkt() for g in geoms], self.wkts)
+        gis = list(batch.geo_interface(geoms, executor='process',
+                                       chunksize=10, max_workers=2))
+        self.assertEqual(gis, [g.__geo_interface__ for g in geoms])
+        shapes = list(batch.as_shape(gis, executor='process',
+                                     chunksize=10, max_workers=2))
+        self.assertEqual([g.to_wkt() for g in shapes], self.wkts)
+
+    def test_executor(self):
+        with futures.ThreadPoolExecutor(2) as executor:
+            result = list(batch.map_geometries(len, [[1], [1, 2], []],
+                                               executor=executor,
+                                               chunksize=1))
+        self.assertEqual(result, [1, 2, 0])
+        self.assertRaises(ValueError, list,
+                          batch.map_geometries(len, [[]], executor='gpu'))
+
+    def test_pickle_shared_buffer(self):
+        l = geometry.LineString(array('d', [0, 0, 1, 1]))
+        self.assertEqual(pickle.loads(pickle.dumps(l)).coords, l.coords)
+
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+        self.calls = []
+        instrumentation.add_hook(self.hook)
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.remove_hook(self.hook)
+        instrumentation.reset()
+
+    def hook(self, *args):
+        self.calls.append(args)
+
+    def test_disabled(self):
+        from_wkt = geometry.from_wkt
+        init = geometry.LineString.__init__
+        prop = geometry.LineString.__dict__['__geo_interface__']
+        geometry.from_wkt('POINT (0 1)')
+        self.assertEqual(instrumentation.stats(), {})
+        instrumentation.enable()
+        self.assertTrue(instrumentation.is_enabled())
+        self.assertFalse(geometry.from_wkt is from_wkt)
+        self.assertTrue(pygeoif.from_wkt is geometry.from_wkt)
+        instrumentation.disable()
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertTrue(geometry.from_wkt is from_wkt)
+        self.assertTrue(pygeoif.from_wkt is from_wkt)
+        self.assertTrue(geometry.LineString.__init__ is init)
+        self.assertTrue(
+            geometry.LineString.__dict__['__geo_interface__'] is prop)
+        geometry.from_wkt('POINT (0 1)')
+        self.assertEqual(instrumentation.stats(), {})
+        self.assertEqual(self.calls, [])
+
+    def test_import_while_enabled(self):
+        name = 'pygeoif.streaming'
+        as_shape = geometry.as_shape
+        module = sys.modules.pop(name)
+        try:
+            instrumentation.enable()
+            fresh = importlib.import_module(name)
+            self.assertFalse(fresh is module)
+            self.assertFalse(fresh.as_shape is as_shape)
+            wrapper = fresh.as_shape
+            instrumentation.disable()
+            self.assertTrue(fresh.as_shape is as_shape)
+            wrapper({'type': 'Point', 'coordinates': (0, 1)})
+            self.assertEqual(instrumentation.stats(), {})
+        finally:
+            sys.modules[name] = module
+            pygeoif.streaming = module
+
+    def test_stats(self):
+        with instrumentation.instrumented():
+            geometry.from_wkt('LINESTRING (0 0, 1 1)')
+            line = geometry.LineString([(i, i) for i in range(150)])
+            line.to_wkt()
+            line.__geo_interface__
+            self.assertEqual(len(list(line.geoms)), 150)
+        self.assertFalse(instrumentation.is_enabled())
+        stats = instrumentation.stats()
+        self.assertEqual(stats[('from_wkt', 'LineString', 1)][0], 1)
+        self.assertEqual(stats[('LineString.__init__', 'LineString',
+                                100)][0], 1)
+        self.assertEqual(stats[('to_wkt', 'LineString', 100)][0], 1)
+        self.assertEqual(stats[('__geo_interface__', 'LineString',
+                                100)][0], 1)
+        self.assertEqual(instrumentation.point_allocations(), 150)
+        self.assertTrue(('to_wkt', 'LineString', 150) in
+                        [call[:3] for call in self.calls])
+        self.assertTrue(all(call[3] >= 0 for call in self.calls))
+        instrumentation.reset()
+        self.assertEqual(instrumentation.stats(), {})
+
+    def test_vertex_count(self):
+        p = geometry.Polygon([(0, 0), (0, 2), (2, 2), (2, 0)],
+                             [[(0.5, 0.5), (1, 0.5), (1, 1)]])
+        self.assertEqual(instrumentation.vertex_count(p), 9)
+        mp = geometry.MultiPolygon([p, p])
+        self.assertEqual(instrumentation.vertex_count(mp), 18)
+        fc = geometry.FeatureCollection([geometry.Feature(mp),
+                                         geometry.Feature(p)])
+        self.assertEqual(instrumentation.vertex_count(fc), 27)
+        self.assertEqual(instrumentation.vertex_count(None), 0)
+        self.assertEqual(instrumentation._bucket(0), 0)
+        self.assertEqual(instrumentation._bucket(9), 1)
+        self.assertEqual(instrumentation._bucket(1000), 1000)
+
+
+class MemoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.polygon = geometry.Polygon(
+            [(0, 0), (0, 2), (2, 2), (2, 0)],
+            [[(0.5, 0.5), (1, 0.5), (1, 1)]])
+        self.collection = geometry.FeatureCollection([
+            geometry.Feature(self.polygon, {'name': 'polygon'}),
+            geometry.Feature(geometry.Point(1, 2), {'name': 'point'}),
+            geometry.Feature(geometry.LineString(
+                [(i, i) for i in range(1000)]), {})])
+
+    def test_deep_sizeof(self):
+        self.assertTrue(memory.deep_sizeof(self.polygon) >
+                        sys.getsizeof(self.polygon) +
+                        len(self.polygon.exterior.coords) * 16)
+        line = geometry.LineString([(i, i) for i in range(1000)])
+        self.assertTrue(memory.deep_sizeof(line) > 16000)
+        self.assertTrue(memory.deep_sizeof(line) < 20000)
+        self.assertTrue(memory.deep_sizeof([line, line]) <
+                        memory.deep_sizeof(line) + 100)
+        self.assertEqual(memory.deep_sizeof(None), 0)
+
+    def test_shared_buffer(self):
+        coords = array('d', range(2000))
+        view = memoryview(coords)
+        first = geometry.LineString(view)
+        second = geometry.MultiPoint(view)
+        both = memory.deep_sizeof([first, second])
+        self.assertTrue(both < memory.deep_sizeof(first) +
+                        memory.deep_sizeof(second) - 15000)
+
+    def test_memory_report(self):
+        report = memory.memory_report(self.collection)
+        self.assertEqual(sorted(report.keys()),
+                         ['LineString', 'Point', 'Polygon', 'total'])
+        self.assertEqual(report['total']['bytes'],
+                         memory.deep_sizeof(self.collection))
+        self.assertEqual(report['total']['count'], 3)
+        self.assertEqual(report['Point']['count'], 1)
+        self.assertTrue(report['LineString']['coordinates'] >= 16000)
+        self.assertEqual(report['LineString']['points'], 0)
+        self.assertEqual(report['LineString']['rings'], 0)
+        self.assertTrue(report['LineString']['properties'] > 0)
+        self.assertTrue(report['Point']['points'] > 0)
+        self.assertTrue(report['Polygon']['rings'] > 0)
+        self.assertEqual(report['Polygon']['points'], 0)
+        names = ('LineString', 'Point', 'Polygon')
+        for category in memory.CATEGORIES:
+            types = sum(report[name][category] for name in names)
+            if category == 'features':
+                # the collection and its list of features
+                self.assertTrue(report['total'][category] > types)
+            else:
+                self.assertEqual(report['total'][category], types)
+
+    def test_memory_report_geometries(self):
+        report = memory.memory_report(self.polygon)
+        self.assertEqual(report['total']['bytes'],
+                         memory.deep_sizeof(self.polygon))
+        self.assertEqual(report['Polygon']['features'], 0)
+        geoms = [self.polygon, geometry.MultiPolygon([self.polygon])]
+        report = memory.memory_report(geoms)
+        self.assertEqual(report['total']['bytes'], memory.deep_sizeof(geoms))
+        self.assertEqual(report['MultiPolygon']['count'], 1)
+
+    def test_memory_report_container(self):
+        line = geometry.LineString([(i / 3.0, i / 7.0) for i in range(50)])
+        geometry.set_precision(line, geometry.PrecisionModel(1000))
+        report = memory.memory_report(line)
+        self.assertEqual(report['total']['bytes'], memory.deep_sizeof(line))
+        items = [line]
+        report = memory.memory_report(items)
+        self.assertEqual(report['total']['bytes'], memory.deep_sizeof(items))
+        self.assertEqual(report['total']['bytes'],
+                         memory.deep_sizeof(line) + sys.getsizeof(items))
+        self.assertEqual(report['total']['features'], sys.getsizeof(items))
+
+
+class BoundsScanTestCase(unittest.TestCase):
+
+    wkts = ['POINT (1 2)', 'POINT Z (1 2 3)',
+            'LINESTRING (0 0, 1e2 -3.5, 2 2)',
+            'POLYGON ((0 0, 0 2, 2 2, 2 0, 0 0), '
+            '(0.5 0.5, 1 0.5, 1 1, 0.5 0.5))',
+            'MULTIPOLYGON (((0 0, 0 2, 2 2, 2 0, 0 0)), '
+            '((5 5, 5 6, 6 6, 5 5)))',
+            'GEOMETRYCOLLECTION (POINT (-4 3), LINESTRING (4 6, 7 10))',
+            'MULTIPOINT ((1 2), (3 -4))', 'MULTIPOINT (1 2, 3 -4)',
+            'MULTILINESTRING ((0 0, 1 1), (-1 -1, 2 3))']
+
+    def test_wkt_bounds(self):
+        for wkt in self.wkts[2:]:
+            self.assertEqual(geometry.wkt_bounds(wkt),
+                             geometry.from_wkt(wkt).bounds)
+        self.assertEqual(geometry.wkt_bounds('POINT (1 2)'), (1, 2, 1, 2))
+        self.assertEqual(geometry.wkt_bounds('POINT Z (1 2 3)'),
+                         (1, 2, 1, 2))
+        self.assertEqual(
+            geometry.wkt_bounds('LINESTRING ZM (1 2 100 200, 3 4 -1 -2)'),
+            (1.0, 2.0, 3.0, 4.0))
+        self.assertEqual(geometry.wkt_bounds('SRID=4326;POINT(7 8)'),
+                         (7.0, 8.0, 7.0, 8.0))
+        self.assertEqual(geometry.wkt_bounds('POINT EMPTY'), None)
+        self.assertEqual(geometry.wkt_bounds('GEOMETRYCOLLECTION EMPTY'),
+                         None)
+
+    def test_wkb_bounds(self):
+        polygon = struct.pack('<BIII10dI8d', 1, 3, 2, 5,
+                              0, 0, 0, 2, 2, 2, 2, 0, 0, 0,
+                              4, .5, .5, 1, .5, 1, 1, .5, .5)
+        self.assertEqual(geometry.wkb_bounds(polygon), (0, 0, 2, 2))
+        self.assertEqual(geometry.wkb_bounds(polygon),
+                         geometry.from_wkb(polygon).bounds)
+        line = struct.pack('>BII6d', 0, 1002, 2, 1, 2, 3, -1, 5, 6)
+        self.assertEqual(geometry.wkb_bounds(line), (-1, 2, 1, 5))
+        self.assertEqual(
+            geometry.wkb_bounds(binascii.hexlify(line).decode('ascii')),
+            (-1, 2, 1, 5))
+        ewkb = struct.pack('<BIIdd', 1, 0x20000001, 4326, 7, 8)
+        self.assertEqual(geometry.wkb_bounds(ewkb), (7, 8, 7, 8))
+        empty = struct.pack('<BIdd', 1, 1, float('nan'), float('nan'))
+        self.assertEqual(geometry.wkb_bounds(empty), None)
+        multipoint = (struct.pack('<BII', 1, 4, 2) + empty +
+                      struct.pack('<BIdd', 1, 1, 3, 4))
+        self.assertEqual(geometry.wkb_bounds(multipoint), (3, 4, 3, 4))
+        collection = (struct.pack('<BII', 1, 7, 2) + line + polygon)
+        self.assertEqual(geometry.wkb_bounds(collection), (-1, 0, 2, 5))
+        self.assertRaises(ValueError, geometry.wkb_bounds, polygon[:-8])
+
+    def test_geojson_bounds(self):
+        for wkt in self.wkts:
+            geom = geometry.from_wkt(wkt)
+            if 'Z' not in wkt:
+                self.assertEqual(geometry.geojson_bounds(geom), geom.bounds)
+            self.assertEqual(
+                geometry.geojson_bounds(geom.__geo_interface__),
+                geometry.wkt_bounds(wkt))
+        collection = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {},
+             'geometry': {'type': 'Point', 'coordinates': [1, 2]}},
+            {'type': 'Feature', 'properties': {}, 'geometry': None},
+            {'type': 'Feature', 'properties': {}, 'bbox': [-1, -2, 0, 0],
+             'geometry': {'type': 'Point', 'coordinates': [-1, -2]}}]}
+        self.assertEqual(geometry.geojson_bounds(collection), (-1, -2, 1, 2))
+        self.assertEqual(
+            geometry.geojson_bounds(
+                '{"type": "Feature", "bbox": [0, 1, 2, 3, 4, 5], '
+                '"geometry": null}'),
+            (0, 1, 3, 4))
+        self.assertEqual(geometry.geojson_bounds(
+            {'type': 'MultiPoint', 'coordinates': []}), None)
+
+
+class NormalizeOrientationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # clockwise exterior, counterclockwise hole
+        self.polygon = geometry.Polygon(
+            [(0, 0), (0, 2), (2, 2), (2, 0)],
+            [[(0.5, 0.5), (1, 0.5), (1, 1)]])
+        self.wkt = ('MULTIPOLYGON (((0 0, 0 2, 2 2, 2 0, 0 0), '
+                    '(0.5 0.5, 1 0.5, 1 1, 0.5 0.5)), '
+                    '((5 5, 6 6, 5 6, 5 5)))')
+
+    def assertOriented(self, polygon, sign=1.0):
+        self.assertTrue(
+            geometry.signed_area(polygon.exterior.coords) * sign > 0)
+        for hole in polygon.interiors:
+            self.assertTrue(geometry.signed_area(hole.coords) * sign < 0)
+
+    def test_polygon(self):
+        coords = self.polygon.exterior.coords
+        result = geometry.normalize_orientation(self.polygon)
+        self.assertTrue(result is self.polygon)
+        self.assertOriented(self.polygon)
+        self.assertEqual(list(coords)[:2], [(0, 0), (2, 0)])
+        self.assertEqual(self.polygon.bounds, (0, 0, 2, 2))
+        geometry.normalize_orientation(self.polygon, rfc7946=False)
+        self.assertOriented(self.polygon, -1.0)
+        self.assertEqual(self.polygon.exterior.coords,
+                         ((0, 0), (0, 2), (2, 2), (2, 0), (0, 0)))
+
+    def test_z(self):
+        polygon = geometry.Polygon([(0, 0, 1), (0, 2, 2), (2, 2, 3)])
+        geometry.normalize_orientation(polygon)
+        self.assertEqual(polygon.exterior.coords,
+                         ((0, 0, 1), (2, 2, 3), (0, 2, 2), (0, 0, 1)))
+
+    def test_shared_buffer(self):
+        coords = array('d', [0, 0, 0, 2, 2, 2, 2, 0, 0, 0])
+        polygon = geometry.Polygon(memoryview(coords))
+        geometry.normalize_orientation(polygon)
+        self.assertOriented(polygon)
+        self.assertEqual(list(coords), [0, 0, 0, 2, 2, 2, 2, 0, 0, 0])
+
+    def test_multipolygon(self):
+        multipolygon = geometry.from_wkt(self.wkt)
+        geometry.normalize_orientation(multipolygon)
+        for polygon in multipolygon.geoms:
+            self.assertOriented(polygon)
+        collection = geometry.GeometryCollection(
+            [self.polygon, geometry.Point(0, 0)])
+        geometry.normalize_orientation(collection, False)
+        self.assertOriented(collection.geoms[0], -1.0)
+        line = geometry.LineString([(0, 0), (1, 1)])
+        self.assertTrue(geometry.normalize_orientation(line) is line)
+
+    def test_from_wkt(self):
+        for polygon in geometry.from_wkt(self.wkt, normalize=True).geoms:
+            self.assertOriented(polygon)
+        polygon = geometry.from_wkt(self.polygon.wkt, normalize=True)
+        self.assertOriented(polygon)
+        collection = geometry.from_wkt(
+            'GEOMETRYCOLLECTION (POLYGON ((0 0, 0 2, 2 2, 0 0)), '
+            'POINT (1 1))', normalize=True)
+        self.assertOriented(collection.geoms[0])
+        self.assertEqual(geometry.from_wkt(self.wkt).wkt,
+                         geometry.from_wkt(self.wkt, normalize=False).wkt)
+
+    def test_as_shape(self):
+        multipolygon = geometry.from_wkt(self.wkt)
+        for polygon in geometry.as_shape(multipolygon,
+                                         normalize=True).geoms:
+            self.assertOriented(polygon)
+        feature = {'type': 'Feature', 'properties': {},
+                   'geometry': self.polygon.__geo_interface__}
+        self.assertOriented(geometry.as_shape(feature, True).geometry)
+        self.assertEqual(geometry.as_shape(self.polygon).exterior.coords,
+                         self.polygon.exterior.coords)
+
+    def test_orient(self):
+        oriented = geometry.orient(self.polygon)
+        self.assertOriented(oriented)
+        self.assertOriented(self.polygon, -1.0)
+        self.assertOriented(geometry.orient(self.polygon, -1), -1.0)
+
+
+class MutableCollectionTestCase(unittest.TestCase):
+
+    def test_multipoint(self):
+        coords = array('d', [0, 0, 1, 1])
+        mp = geometry.MultiPoint(memoryview(coords))
+        self.assertEqual(mp.bounds, (0, 0, 1, 1))
+        mp.append((5, -1))
+        mp.extend([geometry.Point(2, 2), [3, 3]])
+        self.assertEqual(len(mp), 5)
+        self.assertEqual(mp.bounds, (0, -1, 5, 3))
+        self.assertEqual(list(coords), [0, 0, 1, 1])
+        mp.remove(geometry.Point(5, -1))
+        self.assertEqual(mp.bounds, (0, 0, 3, 3))
+        self.assertEqual(mp.coords, ((0, 0), (1, 1), (2, 2), (3, 3)))
+        self.assertRaises(ValueError, mp.remove, (5, -1))
+        self.assertRaises(ValueError, mp.append, (1, 2, 3))
+
+    def test_empty_multipoint(self):
+        mp = geometry.MultiPoint([])
+        self.assertEqual(mp.bounds, None)
+        mp.append((1, 2, 3))
+        self.assertEqual(mp.bounds, (1, 2, 1, 2))
+        self.assertEqual(mp.wkt, 'MULTIPOINT(1.0 2.0 3.0)')
+        mp.remove((1, 2, 3))
+        self.assertEqual(len(mp), 0)
+        self.assertEqual(mp.bounds, None)
+
+    def test_multilinestring(self):
+        mls = geometry.MultiLineString([[(0, 0), (1, 1)]])
+        mls.append([(3, 3), (4, 4)])
+        self.assertEqual(mls.bounds, (0, 0, 4, 4))
+        line = geometry.LineString([(-1, 0), (0, 5)])
+        mls.append(line)
+        self.assertEqual(mls.bounds, (-1, 0, 4, 5))
+        self.assertEqual(len(mls), 3)
+        mls.remove(line)
+        self.assertEqual(mls.bounds, (0, 0, 4, 4))
+        mls.remove([(3, 3), (4, 4)])
+        self.assertEqual(mls.bounds, (0, 0, 1, 1))
+        self.assertRaises(ValueError, mls.remove, [(3, 3), (4, 4)])
+
+    def test_multipolygon(self):
+        mp = geometry.MultiPolygon([])
+        self.assertEqual(mp.bounds, None)
+        polygon = geometry.Polygon([(0, 0), (1, 1), (1, 0)])
+        mp.append(polygon)
+        mp.append((((5, 5), (6, 6), (6, 5)), []))
+        self.assertEqual(mp.bounds, (0, 0, 6, 6))
+        self.assertEqual(len(mp.geoms), 2)
+        mp.remove(polygon)
+        self.assertEqual(mp.bounds, (5, 5, 6, 6))
+        self.assertRaises(ValueError, mp.append, 1)
+
+    def test_geometrycollection(self):
+        gc = geometry.GeometryCollection([geometry.Point(0, 0)])
+        point = geometry.Point(1, 1)
+        gc.append(point)
+        self.assertTrue(gc.geoms[1] is point)
+        gc.append({'type': 'LineString', 'coordinates': [(2, 2), (3, 3)]})
+        self.assertEqual(gc.bounds, (0, 0, 3, 3))
+        gc.remove({'type': 'LineString', 'coordinates': ((2, 2), (3, 3))})
+        self.assertEqual(gc.bounds, (0, 0, 1, 1))
+        self.assertRaises(ValueError, gc.append,
+                          geometry.MultiPoint([(0, 0)]))
+
+    def test_featurecollection(self):
+        fc = geometry.FeatureCollection([])
+        self.assertEqual(fc.bounds, None)
+        feature = geometry.Feature(geometry.Point(1, 2), {'id': 1})
+        fc.append(feature)
+        fc.extend([geometry.Feature(geometry.Point(-1, 5), {'id': 2})])
+        self.assertEqual(fc.bounds, (-1, 2, 1, 5))
+        self.assertEqual(len(fc), 2)
+        fc.remove(feature)
+        self.assertEqual(fc.bounds, (-1, 5, -1, 5))
+        self.assertEqual(list(fc.features)[0].properties, {'id': 2})
+        self.assertRaises(ValueError, fc.append, geometry.Point(0, 0))
+        self.assertRaises(ValueError, fc.remove, feature)
+
+    def test_append_without_geometry(self):
+        fc = geometry.FeatureCollection(
+            [geometry.Feature(geometry.Point(1, 2))])
+        self.assertEqual(fc.bounds, (1, 2, 1, 2))
+        fc.append(geometry.Feature(None, {'id': 1}))
+        self.assertEqual(fc.bounds, (1, 2, 1, 2))
+        self.assertEqual(len(fc), 2)
+        self.assertEqual(geometry._part_bounds(geometry.Feature(None)), None)
+
+    def test_pickle(self):
+        mls = geometry.MultiLineString([[(0, 0), (1, 1)]])
+        mls.bounds
+        mls.append([(3, 3), (4, 4)])
+        copy = pickle.loads(pickle.dumps(mls))
+        self.assertEqual(copy.bounds, (0, 0, 4, 4))
+        copy.append([(5, 5), (6, 6)])
+        self.assertEqual(copy.bounds, (0, 0, 6, 6))
+        self.assertEqual(mls.bounds, (0, 0, 4, 4))
+
+
+class ColumnarTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.features = [
+            geometry.Feature(geometry.Point(i, i),
+                             {'name': 'f{0}'.format(i), 'lanes': i,
+                              'category': 'road' if i % 2 else 'rail'})
+            for i in range(6)]
+        self.features.append(
+            geometry.Feature(geometry.Point(9, 9), {'other': 1}))
+        self.collection = geometry.FeatureCollection(self.features,
+                                                     columnar=True)
+
+    def test_columns(self):
+        columns = self.collection._features
+        self.assertTrue(self.collection.columnar)
+        self.assertFalse(geometry.FeatureCollection(self.features).columnar)
+        self.assertEqual(columns.schema,
+                         ['name', 'lanes', 'category', 'other'])
+        self.assertEqual(columns.column('lanes'),
+                         [0, 1, 2, 3, 4, 5, None])
+        self.assertEqual(len(self.collection), 7)
+        self.assertEqual(self.collection.bounds, (0, 0, 9, 9))
+        self.assertEqual(columns[-1].properties,
+                         {'name': None, 'lanes': None, 'category': None,
+                          'other': 1})
+        self.assertEqual(len(columns[1:3]), 2)
+        self.assertRaises(IndexError, columns.__getitem__, 7)
+
+    def test_features(self):
+        features = list(self.collection.features)
+        self.assertEqual(len(features), 7)
+        self.assertEqual(features[3].properties,
+                         {'name': 'f3', 'lanes': 3, 'category': 'road',
+                          'other': None})
+        self.assertEqual(features[3].geometry.coords, ((3, 3),))
+        gi = self.collection.__geo_interface__
+        self.assertEqual(gi['features'][0]['properties']['name'], 'f0')
+
+    def test_filter(self):
+        for collection in (self.collection,
+                           geometry.FeatureCollection(self.features)):
+            roads = collection.filter("category == 'road' and lanes > 1")
+            self.assertEqual(roads.columnar, collection.columnar)
+            self.assertEqual([f.properties['name'] for f in roads.features],
+                             ['f3', 'f5'])
+            self.assertEqual(len(collection.filter(
+                'len(name or "") > 1')), 6)
+            self.assertEqual(len(collection.filter('True')), 7)
+            self.assertEqual(len(collection.filter(
+                lambda properties: properties.get('other'))), 1)
+            self.assertEqual(roads.bounds, (3, 3, 5, 5))
+
+    def test_filter_expressions(self):
+        for collection in (self.collection,
+                           geometry.FeatureCollection(self.features)):
+            self.assertEqual(len(collection.filter('unknown is None')), 7)
+            self.assertEqual(len(collection.filter('missing == 1')), 0)
+            self.assertEqual(len(collection.filter(
+                "category in ('road', 'rail') and -lanes + 1 < 0")), 4)
+            self.assertEqual(len(collection.filter(
+                'max(lanes or 0, 2) == 2')), 4)
+            for predicate in ("__import__('os').getcwd()",
+                              'name.upper()', 'lanes[0]',
+                              "open('/etc/passwd')", 'len(name, x=1)',
+                              '[x for x in name]', 'lambda: 1',
+                              'str.lower(name)', 'lanes ** 9'):
+                self.assertRaises(ValueError, collection.filter, predicate)
+            self.assertRaises(SyntaxError, collection.filter, 'lanes >')
+
+    def test_select(self):
+        for collection in (self.collection,
+                           geometry.FeatureCollection(self.features)):
+            names = collection.select(['name'])
+            self.assertEqual(names.columnar, collection.columnar)
+            self.assertEqual([f.properties for f in names.features][:2],
+                             [{'name': 'f0'}, {'name': 'f1'}])
+            self.assertEqual(len(names), 7)
+
+    def test_append_remove(self):
+        self.collection.bounds
+        self.collection.append(
+            geometry.Feature(geometry.Point(-1, -1), {'new': 2}))
+        self.assertEqual(self.collection.bounds, (-1, -1, 9, 9))
+        self.assertEqual(self.collection._features.column('new'),
+                         [None] * 7 + [2])
+        self.collection.remove(list(self.collection.features)[0])
+        self.assertEqual(len(self.collection), 7)
+        self.assertEqual(self.collection.bounds, (-1, -1, 9, 9))
+        self.assertEqual(self.collection._features.column('lanes')[0], 1)
+
+    def test_sorted_spatially(self):
+        ordered = self.collection.sorted_spatially()
+        self.assertTrue(ordered.columnar)
+        self.assertEqual(len(ordered), 7)
+
+    def test_pickle(self):
+        copy = pickle.loads(pickle.dumps(self.collection))
+        self.assertEqual(copy.__geo_interface__,
+                         self.collection.__geo_interface__)
+
+
+class IndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.features = [
+            geometry.Feature(
+                geometry.LineString([(i % 20, i // 20),
+                                     (i % 20 + 1, i // 20 + 1)]),
+                {'id': i, 'category': ('road', 'rail', 'river')[i % 3],
+                 'lanes': i % 7})
+            for i in range(400)]
+        self.collection = geometry.FeatureCollection(self.features)
+
+    def scan(self, collection, bbox=None, **conditions):
+        ids = []
+        for feature in collection.features:
+            bounds = feature.geometry.bounds
+            if bbox and (bounds[0] > bbox[2] or bounds[1] > bbox[3] or
+                         bounds[2] < bbox[0] or bounds[3] < bbox[1]):
+                continue
+            if all(geometry._matches(feature.properties.get(key), value)
+                   for key, value in conditions.items()):
+                ids.append(feature.properties['id'])
+        return ids
+
+    def assertQueries(self, collection):
+        for query in [dict(category='road', bbox=(5, 5, 8, 9)),
+                      dict(bbox=(5, 5, 8, 9)), dict(id=17),
+                      dict(lanes=slice(2, 4), category='rail'),
+                      dict(lanes=[1, 5], bbox=(0, 0, 10, 10)),
+                      dict(category='ferry'), dict(id=slice(100, 120)),
+                      dict(lanes=3)]:
+            self.assertEqual(
+                [f.properties['id'] for f in collection.where(**query)
+                 .features], self.scan(collection, **query))
+
+    def test_features_without_geometry(self):
+        for collection in (
+                geometry.FeatureCollection(
+                    [geometry.Feature(geometry.Point(0, 0)),
+                     geometry.Feature(None, {'a': 1}),
+                     geometry.Feature(geometry.Point(2, 3))]),
+                geometry.FeatureCollection(geometry.FeatureColumns(
+                    [geometry.Point(0, 0), None, geometry.Point(2, 3)],
+                    {'a': [None, 1, None]}))):
+            self.assertEqual(collection.bounds, (0, 0, 2, 3))
+            ordered = collection.sorted_spatially()
+            self.assertEqual(len(ordered), 3)
+            self.assertEqual(list(ordered.features)[-1].geometry, None)
+            self.assertEqual(len(collection.where(bbox=(0, 0, 1, 1))), 1)
+            collection.create_index('a')
+            self.assertEqual(len(collection.where(a=1, bbox=(0, 0, 3, 3))),
+                             0)
+        collection = geometry.FeatureCollection(
+            [geometry.Feature(None, {'a': 1})])
+        self.assertEqual(collection.bounds, None)
+        self.assertEqual(len(collection.where(bbox=(0, 0, 1, 1))), 0)
+
+    def test_packed_rtree(self):
+        bounds = [(i % 50, i // 50, i % 50 + 2, i // 50 + 2)
+                  if i % 7 else None for i in range(2500)]
+        tree = geometry._PackedRTree(bounds)
+        self.assertEqual(len(tree.levels[-1]), 4)
+        self.assertEqual(sorted(tree.search(10, 10, 12, 11)),
+                         [i for i, b in enumerate(bounds) if b and
+                          b[0] <= 12 and b[1] <= 11 and b[2] >= 10 and
+                          b[3] >= 10])
+        self.assertEqual(tree.search(100, 100, 101, 101), [])
+        self.assertEqual(geometry._PackedRTree([]).search(0, 0, 1, 1), [])
+
+    def test_where(self):
+        self.assertQueries(self.collection)
+        self.collection.create_index('category')
+        self.collection.create_index('lanes', 'sorted')
+        self.collection.create_index('id', kind='sorted')
+        self.assertEqual(self.collection.indexes,
+                         {'category': 'hash', 'lanes': 'sorted',
+                          'id': 'sorted'})
+        self.assertQueries(self.collection)
+        self.assertRaises(ValueError, self.collection.create_index,
+                          'id', 'btree')
+        self.collection.drop_index('id')
+        self.assertQueries(self.collection)
+
+    def test_repeated_values(self):
+        self.collection.create_index('category')
+        self.collection.create_index('lanes', 'sorted')
+        roads = len(self.collection.where(category='road'))
+        self.assertEqual(len(self.collection.where(
+            category=['road', 'road'])), roads)
+        self.assertEqual(len(self.collection.where(
+            category=['road', 'rail', 'road'])),
+            len(self.collection.where(category=['rail', 'road'])))
+        self.assertEqual(len(self.collection.where(lanes=[2, 2.0, 2])),
+                         len(self.collection.where(lanes=2)))
+
+    def test_columnar(self):
+        collection = geometry.FeatureCollection(self.features, True)
+        collection.create_index('category')
+        collection.create_index('lanes', 'sorted')
+        result = collection.where(category='road', bbox=(0, 0, 3, 3))
+        self.assertTrue(result.columnar)
+        self.assertQueries(collection)
+
+    def test_append_remove(self):
+        self.collection.create_index('category')
+        self.collection.create_index('lanes', 'sorted')
+        self.assertQueries(self.collection)
+        self.collection.append(geometry.Feature(
+            geometry.Point(0.5, 0.5),
+            {'id': 1000, 'category': 'road', 'lanes': 3}))
+        self.assertEqual(
+            [f.properties['id'] for f in self.collection.where(
+                category='road', lanes=3, bbox=(0, 0, 1, 1)).features],
+            [1000])
+        self.assertQueries(self.collection)
+        self.collection.remove(self.features[0])
+        self.assertQueries(self.collection)
+
+
+class CopyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.polygon = geometry.Polygon(
+            [(0, 0), (0, 2), (2, 2), (2, 0)],
+            [[(0.5, 0.5), (1, 0.5), (1, 1)]])
+
+    def test_linestring(self):
+        line = geometry.LineString([(0, 0), (1, 1)])
+        for other in (line.copy(), copy.copy(line),
+                      geometry.LineString(line)):
+            self.assertTrue(other._coords is line._coords)
+            self.assertEqual(other.coords, line.coords)
+            self.assertEqual(type(other), geometry.LineString)
+        other.coords = [(2, 2), (3, 3)]
+        self.assertEqual(line.coords, ((0, 0), (1, 1)))
+        ring = geometry.LinearRing(self.polygon.exterior)
+        self.assertTrue(ring._coords is self.polygon.exterior._coords)
+
+    def test_copy_on_write(self):
+        other = copy.copy(self.polygon)
+        self.assertTrue(other.exterior._coords is
+                        self.polygon.exterior._coords)
+        geometry.normalize_orientation(other)
+        self.assertEqual(self.polygon.exterior.coords,
+                         ((0, 0), (0, 2), (2, 2), (2, 0), (0, 0)))
+        self.assertEqual(other.exterior.coords,
+                         ((0, 0), (2, 0), (2, 2), (0, 2), (0, 0)))
+        geometry.normalize_orientation(self.polygon)
+        self.assertEqual(self.polygon.wkt, other.wkt)
+
+    def test_multipoint(self):
+        points = geometry.MultiPoint([(0, 0), (1, 1)])
+        other = copy.copy(points)
+        self.assertEqual(type(other), geometry.MultiPoint)
+        self.assertTrue(other._coords is points._coords)
+        other.append((5, 5))
+        self.assertEqual(len(points), 2)
+        self.assertEqual(len(other), 3)
+        points.remove((0, 0))
+        self.assertEqual(other.coords, ((0, 0), (1, 1), (5, 5)))
+
+    def test_shared_buffer(self):
+        coords = array('d', [0, 0, 0, 2, 2, 2, 0, 0])
+        polygon = geometry.Polygon(memoryview(coords))
+        other = polygon.copy()
+        geometry.normalize_orientation(other)
+        geometry.normalize_orientation(polygon, False)
+        self.assertEqual(list(coords), [0, 0, 0, 2, 2, 2, 0, 0])
+        self.assertNotEqual(other.exterior.coords, polygon.exterior.coords)
+
+    def test_collections(self):
+        polygons = geometry.MultiPolygon([self.polygon, self.polygon])
+        self.assertTrue(polygons.geoms[0].exterior._coords is
+                        self.polygon.exterior._coords)
+        other = polygons.copy()
+        self.assertEqual(other.wkt, polygons.wkt)
+        other.append(geometry.Polygon([(5, 5), (6, 6), (6, 5)]))
+        self.assertEqual(len(polygons), 2)
+        self.assertEqual(other.bounds, (0, 0, 6, 6))
+        self.assertEqual(polygons.bounds, (0, 0, 2, 2))
+        collection = geometry.GeometryCollection([self.polygon,
+                                                  geometry.Point(1, 1)])
+        other = copy.copy(collection)
+        self.assertEqual(other.wkt, collection.wkt)
+        self.assertFalse(other.geoms[1] is collection.geoms[1])
+
+    def test_features(self):
+        feature = geometry.Feature(self.polygon, {'name': 'a'})
+        other = copy.copy(feature)
+        other.properties['name'] = 'b'
+        self.assertEqual(feature.properties, {'name': 'a'})
+        for columnar in (False, True):
+            collection = geometry.FeatureCollection([feature], columnar)
+            collection.create_index('name')
+            other = collection.copy()
+            self.assertEqual(other.columnar, columnar)
+            self.assertEqual(other.indexes, {'name': 'hash'})
+            self.assertEqual(other.__geo_interface__,
+                             collection.__geo_interface__)
+            other.append(geometry.Feature(geometry.Point(0, 0),
+                                          {'name': 'a'}))
+            self.assertEqual(len(other.where(name='a')), 2)
+            self.assertEqual(len(collection.where(name='a')), 1)
+
+    def test_pickle(self):
+        other = pickle.loads(pickle.dumps(self.polygon.copy()))
+        self.assertFalse(other.exterior._shared)
+        self.assertEqual(other.wkt, self.polygon.wkt)
+
+
+class PrecisionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = geometry.PrecisionModel()
+
+    def tearDown(self):
+        geometry.set_default_precision(None)
+
+    def test_model(self):
+        self.assertEqual(self.model.encode(13.4), 134000000)
+        self.assertEqual(self.model.decode(134000000), 13.4)
+        self.assertEqual(self.model.snap((13.40000004, 52.52000006)),
+                         [13.4, 52.5200001])
+        model = geometry.PrecisionModel(0.5, (10, 20), 'q')
+        self.assertEqual(model.offset, (10.0, 20.0, 0.0))
+        self.assertEqual(model.snap((10.7, 19.2)), [10.5, 19.0])
+        self.assertEqual(model, geometry.PrecisionModel(0.5, (10, 20), 'q'))
+        self.assertNotEqual(model, self.model)
+        self.assertRaises(ValueError, geometry.PrecisionModel, 1, (0, 0),
+                          'd')
+        self.assertRaises(ValueError, geometry.PrecisionModel, 0)
+
+    def test_linestring(self):
+        line = geometry.LineString([(13.40000004, 52.5), (13.41, 52.52),
+                                    (-180, -90)])
+        self.assertEqual(line.precision, None)
+        self.assertTrue(geometry.set_precision(line, self.model) is line)
+        self.assertEqual(line.precision, self.model)
+        self.assertEqual(line._coords._values.itemsize, 4)
+        self.assertEqual(line.coords,
+                         ((13.4, 52.5), (13.41, 52.52), (-180, -90)))
+        self.assertEqual(line.coords[1], (13.41, 52.52))
+        self.assertEqual(list(line.geoms)[0].x, 13.4)
+        self.assertEqual(line.bounds, (-180, -90, 13.41, 52.52))
+        self.assertEqual(line.wkt,
+                         'LINESTRING (13.4 52.5, 13.41 52.52, -180.0 -90.0)')
+        self.assertEqual(line.coords_buffer.tolist()[0], [13.4, 52.5])
+        self.assertEqual(pickle.loads(pickle.dumps(line)).wkt, line.wkt)
+        geometry.set_precision(line, None)
+        self.assertEqual(line.precision, None)
+        self.assertEqual(line.coords[0], (13.4, 52.5))
+        self.assertRaises(OverflowError, geometry.set_precision,
+                          geometry.LineString([(1e3, 0), (0, 0)]),
+                          self.model)
+
+    def test_polygon(self):
+        polygon = geometry.Polygon([(0, 0), (0, 2), (2, 2), (2, 0)],
+                                   [[(0.5, 0.5), (1, 0.5), (1, 1)]])
+        geometry.set_precision(polygon, self.model)
+        oriented = geometry.orient(polygon)
+        self.assertEqual(oriented.exterior.precision, self.model)
+        geometry.normalize_orientation(polygon)
+        self.assertEqual(polygon.wkt, oriented.wkt)
+        self.assertEqual(list(polygon.interiors)[0].precision, self.model)
+
+    def test_multipoint(self):
+        points = geometry.MultiPoint([(0.123, 0.456), (0.123, 0.456)])
+        geometry.set_precision(points, geometry.PrecisionModel(0.01))
+        self.assertEqual(points.coords, ((0.12, 0.46), (0.12, 0.46)))
+        points.unique()
+        self.assertEqual(points.wkt, 'MULTIPOINT(0.12 0.46)')
+        points.append((3.333, 4.444))
+        self.assertEqual(points.bounds, (0.12, 0.46, 3.33, 4.44))
+        points.remove((3.3333, 4.4444))
+        self.assertEqual(len(points), 1)
+        self.assertEqual(points.precision, geometry.PrecisionModel(0.01))
+
+    def test_collections(self):
+        collection = geometry.FeatureCollection([
+            geometry.Feature(geometry.MultiLineString(
+                [[(0.111, 0), (1, 1)], [(2, 2), (3.336, 3)]]), {}),
+            geometry.Feature(geometry.Point(1.234, 5.678), {})])
+        self.assertEqual(collection.bounds, (0.111, 0, 3.336, 5.678))
+        geometry.set_precision(collection, geometry.PrecisionModel(0.01))
+        self.assertEqual(collection.bounds, (0.11, 0, 3.34, 5.68))
+
+    def test_default_precision(self):
+        self.assertEqual(geometry.set_default_precision(
+            geometry.PrecisionModel(0.01)), None)
+        self.assertEqual(geometry.Point(1.234, 5.678).wkt, 'POINT (1.23 5.68)')
+        points = geometry.from_wkt('MULTIPOINT(0.123 0.456, 1 2)')
+        self.assertEqual(points.coords, ((0.12, 0.46), (1, 2)))
+        polygon = geometry.from_wkt(
+            'POLYGON((0.111 0.222, 1.119 1, 1 0, 0.111 0.222))')
+        self.assertEqual(polygon.exterior.coords,
+                         ((0.11, 0.22), (1.12, 1), (1, 0), (0.11, 0.22)))
+        wkb = struct.pack('<BI2d', 1, 1, 1.234, 5.678)
+        self.assertEqual(geometry.from_wkb(wkb).wkt, 'POINT (1.23 5.68)')
+        point = geometry.Point(0, 0)
+        point.coords = (1.234, 5.678, 9.1011)
+        self.assertEqual(point.coords,
+                         geometry.Point(1.234, 5.678, 9.1011).coords)
+        point.coords = [1.234, 5.678]
+        self.assertEqual(point.wkt, 'POINT (1.23 5.68)')
+        line = geometry.LineString([(0, 0), (1, 1)])
+        line.coords = [(0.123, 0.456), (1, 1)]
+        self.assertEqual(line.coords, ((0.12, 0.46), (1, 1)))
+        geometry.set_default_precision(None)
+        self.assertEqual(geometry.LineString([(0.123, 0.4), (1, 1)]).wkt,
+                         'LINESTRING (0.123 0.4, 1.0 1.0)')
+
+
+class TWKBTestCase(unittest.TestCase):
+
+    def test_reference(self):
+        # examples from the PostGIS ST_AsTWKB documentation
+        self.assertEqual(geometry.Point(1, 2).to_twkb(), b'\x01\x00\x02\x04')
+        l = geometry.LineString([(1, 1), (5, 5)])
+        self.assertEqual(binascii.hexlify(l.to_twkb(bbox=True, size=True)),
+                         b'020309020802080202020808')
+        self.assertEqual(geometry.from_twkb('02000202020808').coords,
+                         ((1.0, 1.0), (5.0, 5.0)))
+
+    def test_round_half_away(self):
+        # like PostGIS, halves are rounded away from zero
+        self.assertEqual(
+            binascii.hexlify(geometry.Point(1.5, 2.5).to_twkb()),
+            b'01000406')
+        self.assertEqual(
+            geometry.from_twkb(geometry.Point(-0.5, 0.25).to_twkb(1)).coords,
+            ((-0.5, 0.3),))
+
+    def test_round_trip(self):
+        geoms = [
+            geometry.Point(1.25, -2.5),
+            geometry.Point(1, 2, 3),
+            geometry.LineString([(0, 0), (1.5, 2.25), (3, -1)]),
+            geometry.LineString([(0, 0, 1), (1, 1, 2)]),
+            geometry.Polygon([(0, 0), (0, 10), (10, 10), (10, 0)],
+                             [[(1, 1), (2, 1), (2, 2)]]),
+            geometry.MultiPoint([(1, 2), (3, 4)]),
+            geometry.MultiLineString([[(0, 0), (1, 1)], [(2, 2), (3, 3)]]),
+            geometry.MultiPolygon([([(0, 0), (0, 1), (1, 1)], []),
+                                   ([(5, 5), (5, 6), (6, 6)], [])]),
+            geometry.GeometryCollection(
+                [geometry.Point(1, 2),
+                 geometry.LineString([(0, 0), (1, 1)])]),
+            geometry.GeometryCollection(
+                [geometry.Point(1, 2, 3),
+                 geometry.LineString([(0, 0, 1), (5, 5, 2)])]),
+            geometry.GeometryCollection([]),
+        ]
+        for geom in geoms:
+            for bbox in (False, True):
+                twkb = geom.to_twkb(precision=2, bbox=bbox, size=bbox)
+                self.assertEqual(geometry.from_twkb(twkb).wkt, geom.wkt)
+            hex_twkb = binascii.hexlify(geom.to_twkb(2)).decode('ascii')
+            self.assertEqual(geometry.from_twkb(hex_twkb).wkt, geom.wkt)
+
+    def test_precision(self):
+        p = geometry.Point(1.123456, 2.5)
+        self.assertEqual(geometry.from_twkb(p.to_twkb(3)).coords,
+                         ((1.123, 2.5),))
+        p = geometry.Point(1234, 5678, 1.26)
+        self.assertEqual(
+            geometry.from_twkb(p.to_twkb(-2, z_precision=1)).coords,
+            ((1200.0, 5700.0, 1.3),))
+        self.assertRaises(ValueError, p.to_twkb, 8)
+        self.assertRaises(ValueError, p.to_twkb, 0, -1)
+
+    def test_deltas(self):
+        l = geometry.LineString([(1000000, 1000000), (1000001, 1000002)])
+        # the second point is stored as the delta (1, 2)
+        self.assertEqual(l.to_twkb()[-2:], b'\x02\x04')
+
+    def test_ids(self):
+        mp = geometry.MultiPoint([(1, 2), (3, 4)])
+        geom, ids = geometry.from_twkb(mp.to_twkb(ids=[10, -3]),
+                                       with_ids=True)
+        self.assertEqual(geom.wkt, mp.wkt)
+        self.assertEqual(ids, [10, -3])
+        self.assertEqual(geometry.from_twkb(mp.to_twkb(), with_ids=True)[1],
+                         None)
+        gc = geometry.GeometryCollection([geometry.Point(0, 0)])
+        self.assertEqual(
+            geometry.from_twkb(gc.to_twkb(ids=[7]), with_ids=True)[1], [7])
+        self.assertRaises(ValueError, mp.to_twkb, 0, 0, False, False, [1])
+
+    def test_collection_bbox(self):
+        gc = geometry.GeometryCollection(
+            [geometry.Point(1, 2, 3),
+             geometry.LineString([(0, 0, 1), (5, 5, 2)])])
+        twkb = gc.to_twkb(bbox=True)
+        # no z flag, so only the x and y ranges precede the 2 parts
+        self.assertEqual(twkb[:8], b'\x07\x01\x00\x0a\x00\x0a\x02\x01')
+        self.assertEqual(geometry.from_twkb(twkb).wkt, gc.wkt)
+
+    def test_empty(self):
+        for gtype in range(1, 8):
+            empty = geometry._empty_geometry(gtype, 2)
+            twkb = empty.to_twkb(bbox=True)
+            self.assertEqual(ord(twkb[1:2]) & 0x10, 0x10)
+            self.assertEqual(len(twkb), 2)
+            self.assertEqual(type(geometry.from_twkb(twkb)), type(empty))
+
+    def test_zm(self):
+        # LINESTRING ZM (0 0 1 9, 1 1 2 9), the M values are dropped
+        twkb = b'\x02\x08\x03\x02\x00\x00\x02\x12\x02\x02\x02\x00'
+        self.assertEqual(geometry.from_twkb(twkb).coords,
+                         ((0.0, 0.0, 1.0), (1.0, 1.0, 2.0)))
+
+
+class PolylineTestCase(unittest.TestCase):
+
+    def test_reference(self):
+        # example from the Google polyline algorithm documentation
+        polyline = '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+        l = geometry.LineString.from_polyline(polyline)
+        self.assertEqual(l.coords, ((-120.2, 38.5), (-120.95, 40.7),
+                                    (-126.453, 43.252)))
+        self.assertEqual(l.to_polyline(), polyline)
+        self.assertEqual(
+            geometry.LineString.from_polyline(polyline.encode('ascii')).coords,
+            l.coords)
+
+    def test_precision(self):
+        l = geometry.LineString([(13.388798, 52.517033), (-0.000001, 0)])
+        polyline = l.to_polyline(6)
+        self.assertEqual(geometry.LineString.from_polyline(polyline, 6).coords,
+                         l.coords)
+        self.assertEqual(geometry.LineString.from_polyline(polyline).coords,
+                         ((133.88798, 525.17033), (-1e-05, 0.0)))
+        l = geometry.LineString([(1, 2, 3), (4, 5, 6)])
+        self.assertEqual(geometry.LineString.from_polyline(
+            l.to_polyline()).coords, ((1.0, 2.0), (4.0, 5.0)))
+
+    def test_rounding(self):
+        # halves are rounded away from zero, not to even
+        l = geometry.LineString([(2.5, -2.5), (0.5, -0.5)])
+        self.assertEqual(
+            geometry.LineString.from_polyline(l.to_polyline(0), 0).coords,
+            ((3.0, -3.0), (1.0, -1.0)))
+        self.assertEqual(geometry._round_half_away(-1.5), -2)
+        self.assertEqual(geometry._round_half_away(-1.4), -1)
+
+    def test_ring(self):
+        r = geometry.LinearRing([(0, 0), (0, 1), (1, 1)])
+        r2 = geometry.LinearRing.from_polyline(r.to_polyline())
+        self.assertTrue(isinstance(r2, geometry.LinearRing))
+        self.assertEqual(r2.coords, r.coords)
+
+    def test_multilinestring(self):
+        ml = geometry.MultiLineString([[(0, 0), (1, 1)],
+                                       [(2.5, -2.5), (3, 3), (4, 4)]])
+        polylines = ml.to_polylines()
+        self.assertEqual(len(polylines), 2)
+        self.assertEqual(geometry.MultiLineString.from_polylines(
+            polylines).wkt, ml.wkt)
+        self.assertEqual(
+            geometry.MultiLineString.from_polylines(iter(polylines)).bounds,
+            ml.bounds)
+
+    def test_truncated(self):
+        self.assertRaises(ValueError, geometry.LineString.from_polyline,
+                          '_p~iF~ps|U_ulLnnqC_mqNvxq')
+        self.assertEqual(geometry.LineString.from_polyline('').coords, ())
+
+
+class FlatGeobufTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.fgb')
+        os.close(fd)
+        self.features = [
+            geometry.Feature(geometry.Point(1, 2),
+                             {'a': 1, 'b': 'x', 'c': 1.5, 'd': True,
+                              'e': {'k': [1]}}),
+            geometry.Feature(geometry.LineString([(0, 0), (1, 1)]),
+                             {'a': 2, 'b': None}),
+            geometry.Feature(geometry.Polygon(
+                [(0, 0), (0, 10), (10, 10), (10, 0)],
+                [[(1, 1), (2, 1), (2, 2)]]), {}),
+            geometry.Feature(geometry.MultiPoint([(1, 2), (3, 4)]), {}),
+            geometry.Feature(geometry.MultiLineString(
+                [[(0, 0), (1, 1)], [(2, 2), (3, 3)]]), {}),
+            geometry.Feature(geometry.MultiPolygon(
+                [([(0, 0), (0, 1), (1, 1)], []),
+                 ([(5, 5), (5, 6), (6, 6)],
+                  [[(5.1, 5.5), (5.2, 5.5), (5.2, 5.6)]])]), {}),
+            geometry.Feature(geometry.GeometryCollection(
+                [geometry.Point(1, 2),
+                 geometry.LineString([(0, 0), (1, 1)])]), {}),
+            geometry.Feature(geometry.LineString([(0, 0, 1), (1, 1, 2)]),
+                             {}),
+        ]
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def key(self, feature):
+        properties = sorted((k, v) for k, v in feature.properties.items()
+                            if v is not None)
+        return feature.geometry.wkt + repr(properties)
+
+    def test_round_trip(self):
+        for node_size in (16, 2, 0):
+            flatgeobuf.write_features(
+                self.path, geometry.FeatureCollection(self.features),
+                name='test', index_node_size=node_size, crs=4326)
+            with flatgeobuf.FlatGeobufReader(self.path) as reader:
+                self.assertEqual(reader.name, 'test')
+                self.assertEqual(reader.crs, 4326)
+                self.assertEqual(reader.geometry_type, None)
+                self.assertTrue(reader.has_z)
+                self.assertEqual(reader.bounds, (0.0, 0.0, 10.0, 10.0))
+                self.assertEqual(reader.columns,
+                                 [('a', 'Long'), ('b', 'String'),
+                                  ('c', 'Double'), ('d', 'Bool'),
+                                  ('e', 'Json')])
+                self.assertEqual(len(reader), 8)
+                self.assertEqual(sorted(self.key(f) for f in reader),
+                                 sorted(self.key(f) for f in self.features))
+                self.assertEqual(self.key(reader[-1]),
+                                 self.key(reader[len(reader) - 1]))
+                self.assertRaises(IndexError, reader.__getitem__, 8)
+        # without an index the order is kept
+        with flatgeobuf.FlatGeobufReader(self.path) as reader:
+            self.assertEqual(reader[0].properties['e'], {'k': [1]})
+            self.assertRaises(ValueError, reader.search, 0, 0, 1, 1)
+
+    def test_bbox(self):
+        for node_size in (16, 0):
+            flatgeobuf.write_features(self.path, self.features,
+                                      index_node_size=node_size)
+            found = [f.geometry.geom_type for f in flatgeobuf.iter_features(
+                self.path, bbox=(4, 4, 7, 7))]
+            self.assertEqual(sorted(found), ['MultiPolygon', 'Polygon'])
+
+    def test_search(self):
+        points = [geometry.Point((i * 37) % 101, (i * 53) % 103)
+                  for i in range(1000)]
+        flatgeobuf.write_features(self.path, points, index_node_size=4)
+        with flatgeobuf.FlatGeobufReader(self.path) as reader:
+            self.assertEqual(reader.geometry_type, 'Point')
+            for box in [(0, 0, 10, 10), (50, 20, 70, 90), (-5, -5, -1, -1)]:
+                expected = sorted(
+                    (p.x, p.y) for p in points
+                    if box[0] <= p.x <= box[2] and box[1] <= p.y <= box[3])
+                found = sorted((f.geometry.x, f.geometry.y)
+                               for f in reader.features(bbox=box))
+                self.assertEqual(found, expected)
+                self.assertEqual(len(reader.search(*box)), len(expected))
+
+    def test_empty(self):
+        features = [geometry.Feature(geometry._empty_geometry(2, 2), {}),
+                    geometry.Feature(geometry.Point(1, 1), {})]
+        flatgeobuf.write_features(self.path, features)
+        with flatgeobuf.FlatGeobufReader(self.path) as reader:
+            self.assertEqual(len(reader), 2)
+            self.assertEqual(reader.search(-10, -10, 10, 10), [0])
+            self.assertEqual(reader[1].geometry.coords, ())
+        flatgeobuf.write_features(self.path, [])
+        self.assertEqual(list(flatgeobuf.iter_features(self.path)), [])
+
+    def test_no_properties(self):
+        features = [geometry.Feature(geometry.Point(1, 1), None),
+                    geometry.Feature(geometry.Point(2, 2), {'a': 1})]
+        flatgeobuf.write_features(self.path, features, index_node_size=0)
+        with flatgeobuf.FlatGeobufReader(self.path) as reader:
+            self.assertEqual(reader.columns, [('a', 'Long')])
+            self.assertEqual([f.properties for f in reader], [{}, {'a': 1}])
+
+    def test_single_feature(self):
+        flatgeobuf.write_features(self.path, self.features[:1])
+        with flatgeobuf.FlatGeobufReader(self.path) as reader:
+            # a leaf and the root, 40 bytes each
+            self.assertEqual(reader._levels, [(1, 2), (0, 1)])
+            self.assertEqual(reader._start - reader._index, 80)
+            self.assertEqual(reader.search(0, 0, 5, 5), [0])
+            self.assertEqual(reader.search(5, 5, 6, 6), [])
+            self.assertEqual(self.key(reader[0]), self.key(self.features[0]))
+        tree = geometry._PackedRTree([(1, 2, 1, 2)])
+        self.assertEqual(len(tree.levels), 2)
+        self.assertEqual(tree.search(0, 0, 5, 5), [0])
+
+    def test_not_flatgeobuf(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'POINT (0 0)')
+        self.assertRaises(ValueError, flatgeobuf.FlatGeobufReader,
+                          self.path)
+
+
+class GeoPackageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        import sqlite3
+        fd, self.path = tempfile.mkstemp(suffix='.gpkg')
+        os.close(fd)
+        db = sqlite3.connect(self.path)
+        db.execute('CREATE TABLE gpkg_geometry_columns (table_name TEXT, '
+                   'column_name TEXT, geometry_type_name TEXT, '
+                   'srs_id INTEGER, z TINYINT, m TINYINT)')
+        db.execute("INSERT INTO gpkg_geometry_columns VALUES "
+                   "('points', 'geom', 'POINT', 4326, 0, 0)")
+        db.execute('CREATE TABLE points (fid INTEGER PRIMARY KEY, '
+                   'geom BLOB, name TEXT)')
+        db.execute('CREATE VIRTUAL TABLE rtree_points_geom USING '
+                   'rtree(id, minx, maxx, miny, maxy)')
+        for i in range(100):
+            x, y = i % 10, i // 10
+            wkb = struct.pack('<BIdd', 1, 1, x, y)
+            if i % 2:
+                # big endian header with an envelope
+                blob = b'GP\x00\x02' + struct.pack('>i4d', 4326, x, x, y, y)
+            else:
+                blob = b'GP\x00\x01' + struct.pack('<i', 4326)
+            db.execute('INSERT INTO points VALUES (?, ?, ?)',
+                       (i + 1, blob + wkb, 'p{0}'.format(i)))
+            db.execute('INSERT INTO rtree_points_geom VALUES (?, ?, ?, ?, ?)',
+                       (i + 1, x, x, y, y))
+        db.execute('INSERT INTO points VALUES (101, NULL, ?)', ('none', ))
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_features(self):
+        with geopackage.GeoPackageReader(self.path) as reader:
+            self.assertEqual(reader.tables(), ['points'])
+            self.assertEqual(reader.srs_id('points'), 4326)
+            features = list(reader.features(batch_size=7))
+            self.assertEqual(len(features), 101)
+            self.assertEqual(features[12].geometry.coords, ((2.0, 1.0),))
+            self.assertEqual(features[12].properties,
+                             {'fid': 13, 'name': 'p12'})
+            self.assertEqual(features[100].geometry, None)
+            self.assertRaises(ValueError, list, reader.features('lines'))
+
+    def test_bbox(self):
+        features = list(geopackage.iter_features(
+            self.path, 'points', bbox=(2.5, 3, 4, 4.5)))
+        self.assertEqual(sorted(f.geometry.coords[0] for f in features),
+                         [(3.0, 3.0), (3.0, 4.0), (4.0, 3.0), (4.0, 4.0)])
+        # without the rtree the envelope or the WKB is checked
+        import sqlite3
+        db = sqlite3.connect(self.path)
+        db.execute('DROP TABLE rtree_points_geom')
+        db.commit()
+        db.close()
+        self.assertEqual(len(list(geopackage.iter_features(
+            self.path, bbox=(2.5, 3, 4, 4.5)))), 4)
+
+    def test_from_gpkg(self):
+        blob = b'GP\x00\x01' + struct.pack('<iBIdd', 0, 1, 1, 1, 2)
+        self.assertEqual(geopackage.from_gpkg(blob).coords, ((1.0, 2.0),))
+        self.assertRaises(ValueError, geopackage.from_gpkg, blob[2:])
+        self.assertRaises(ValueError, geopackage.from_gpkg,
+                          b'GP\x00\x21' + blob[4:])
+
+    def test_special_characters(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'a?b#c%20 d.gpkg')
+        with open(self.path, 'rb') as source:
+            with open(path, 'wb') as target:
+                target.write(source.read())
+        try:
+            self.assertEqual(
+                len(list(geopackage.iter_features(path, 'points'))), 101)
+        finally:
+            os.remove(path)
+            os.rmdir(directory)
+
+    def test_not_geopackage(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a database' * 100)
+        self.assertRaises(ValueError, geopackage.GeoPackageReader,
+                          self.path)
+
+
+class ShapefileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test')
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def write_read(self, geometries, properties=None):
+        features = [geometry.Feature(geom, (properties or {}).copy())
+                    for geom in geometries]
+        shapefile.write_features(self.path + '.shp', features)
+        with shapefile.ShapefileReader(self.path) as reader:
+            return reader.shape_type, [f.geometry for f in reader]
+
+    def test_points(self):
+        points = [geometry.Point(1, 2), geometry.Point(3, 4)]
+        shape_type, geoms = self.write_read(points)
+        self.assertEqual(shape_type, 'Point')
+        self.assertEqual([g.wkt for g in geoms], [p.wkt for p in points])
+        shape_type, geoms = self.write_read(
+            [geometry.Point(1, 2, 3), geometry.Point(3, 4)])
+        self.assertEqual([g.coords for g in geoms],
+                         [((1.0, 2.0, 3.0),), ((3.0, 4.0, 0.0),)])
+        mp = geometry.MultiPoint([(1, 2, 3), (3, 4, 5)])
+        shape_type, geoms = self.write_read([mp])
+        self.assertEqual(shape_type, 'MultiPoint')
+        self.assertEqual(geoms[0].wkt, mp.wkt)
+
+    def test_lines(self):
+        lines = [geometry.LineString([(0, 0, 1), (1, 1, 2)]),
+                 geometry.MultiLineString([[(0, 0), (1, 1)],
+                                           [(2, 2), (3, 3)]])]
+        shape_type, geoms = self.write_read(lines)
+        self.assertEqual(shape_type, 'PolyLine')
+        self.assertEqual(geoms[0].wkt, lines[0].wkt)
+        self.assertEqual(geoms[1].geom_type, 'MultiLineString')
+        self.assertEqual(geoms[1].geoms[1].coords,
+                         ((2.0, 2.0, 0.0), (3.0, 3.0, 0.0)))
+
+    def test_polygons(self):
+        # counterclockwise exterior and clockwise hole are reversed
+        polygon = geometry.Polygon([(0, 0), (10, 0), (10, 10), (0, 10)],
+                                   [[(1, 1), (1, 2), (2, 2)]])
+        multi = geometry.MultiPolygon(
+            [([(0, 0), (0, 1), (1, 1)], []),
+             ([(5, 5), (5, 6), (6, 6)],
+              [[(5.1, 5.5), (5.2, 5.5), (5.2, 5.6)]])])
+        shape_type, geoms = self.write_read([polygon, multi])
+        self.assertEqual(shape_type, 'Polygon')
+        self.assertTrue(geometry.signed_area(geoms[0].exterior.coords) < 0)
+        self.assertTrue(
+            geometry.signed_area(list(geoms[0].interiors)[0].coords) > 0)
+        self.assertEqual(geoms[1].wkt, multi.wkt)
+        # the hole is assigned to the second exterior that contains it
+        self.assertEqual(len(list(geoms[1].geoms[0].interiors)), 0)
+        self.assertEqual(len(list(geoms[1].geoms[1].interiors)), 1)
+
+    def test_properties(self):
+        import datetime
+        features = [
+            geometry.Feature(geometry.Point(i, i),
+                             {'name': u'caf\xe9 {0}'.format(i), 'count': i,
+                              'ratio': i / 4.0, 'flag': i % 2 == 0,
+                              'day': datetime.date(2020, 1, i + 1),
+                              'missing': None})
+            for i in range(3)]
+        shapefile.write_features(self.path, features)
+        with shapefile.ShapefileReader(self.path + '.shp') as reader:
+            self.assertEqual(reader.encoding, 'UTF-8')
+            self.assertEqual([f[:2] for f in reader.fields],
+                             [('name', 'C'), ('count', 'N'), ('ratio', 'N'),
+                              ('flag', 'L'), ('day', 'D'), ('missing', 'C')])
+            properties = reader[2].properties
+            self.assertEqual(properties['name'], u'caf\xe9 2')
+            self.assertEqual(properties['count'], 2)
+            self.assertEqual(properties['ratio'], 0.5)
+            self.assertEqual(properties['flag'], True)
+            self.assertEqual(properties['day'], datetime.date(2020, 1, 3))
+            self.assertEqual(properties['missing'], '')
+
+    def test_random_access(self):
+        points = [geometry.Point(i, -i) for i in range(50)]
+        shapefile.write_features(self.path, points)
+        with shapefile.ShapefileReader(self.path) as reader:
+            self.assertEqual(len(reader), 50)
+            self.assertEqual(reader[17].geometry.coords, ((17.0, -17.0),))
+            self.assertEqual(reader[-1].geometry.coords, ((49.0, -49.0),))
+            self.assertRaises(IndexError, reader.__getitem__, 50)
+        # without .shx and .dbf the records are walked
+        os.remove(self.path + '.shx')
+        os.remove(self.path + '.dbf')
+        with shapefile.ShapefileReader(self.path) as reader:
+            self.assertEqual(len(reader), 50)
+            self.assertEqual(reader[17].geometry.coords, ((17.0, -17.0),))
+            self.assertEqual(reader[17].properties, {})
+
+    def test_bbox(self):
+        lines = [geometry.LineString([(i, 0), (i + 1, 1)])
+                 for i in range(20)]
+        shapefile.write_features(self.path, lines)
+        found = [f.geometry.coords[0][0] for f in
+                 shapefile.iter_features(self.path, bbox=(4.5, 0, 6.5, 1))]
+        self.assertEqual(found, [4.0, 5.0, 6.0])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, shapefile.write_features, self.path,
+                          [geometry.Point(0, 0),
+                           geometry.LineString([(0, 0), (1, 1)])])
+        self.assertRaises(ValueError, shapefile.write_features, self.path,
+                          [geometry.GeometryCollection(
+                              [geometry.Point(0, 0)])])
+        with open(self.path + '.shp', 'wb') as f:
+            f.write(b'\0' * 100)
+        self.assertRaises(ValueError, shapefile.ShapefileReader, self.path)
+
+
+    def test_point_z_m(self):
+        shapefile.write_features(self.path, [geometry.Point(1, 2, 3)])
+        with open(self.path + '.shp', 'rb') as f:
+            shp = f.read()
+        # X, Y, Z and M after the shape type
+        self.assertEqual(len(shp), 100 + 8 + 36)
+        self.assertEqual(struct.unpack('<i4d', shp[108:]),
+                         (11, 1.0, 2.0, 3.0, shapefile.NO_DATA))
+        with shapefile.ShapefileReader(self.path) as reader:
+            self.assertEqual(reader[0].geometry.coords, ((1.0, 2.0, 3.0),))
+
+    def test_multipatch(self):
+        shapefile.write_features(self.path, [geometry.Point(1, 2)])
+        with open(self.path + '.shp', 'r+b') as f:
+            f.seek(108)
+            f.write(struct.pack('<i', 31))
+        with shapefile.ShapefileReader(self.path) as reader:
+            self.assertRaises(ValueError, reader.__getitem__, 0)
+            self.assertRaises(ValueError, list, reader.features((0, 0, 9, 9)))
+        with open(self.path + '.shp', 'r+b') as f:
+            f.seek(32)
+            f.write(struct.pack('<i', 31))
+        self.assertRaises(ValueError, shapefile.ShapefileReader, self.path)
+
+    def test_field_names(self):
+        properties = {u'stra\xdfenname': 'a', 'population': 1,
+                      'population_2020': 2, 'POPULATION_2021': 3,
+                      u'\u540d\u524d\u540d\u524d': 'b', '': 4}
+        shapefile.write_features(
+            self.path, [geometry.Feature(geometry.Point(0, 0), properties)])
+        with shapefile.ShapefileReader(self.path) as reader:
+            names = [field[0] for field in reader.fields]
+            self.assertEqual(names, [u'stra\xdfenna', 'population',
+                                     'populati_1', 'POPULATI_2',
+                                     u'\u540d\u524d\u540d', '_1'])
+            self.assertEqual(reader[0].properties['POPULATI_2'], 3)
+            self.assertEqual(reader[0].properties[u'\u540d\u524d\u540d'],
+                             'b')
+        shapefile.write_features(
+            self.path, [geometry.Feature(geometry.Point(0, 0), properties)],
+            encoding='latin-1')
+        with shapefile.ShapefileReader(self.path) as reader:
+            self.assertEqual(reader.fields[0][0], u'stra\xdfennam')
+            self.assertEqual(reader.fields[4][0], '????')
+
+    def test_text_encoding(self):
+        features = [geometry.Feature(geometry.Point(0, 0),
+                                     {'name': u'\u540d\u524d', 'n': 1}),
+                    geometry.Feature(geometry.Point(1, 1), None),
+                    geometry.Feature(geometry.Point(2, 2),
+                                     {'name': u'stra\xdfe'})]
+        shapefile.write_features(self.path, features, encoding='latin-1')
+        with shapefile.ShapefileReader(self.path) as reader:
+            self.assertEqual(reader.fields, [('name', 'C', 6, 0),
+                                             ('n', 'N', 1, 0)])
+            self.assertEqual([f.properties for f in reader],
+                             [{'name': '??', 'n': 1},
+                              {'name': '', 'n': None},
+                              {'name': u'stra\xdfe', 'n': None}])
+
+    def test_large_floats(self):
+        values = [1.5, 1e10, -1.234e300, -0.25]
+        shapefile.write_features(
+            self.path, [geometry.Feature(geometry.Point(0, 0), {'v': v})
+                        for v in values])
+        with shapefile.ShapefileReader(self.path) as reader:
+            self.assertEqual(reader.fields, [('v', 'N', 24, 15)])
+            self.assertEqual([f.properties['v'] for f in reader], values)
+
+
+class KMLTestCase(unittest.TestCase):
+
+    document = b"""<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+<Document><name>test</name><Style id="s"/>
+<Folder>
+<Placemark><name>point</name><description>a point</description>
+<ExtendedData><Data name="a"><value>1</value></Data>
+<SchemaData><SimpleData name="b">2</SimpleData></SchemaData></ExtendedData>
+<Point><coordinates>1,2,3</coordinates></Point></Placemark>
+<Placemark><name>line</name><LineString><coordinates>
+  0,0 1,1
+  2,2 </coordinates></LineString></Placemark>
+<Placemark><Polygon>
+<outerBoundaryIs><LinearRing><coordinates>0,0 0,10 10,10 10,0 0,0
+</coordinates></LinearRing></outerBoundaryIs>
+<innerBoundaryIs><LinearRing><coordinates>1,1 2,1 2,2 1,1
+</coordinates></LinearRing></innerBoundaryIs></Polygon></Placemark>
+<Placemark><MultiGeometry>
+<Point><coordinates>1,2</coordinates></Point>
+<Point><coordinates>3,4</coordinates></Point></MultiGeometry></Placemark>
+<Placemark><MultiGeometry>
+<Point><coordinates>1,2</coordinates></Point>
+<LineString><coordinates>0,0 1,1</coordinates></LineString>
+</MultiGeometry></Placemark>
+<Placemark><name>no geometry</name></Placemark>
+</Folder></Document></kml>"""
+
+    def check(self, features):
+        self.assertEqual(len(features), 6)
+        self.assertEqual(features[0].geometry.coords, ((1.0, 2.0, 3.0),))
+        self.assertEqual(features[0].properties,
+                         {'name': 'point', 'description': 'a point',
+                          'a': '1', 'b': '2'})
+        self.assertEqual(features[1].geometry.wkt,
+                         'LINESTRING (0.0 0.0, 1.0 1.0, 2.0 2.0)')
+        self.assertEqual(len(list(features[2].geometry.interiors)), 1)
+        self.assertEqual(features[3].geometry.geom_type, 'MultiPoint')
+        self.assertEqual(features[4].geometry.geom_type,
+                         'GeometryCollection')
+        self.assertEqual(features[5].geometry, None)
+
+    def test_iter_features(self):
+        import io
+        self.check(list(kml.iter_features(io.BytesIO(self.document))))
+
+    def test_files(self):
+        import zipfile
+        fd, path = tempfile.mkstemp(suffix='.kml')
+        os.close(fd)
+        try:
+            with open(path, 'wb') as f:
+                f.write(self.document)
+            self.check(list(kml.iter_features(path)))
+            with zipfile.ZipFile(path, 'w') as archive:
+                archive.writestr('doc.kml', self.document)
+            self.check(list(kml.iter_features(path)))
+        finally:
+            os.remove(path)
+
+    def test_parse_coordinates(self):
+        self.assertEqual(kml.parse_coordinates(' 1,2 3,4\n'),
+                         (array('d', [1, 2, 3, 4]), 2))
+        self.assertEqual(kml.parse_coordinates('1,2,3\t4,5,6'),
+                         (array('d', [1, 2, 3, 4, 5, 6]), 3))
+        # missing altitudes and whitespace after the commas
+        self.assertEqual(kml.parse_coordinates('1,2,3 4,5'),
+                         (array('d', [1, 2, 3, 4, 5, 0]), 3))
+        self.assertEqual(kml.parse_coordinates('1, 2 3, 4'),
+                         (array('d', [1, 2, 3, 4]), 2))
+        self.assertEqual(kml.parse_coordinates('  '), (array('d'), 2))
+
+    def test_from_kml(self):
+        self.assertEqual(kml.from_kml(
+            '<LinearRing><coordinates>0,0 1,0 1,1</coordinates></LinearRing>'
+        ).coords, ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 0.0)))
+        self.assertEqual(kml.from_kml('<Model/>'), None)
+
+
+class CSVTestCase(unittest.TestCase):
+
+    text = ('id,geom,name,lon,lat\n'
+            '1,POINT (1 2),a,1.5,2.5\n'
+            '2,0101000000000000000000F03F0000000000000040,b,3,4\n'
+            '3,"LINESTRING (0 0, 1 1)",c,,\n'
+            '\n'
+            '4,,"d, e",5,6\n')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def write(self, name, opener=open):
+        path = os.path.join(self.directory, name)
+        with opener(path, 'wb') as f:
+            f.write(self.text.encode('utf-8'))
+        return path
+
+    def test_geometry_column(self):
+        path = self.write('test.csv')
+        features = list(loader.read_csv_features(
+            path, geometry_column='geom', types={'id': int}))
+        # the row without a geometry is skipped
+        self.assertEqual(len(features), 3)
+        self.assertEqual(features[0].geometry.wkt, 'POINT (1.0 2.0)')
+        self.assertEqual(features[1].geometry.wkt, 'POINT (1.0 2.0)')
+        self.assertEqual(features[2].geometry.geom_type, 'LineString')
+        self.assertEqual(features[2].properties,
+                         {'id': 3, 'name': 'c', 'lon': '', 'lat': ''})
+
+    def test_xy(self):
+        path = self.write('test.csv')
+        features = list(loader.read_csv_features(path, x='lon', y='lat'))
+        self.assertEqual(features[0].geometry.coords, ((1.5, 2.5),))
+        self.assertEqual([f.properties['id'] for f in features],
+                         ['1', '2', '4'])
+        self.assertEqual(sorted(features[0].properties), ['geom', 'id',
+                                                          'name'])
+        features = list(loader.read_csv_features(path, x='lon', y='lat',
+                                                 z='id'))
+        self.assertEqual(features[1].geometry.coords, ((3.0, 4.0, 2.0),))
+
+    def test_compressed(self):
+        import bz2
+        import gzip
+        for name, opener in [('test.csv.gz', gzip.open),
+                             ('test.csv.bz2', bz2.open),
+                             ('test.csv', open)]:
+            path = self.write(name, opener)
+            features = list(loader.read_csv_features(path, x='lon',
+                                                     y='lat'))
+            self.assertEqual(len(features), 3)
+            self.assertEqual(features[2].properties['name'], 'd, e')
+
+    def test_load_columnar(self):
+        path = self.write('test.csv')
+        collection = loader.load_csv_features(
+            path, geometry_column='geom', types={'lon': float},
+            chunk_size=3)
+        self.assertTrue(collection.columnar)
+        self.assertEqual(len(collection), 3)
+        self.assertEqual(collection._features.column('lon'),
+                         [1.5, 3.0, None])
+        self.assertEqual(collection._features.schema,
+                         ['id', 'name', 'lon', 'lat'])
+        self.assertEqual(list(collection.features)[1].geometry.wkt,
+                         'POINT (1.0 2.0)')
+
+    def test_empty_geometry(self):
+        self.text = 'id,wkt\n1,POINT (1 2)\n2,\n3,POINT (5 6)\n'
+        collection = loader.load_csv_features(self.write('test.csv'),
+                                              geometry_column='wkt')
+        self.assertEqual(len(collection), 2)
+        self.assertEqual(collection.bounds, (1, 2, 5, 6))
+        self.assertEqual(len(collection.where(bbox=(0, 0, 2, 2))), 1)
+        self.assertEqual(len(collection.sorted_spatially()), 2)
+        self.assertEqual(
+            [f['properties']['id']
+             for f in collection.__geo_interface__['features']], ['1', '3'])
+
+    def test_blank_xy(self):
+        self.text = 'id,x,y\n1, 1 ,2\n2, ,3\n3,4,\t\n4,5,6\n'
+        features = list(loader.read_csv_features(self.write('test.csv'),
+                                                 x='x', y='y'))
+        self.assertEqual([f.properties['id'] for f in features], ['1', '4'])
+        self.assertEqual(features[0].geometry.coords, ((1.0, 2.0),))
+
+    def test_errors(self):
+        path = self.write('test.csv')
+        self.assertRaises(ValueError, list, loader.read_csv_features(
+            path, geometry_column='wkt'))
+        self.assertRaises(ValueError, list, loader.read_csv_features(path))
+        self.assertRaises(ValueError, list, loader.read_csv_features(
+            path, geometry_column='geom', x='lon', y='lat'))
+        empty = os.path.join(self.directory, 'empty.csv')
+        open(empty, 'w').close()
+        self.assertEqual(list(loader.read_csv_features(empty, x='x',
+                                                       y='y')), [])
+        self.assertEqual(len(loader.load_csv_features(empty, x='x',
+                                                      y='y')), 0)
+
+
+class StreamingTestCase(unittest.TestCase):
+
+    def run_async(self, coroutine):
+        import asyncio
+        return asyncio.run(coroutine)
+
+    def test_parse_feature(self):
+        f = streaming.parse_feature(
+            b'\x1e{"type": "Feature", "properties": {"a": 1},'
+            b' "geometry": {"type": "Point", "coordinates": [1, 2]}}\n')
+        self.assertEqual(f.geometry.coords, ((1.0, 2.0),))
+        self.assertEqual(f.properties, {'a': 1})
+        f = streaming.parse_feature('{"type": "Feature", "geometry": null,'
+                                    ' "properties": null}')
+        self.assertEqual((f.geometry, f.properties), (None, {}))
+        f = streaming.parse_feature(
+            '{"type": "Polygon", "coordinates": '
+            '[[[0, 0], [0, 1], [1, 1], [0, 0]]]}', normalize=True)
+        self.assertTrue(geometry.signed_area(f.geometry.exterior.coords) > 0)
+        self.assertRaises(ValueError, streaming.parse_feature, '{"type"')
+
+    def test_dumps_feature(self):
+        f = geometry.Feature(geometry.Point(1, 2), {'a': [1]})
+        text = streaming.dumps_feature(f)
+        self.assertFalse('\n' in text)
+        self.assertEqual(streaming.parse_feature(text).properties,
+                         {'a': [1]})
+        self.assertEqual(streaming.dumps_feature(geometry.Point(1, 2)),
+                         '{"type":"Point","coordinates":[1.0,2.0]}')
+
+    def test_empty_geometry(self):
+        # an empty geometry is falsy, but not a missing geometry
+        text = streaming.dumps_feature(
+            geometry.Feature(geometry.MultiPoint([]), {}))
+        self.assertEqual(json.loads(text)['geometry'],
+                         {'type': 'MultiPoint', 'coordinates': []})
+        f = streaming.parse_feature(text)
+        self.assertEqual(f.geometry.geom_type, 'MultiPoint')
+        self.assertEqual(len(f.geometry), 0)
+        self.assertEqual(streaming.dumps_feature(geometry.Feature(None, {})),
+                         '{"type":"Feature","geometry":null,'
+                         '"properties":{}}')
+
+    def test_read(self):
+        import asyncio
+
+        async def read(executor):
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'{"type": "Point", "coordinates": [1, 2]}\n'
+                             b'\n'
+                             b'{"type": "Feature", "properties": {"i": 1},'
+                             b' "geometry": null}')
+            reader.feed_eof()
+            return [f async for f in streaming.aiter_features(
+                reader, executor, batch_size=1)]
+
+        for executor in (None, True, futures.ThreadPoolExecutor(2)):
+            features = self.run_async(read(executor))
+            self.assertEqual(len(features), 2)
+            self.assertEqual(features[0].geometry.coords, ((1.0, 2.0),))
+            self.assertEqual(features[1].properties, {'i': 1})
+
+    def test_round_trip(self):
+        import asyncio
+        import socket
+
+        features = [geometry.Feature(geometry.Point(i, -i), {'i': i})
+                    for i in range(1000)]
+
+        async def round_trip():
+            a, b = socket.socketpair()
+            reader, a_writer = await asyncio.open_connection(sock=a)
+            b_reader, writer = await asyncio.open_connection(sock=b)
+
+            async def produce():
+                count = await streaming.awrite_features(
+                    writer, iter(features), high_water=256)
+                writer.close()
+                return count
+
+            async def consume():
+                result = [f async for f in streaming.aiter_features(
+                    reader, executor=True, batch_size=64)]
+                a_writer.close()
+                return result
+
+            return await asyncio.gather(produce(), consume())
+
+        count, received = self.run_async(round_trip())
+        self.assertEqual(count, 1000)
+        self.assertEqual([f.properties['i'] for f in received],
+                         list(range(1000)))
+        self.assertEqual(received[7].geometry.coords, ((7.0, -7.0),))
+
+    def test_async_source(self):
+        class Writer(object):
+            def __init__(self):
+                self.data = []
+                self.drained = 0
+
+            def write(self, data):
+                self.data.append(data)
+
+            async def drain(self):
+                self.drained += 1
+
+        async def source():
+            for i in range(10):
+                yield geometry.Point(i, i)
+
+        writer = Writer()
+        count = self.run_async(streaming.awrite_features(writer, source(),
+                                                         high_water=100))
+        self.assertEqual(count, 10)
+        self.assertEqual(len(writer.data), 10)
+        self.assertTrue(writer.drained > 2)
+
+
 def test_suite():
     suite = unittest.TestSuite()
     suite.addTest(unittest.makeSuite(BasicTestCase))
     suite.addTest(unittest.makeSuite(WKTTestCase))
     suite.addTest(unittest.makeSuite(AsShapeTestCase))
     suite.addTest(unittest.makeSuite(OrientationTestCase))
+    suite.addTest(unittest.makeSuite(NormalizeOrientationTestCase))
     suite.addTest(unittest.makeSuite(ReprMethodTestCase))
     suite.addTest(unittest.makeSuite(FeatureTestCase))
+    suite.addTest(unittest.makeSuite(MutableCollectionTestCase))
+    suite.addTest(unittest.makeSuite(ColumnarTestCase))
+    suite.addTest(unittest.makeSuite(IndexTestCase))
+    suite.addTest(unittest.makeSuite(CopyTestCase))
+    suite.addTest(unittest.makeSuite(PrecisionTestCase))
+    suite.addTest(unittest.makeSuite(ConvexHullTestCase))
+    suite.addTest(unittest.makeSuite(ValidityTestCase))
+    suite.addTest(unittest.makeSuite(SpatialSortTestCase))
+    suite.addTest(unittest.makeSuite(BufferTestCase))
+    suite.addTest(unittest.makeSuite(CoordinateSequenceTestCase))
+    suite.addTest(unittest.makeSuite(WKBTestCase))
+    suite.addTest(unittest.makeSuite(TWKBTestCase))
+    suite.addTest(unittest.makeSuite(PolylineTestCase))
+    suite.addTest(unittest.makeSuite(FlatGeobufTestCase))
+    suite.addTest(unittest.makeSuite(GeoPackageTestCase))
+    suite.addTest(unittest.makeSuite(ShapefileTestCase))
+    suite.addTest(unittest.makeSuite(KMLTestCase))
+    suite.addTest(unittest.makeSuite(CSVTestCase))
+    suite.addTest(unittest.makeSuite(StreamingTestCase))
+    suite.addTest(unittest.makeSuite(BoundsScanTestCase))
+    suite.addTest(unittest.makeSuite(LoaderTestCase))
+    suite.addTest(unittest.makeSuite(BatchTestCase))
+    suite.addTest(unittest.makeSuite(InstrumentationTestCase))
+    suite.addTest(unittest.makeSuite(MemoryTestCase))
     return suite
 
 if __name__ == '__main__':